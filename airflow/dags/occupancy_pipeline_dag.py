@@ -0,0 +1,35 @@
+# airflow/dags/occupancy_pipeline_dag.py
+"""
+Keeps the stored forecasts (occupancy.Forecast) current.
+
+Runs `manage.py compute_forecasts --stale-only` every 10 minutes: libraries
+whose stored rolling run still matches their latest data are skipped, so a
+tick with no new uploads costs a few queries, and a tick after an upload
+recomputes just the libraries that received data. The hourly roll-over
+makes every library stale once an hour.
+
+OCCUPANCY_MANAGE is the command prefix that reaches the backend's
+manage.py (default: through the docker-compose backend container).
+"""
+import os
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+
+MANAGE = os.getenv("OCCUPANCY_MANAGE", "docker exec wifi_backend python manage.py")
+
+with DAG(
+    dag_id="occupancy_forecasts",
+    start_date=datetime(2025, 8, 1),
+    schedule=timedelta(minutes=10),
+    catchup=False,
+    max_active_runs=1,
+    default_args={"retries": 1, "retry_delay": timedelta(minutes=2)},
+    tags=["occupancy"],
+) as dag:
+    BashOperator(
+        task_id="compute_forecasts",
+        bash_command=f"{MANAGE} compute_forecasts --stale-only",
+        execution_timeout=timedelta(minutes=9),
+    )
@@ -3,6 +3,9 @@ from . import views
 
 urlpatterns = [ 
     path("health/", views.health, name="health-check"),
+    path("artifacts/stats", views.artifact_cache_stats, name="artifact-cache-stats"),
+    path("artifacts/manifest", views.artifact_manifest, name="artifact-manifest"),
+    path("forecast/cache-stats", views.forecast_cache_stats, name="forecast-cache-stats"),
     path("debug/predict", views.predict_debug, name = "predict_debug"),
     path("forecast/debug", views.DebugSeedView.as_view())
 ]
@@ -9,14 +9,31 @@ from django.shortcuts import get_object_or_404
 import numpy as np
 import pandas as pd
 
+from occupancy import forecast_cache, inference_pool, profile_cache, series_cache
 from occupancy.models import Library
-from occupancy.infer import get_series_df, load_artifacts_cached, one_step
+from occupancy.infer import ARTIFACTS, REGISTRY, get_series_df, load_artifacts_cached, one_step
+from occupancy.ml.rollouts import ROLLOUTS
 
 DEFAULT_FAMILY = os.getenv("MODEL_DEFAULT_FAMILY", "cnn-lstm-attn")
 
 def health(request):
     return JsonResponse({"status": "ok"}, status=200)
 
+def artifact_cache_stats(request):
+    """Hit/miss/reload counters and resident bytes of this worker's artifact cache."""
+    return JsonResponse({**ARTIFACTS.stats(), "resident": ARTIFACTS.resident()}, status=200)
+
+def forecast_cache_stats(request):
+    """Hit ratio of this worker's forecast response cache, plus its series, profile and rollout cache counters
+    and the async views' inference pool."""
+    return JsonResponse({"forecast": forecast_cache.stats(), "series": series_cache.stats(),
+                         "profile": profile_cache.stats(), "rollouts": ROLLOUTS.stats(),
+                         "inference": inference_pool.stats()}, status=200)
+
+def artifact_manifest(request):
+    """Every family/library/version folder under artifacts/, as indexed by the registry."""
+    return JsonResponse({"artifacts": REGISTRY.manifest()}, status=200)
+
 def predict_debug(request):
     lib_key = request.GET.get("library", "").strip()
     family  = request.GET.get("family", DEFAULT_FAMILY).strip()
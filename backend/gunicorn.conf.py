@@ -0,0 +1,58 @@
+# gunicorn.conf.py
+# Picked up by the Procfile command. Settings given on the command line still win.
+import gc
+import os
+
+# "true": every worker loads its own models after boot.
+# "fork": the master loads the NumPy-servable models once, before forking, so all
+#         workers share the weight pages copy-on-write; Keras-only models are still
+#         loaded per worker.
+# "false": load lazily on first request.
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower()
+
+if PRELOAD_MODELS == "fork":
+    preload_app = True
+
+
+def _log_rows(log, rows):
+    for r in rows:
+        if r["ok"]:
+            log.info("preloaded %s/%s %s: load %.0f ms, warm-up %.0f ms",
+                     r["family"], r["library"], r["version"], r["load_ms"], r["warm_ms"] or 0)
+        else:
+            log.warning("preload failed for %s/%s %s: %s",
+                        r["family"], r["library"], r["version"], r["error"])
+
+
+def when_ready(server):
+    """Fork mode: load shared models in the master, then freeze the heap before workers fork."""
+    if PRELOAD_MODELS != "fork":
+        return
+    from django.db import connections
+    from occupancy.preload import preload_active_models
+
+    try:
+        _log_rows(server.log, preload_active_models(numpy_only=True))
+    except Exception:  # an exception here kills the master; workers load the models themselves
+        server.log.exception("fork preload skipped; workers will load their own models")
+    finally:
+        connections.close_all()  # never hand a DB socket to the workers
+    # Move everything allocated so far out of GC tracking: collections in the
+    # workers won't touch (and so won't copy) the master's object pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_worker_init(worker):
+    """Load + warm every active model before this worker accepts traffic."""
+    if PRELOAD_MODELS not in ("true", "fork"):
+        return
+    from occupancy.preload import preload_active_models
+
+    # In fork mode the shared models are already cached; this picks up the rest
+    try:
+        rows = preload_active_models()
+    except Exception:  # e.g. DB unreachable at boot: serve anyway, models load on first request
+        worker.log.exception("preload skipped; models will load lazily")
+        return
+    _log_rows(worker.log, rows)
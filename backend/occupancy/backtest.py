@@ -0,0 +1,196 @@
+# occupancy/backtest.py
+"""
+Rolling-origin backtest of every ModelCandidate against the stored history.
+
+For each library, the last `days` days of corrected hourly occupancy
+(SignalHourly, ending at the watermark) are replayed: every hour after the
+first `window` is an origin, seeded with the `window` hours before it, and
+each candidate forecasts from it the way the API would (same features and
+post-processing as infer.walk_forward):
+
+  1 step    all windows are views of ONE feature matrix
+            (sliding_window_view), scored BACKTEST_BATCH windows per
+            forward pass
+  n steps   recursive rollouts from every origin through walk_forward_many,
+            which advances all origins sharing a model with one stacked
+            forward pass per step
+
+Scores (mse, rmse, r2 over every predicted hour) become one ModelEvaluation
+row per (candidate, horizon) run; `notes` records the horizon and the span.
+Hybrid post-processing reads the wall clock, so scores are for predictions
+as served at evaluation time.
+
+Libraries run in parallel in a process pool. DB reads happen before it
+starts and the rows are written after it is done; the workers never touch
+the database.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from django.db import connections
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .infer import ARTIFACTS, LIBRARY_CAPACITIES, _is_hybrid, _one_step_simple, _scale_hybrid, walk_forward_many
+from .ml.features import FeaturePlan, calendar_slots
+from .models import Library, ModelCandidate, ModelEvaluation
+from .series_cache import _hour_no, _hour_ts, hourly_from_db
+
+BACKTEST_BATCH = int(os.getenv("BACKTEST_BATCH", "2048"))
+
+
+def metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, Any]:
+    """mse, rmse and r2 over every (origin, step); r2 is None for a constant target."""
+    y_true = np.asarray(y_true, dtype=float).ravel()
+    y_pred = np.asarray(y_pred, dtype=float).ravel()
+    sse = float(np.sum((y_true - y_pred) ** 2))
+    sst = float(np.sum((y_true - y_true.mean()) ** 2))
+    mse = sse / len(y_true)
+    return {"n": int(len(y_true)), "mse": mse, "rmse": float(np.sqrt(mse)),
+            "r2": (1.0 - sse / sst) if sst > 0 else None}
+
+
+def _origins(n_hours: int, window: int, steps: int, stride: int) -> np.ndarray:
+    """Positions of the first predicted hour of every rollout that fits in the span."""
+    return np.arange(int(window), n_hours - int(steps) + 1, max(1, int(stride)))
+
+
+def one_step_predictions(artifacts, lib_key: str, index: pd.DatetimeIndex, values: np.ndarray,
+                         origins: np.ndarray) -> np.ndarray:
+    """walk_forward(steps=1) from each origin, batched over the origins."""
+    model, scaler, window, meta = artifacts
+    window = int(window)
+    values = np.asarray(values, dtype=float)
+    if not _is_hybrid(meta, index):
+        seeds = sliding_window_view(values, window)[origins - window]
+        return np.array([_one_step_simple(model, scaler, window, seed, lib_key) for seed in seeds])
+
+    plan = meta.get("feature_plan") or FeaturePlan(meta["feature_order"], meta["ohe"])
+    capacity = LIBRARY_CAPACITIES.get(lib_key, 100)
+    rows = plan.rows(calendar_slots(index), values, capacity)        # (hours, features)
+    windows = sliding_window_view(rows, window, axis=0)              # (hours - window + 1, features, window)
+    out = np.empty(len(origins), dtype=float)
+    for a in range(0, len(origins), BACKTEST_BATCH):
+        starts = origins[a:a + BACKTEST_BATCH] - window
+        X = np.ascontiguousarray(windows[starts].transpose(0, 2, 1))  # (batch, window, features)
+        ys = np.asarray(model.predict(X, verbose=0), dtype=float).reshape(len(starts), -1)[:, 0]
+        out[a:a + len(starts)] = [_scale_hybrid(y, scaler, lib_key) for y in ys]
+    return out
+
+
+def recursive_predictions(artifacts, lib_key: str, index: pd.DatetimeIndex, values: np.ndarray,
+                          origins: np.ndarray, steps: int) -> np.ndarray:
+    """(origins, steps) walk_forward rollouts, BACKTEST_BATCH origins per walk_forward_many call."""
+    model, scaler, window, meta = artifacts
+    window = int(window)
+    values = np.asarray(values, dtype=float)
+    out = np.empty((len(origins), int(steps)), dtype=float)
+    for a in range(0, len(origins), BACKTEST_BATCH):
+        chunk = origins[a:a + BACKTEST_BATCH]
+        jobs = [{"model": model, "scaler": scaler, "window": window, "meta": meta, "lib_key": lib_key,
+                 "base_series": values[o - window:o], "base_index": index[o - window:o]} for o in chunk]
+        out[a:a + len(chunk)] = np.stack(walk_forward_many(jobs, steps))
+    return out
+
+
+def score(artifacts, lib_key: str, index: pd.DatetimeIndex, values: np.ndarray, steps: int,
+          stride: int = 1) -> Dict[str, Any]:
+    """Metrics of `steps`-hour forecasts from every `stride`-th origin of the span."""
+    window = int(artifacts[2])
+    origins = _origins(len(values), window, steps, stride)
+    if not len(origins):
+        raise ValueError(f"Not enough history: {len(values)} h for window {window} + {steps} step(s)")
+    actual = sliding_window_view(np.asarray(values, dtype=float), int(steps))[origins]  # (origins, steps)
+    if steps == 1:
+        pred = one_step_predictions(artifacts, lib_key, index, values, origins)[:, None]
+    else:
+        pred = recursive_predictions(artifacts, lib_key, index, values, origins, steps)
+    return {**metrics(actual, pred), "origins": int(len(origins))}
+
+
+def _backtest_library(job: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every candidate x horizon for one library (pool worker; no DB access)."""
+    index = pd.date_range(_hour_ts(job["start_hour"]), periods=len(job["values"]), freq="h")
+    results = []
+    for cand in job["candidates"]:
+        try:
+            artifacts = ARTIFACTS.get(cand["family"], job["library"], cand["version"])
+        except Exception as e:  # report, don't abort the other candidates
+            results.extend({**cand, "horizon": h, "skipped": False, "error": f"{type(e).__name__}: {e}"}
+                           for h in job["horizons"])
+            continue
+        for h in job["horizons"]:
+            t0 = time.perf_counter()
+            try:
+                res = {**cand, "horizon": h, "skipped": False, "error": None,
+                       **score(artifacts, job["library"], index, job["values"], h, job["stride"])}
+            except Exception as e:
+                res = {**cand, "horizon": h, "skipped": False, "error": f"{type(e).__name__}: {e}"}
+            res["ms"] = (time.perf_counter() - t0) * 1e3
+            results.append(res)
+    return results
+
+
+def run_backtest(library_keys: Optional[List[str]] = None, families: Optional[List[str]] = None,
+                 days: int = 14, horizons: Sequence[int] = (1, 24), stride: int = 1,
+                 max_workers: Optional[int] = None, save: bool = True) -> List[Dict[str, Any]]:
+    """
+    Backtest every candidate of every library over its last `days` days and
+    (with `save`) store one ModelEvaluation per candidate and horizon.
+    max_workers=1 runs in this process. Returns one report row per run
+    (skipped for libraries without data).
+    """
+    from .forecast_store import watermark
+
+    libs = Library.objects.order_by("key")
+    if library_keys:
+        libs = libs.filter(key__in=library_keys)
+    jobs, report = [], []
+    for lib in libs:
+        cands = ModelCandidate.objects.filter(library=lib).order_by("family", "version")
+        if families:
+            cands = cands.filter(family__in=families)
+        cands = [{"candidate": c.pk, "library": lib.key, "family": c.family, "version": c.version} for c in cands]
+        if not cands:
+            continue
+        end = watermark(lib)
+        if end is None:
+            report.extend({**c, "horizon": h, "skipped": True, "error": None} for c in cands for h in horizons)
+            continue
+        end_h = _hour_no(end)
+        start_h = end_h - int(days) * 24 + 1
+        jobs.append({"library": lib.key, "candidates": cands, "horizons": [int(h) for h in horizons],
+                     "stride": int(stride), "start_hour": start_h,
+                     "values": hourly_from_db(lib, start_h, end_h)})
+    if not jobs:
+        return report
+
+    workers = max_workers or min(os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        results = [_backtest_library(job) for job in jobs]
+    else:
+        connections.close_all()  # forked workers must not share the parent's DB connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            results = list(pool.map(_backtest_library, jobs))
+
+    evaluations = []
+    for job, rows in zip(jobs, results):
+        first, last = _hour_ts(job["start_hour"]), _hour_ts(job["start_hour"] + len(job["values"]) - 1)
+        span = f"{first:%Y-%m-%dT%H:%MZ}..{last:%Y-%m-%dT%H:%MZ}"
+        for row in rows:
+            report.append(row)
+            if row["error"] is None:
+                evaluations.append(ModelEvaluation(
+                    candidate_id=row["candidate"], r2=row["r2"], mse=row["mse"], rmse=row["rmse"],
+                    notes=(f"backtest horizon={row['horizon']}h origins={row['origins']} "
+                           f"stride={job['stride']}h span={span}")))
+    if save and evaluations:
+        ModelEvaluation.objects.bulk_create(evaluations)
+    report.sort(key=lambda r: (r["library"], r["family"], r["version"], r["horizon"]))
+    return report
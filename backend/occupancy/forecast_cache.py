@@ -0,0 +1,342 @@
+# occupancy/forecast_cache.py
+"""
+Response cache for the forecast endpoints.
+
+A cached forecast is keyed by the request (library, family, version and the
+requested `when`(s) / `date` / `start`+`end` as sent) plus two per-library
+stamps kept in the Django cache and the current UTC hour:
+
+  data stamp    bumped after every rollup commit (uploads, single signal
+                edits, backfills), i.e. whenever the data watermark moves
+  model stamp   bumped when the library's ActiveModel or ModelCandidates
+                change, so an omitted family/version resolves afresh
+  UTC hour      forecasts are anchored on "now" (history end, hybrid
+                calendar features), so they also roll over every hour
+
+Stamps never need deleting: bumping one makes every older key unreachable
+and FORECAST_CACHE_TTL reclaims them. A hit touches neither the database
+nor the model.
+
+Misses are single-flight: the first request for a key computes it, and
+identical requests arriving meanwhile wait for its result instead of
+running the same rollout again. Within a worker they wait on the leader's
+in-process flight; across workers the leader holds `<key>:flight` (taken
+with cache.add) and the others poll for the stored response. Nobody waits
+longer than FORECAST_FLIGHT_WAIT seconds; the lock expires on its own if
+its holder dies.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.response import Response
+
+FORECAST_CACHE_TTL = int(os.getenv("FORECAST_CACHE_TTL", "3600"))
+# Longest a request waits for an identical one already computing before computing itself (seconds)
+FORECAST_FLIGHT_WAIT = float(os.getenv("FORECAST_FLIGHT_WAIT", "10"))
+FORECAST_FLIGHT_POLL = 0.02
+
+_STATS = {"hits": 0, "misses": 0, "stores": 0, "errors": 0,
+          "coalesced": 0, "coalesced_remote": 0, "flight_timeouts": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def stats() -> Dict[str, float]:
+    with _STATS_LOCK:
+        out: Dict[str, float] = dict(_STATS)
+    lookups = out["hits"] + out["misses"]
+    out["hit_ratio"] = round(out["hits"] / lookups, 4) if lookups else 0.0
+    return out
+
+
+def reset_stats() -> None:
+    with _STATS_LOCK:
+        for k in _STATS:
+            _STATS[k] = 0
+
+
+# -------------------- stamps --------------------
+def _stamp_key(kind: str, lib_key: str) -> str:
+    return f"occupancy:stamp:{kind}:{lib_key}"
+
+
+def _bump(kind: str, lib_key: str) -> Optional[int]:
+    stamp = time.time_ns()
+    try:
+        cache.set(_stamp_key(kind, lib_key), stamp, None)
+    except Exception:
+        _count("errors")
+        return None
+    return stamp
+
+
+def bump_data(lib_key: str) -> Optional[int]:
+    """New or changed signals for `lib_key`: forget its cached forecasts. Returns the new stamp."""
+    return _bump("data", lib_key)
+
+
+def bump_model(lib_key: str) -> None:
+    """Active model / candidates of `lib_key` changed: forget its cached forecasts."""
+    _bump("model", lib_key)
+
+
+def stamps(lib_key: str) -> Tuple[int, int]:
+    """(data, model) stamps of a library, created on first use."""
+    keys = [_stamp_key("data", lib_key), _stamp_key("model", lib_key)]
+    got = cache.get_many(keys)
+    if len(got) < len(keys):
+        for k in keys:
+            if k not in got:
+                cache.add(k, time.time_ns(), None)  # add: a concurrent bump wins
+        got = cache.get_many(keys)
+    return got[keys[0]], got[keys[1]]
+
+
+# -------------------- responses --------------------
+def response_key(view: str, lib_key: str, family: Optional[str], version: Optional[str], target: str) -> str:
+    data, model = stamps(lib_key)
+    hour = int(time.time()) // 3600
+    return f"occupancy:forecast:{view}:{lib_key}:{family or ''}:{version or ''}:{target}:{data}:{model}:{hour}"
+
+
+def _request_key(view: str, params, target_params) -> Optional[str]:
+    """Cache key of a request, or None when `library` or a target parameter is missing."""
+    lib_key = (params.get("library") or "").strip()
+    targets = [",".join(v.strip() for v in params.getlist(p) if v.strip()) for p in target_params]
+    if not lib_key or not all(targets):
+        return None
+    family = (params.get("family") or "").strip() or None
+    version = (params.get("version") or "").strip() or None
+    return response_key(view, lib_key, family, version, "|".join(targets))
+
+
+# -------------------- single flight --------------------
+class _Flight:
+    """One in-process computation of a key; `data` is its 200 body (None when it failed)."""
+    __slots__ = ("done", "data")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+
+
+_FLIGHTS: Dict[str, _Flight] = {}
+_FLIGHTS_LOCK = threading.Lock()
+
+
+def _join(key: str) -> Tuple[_Flight, bool]:
+    """The in-process flight for `key` and whether this caller leads (computes) it."""
+    with _FLIGHTS_LOCK:
+        flight = _FLIGHTS.get(key)
+        if flight is not None:
+            return flight, False
+        flight = _FLIGHTS[key] = _Flight()
+        return flight, True
+
+
+def _land(key: str, flight: _Flight, data) -> None:
+    flight.data = data
+    with _FLIGHTS_LOCK:
+        _FLIGHTS.pop(key, None)
+    flight.done.set()
+
+
+def _lock_key(key: str) -> str:
+    return f"{key}:flight"
+
+
+def _acquire(key: str) -> bool:
+    """Take the cross-worker lock of `key` (expires after FORECAST_FLIGHT_WAIT if its holder dies)."""
+    try:
+        return cache.add(_lock_key(key), os.getpid(), int(FORECAST_FLIGHT_WAIT) + 1)
+    except Exception:  # no shared lock: compute
+        _count("errors")
+        return True
+
+
+def _release(key: str) -> None:
+    try:
+        cache.delete(_lock_key(key))
+    except Exception:
+        _count("errors")
+
+
+def _peek(key: str):
+    try:
+        return cache.get(key)
+    except Exception:
+        _count("errors")
+        return None
+
+
+# -------------------- the protocol --------------------
+# Steps of _flow that block, run by the sync or the async driver
+_IO, _SLEEP, _FOLLOW, _CALL = "io", "sleep", "follow", "call"
+
+
+def _flow(view: str, params, target_params):
+    """
+    One request through the response cache and single flight, written once
+    for both decorators as a generator of the steps that block:
+
+      (_IO, fn, *args)   cache access: send fn(*args) (or throw its error)
+      (_SLEEP, seconds)
+      (_FOLLOW, flight)  wait up to FORECAST_FLIGHT_WAIT for the in-process leader
+      (_CALL,)           run the view: send (response, its 200 body or None)
+
+    Returns (body, None) to answer with a cached or coalesced body, or
+    (None, response) when the view ran.
+    """
+    try:
+        key = yield _IO, _request_key, view, params, target_params
+        data = (yield _IO, cache.get, key) if key else None
+    except Exception:  # cache backend down: compute as if uncached
+        _count("errors")
+        key = None
+    if key is None:
+        resp, _body = yield (_CALL,)
+        return None, resp
+    if data is not None:
+        _count("hits")
+        return data, None
+
+    flight, leader = _join(key)
+    if not leader:
+        yield _FOLLOW, flight
+        if flight.data is not None:
+            _count("coalesced")
+            return flight.data, None
+        _count("misses")  # the leader failed or is too slow: compute
+        resp, _body = yield (_CALL,)
+        return None, resp
+
+    data, held = None, False
+    try:
+        # Another worker holding the lock computes it: wait for the body it stores
+        held = yield _IO, _acquire, key
+        deadline = time.monotonic() + FORECAST_FLIGHT_WAIT
+        while not held:
+            if time.monotonic() >= deadline:
+                _count("flight_timeouts")  # compute anyway
+                break
+            yield _SLEEP, FORECAST_FLIGHT_POLL
+            data = yield _IO, _peek, key
+            if data is not None:
+                _count("coalesced_remote")
+                return data, None
+            held = yield _IO, _acquire, key  # the holder finished without storing (error, non-200)
+
+        _count("misses")
+        resp, data = yield (_CALL,)
+        if data is not None:
+            try:
+                yield _IO, cache.set, key, data, FORECAST_CACHE_TTL
+                _count("stores")
+            except Exception:
+                _count("errors")
+        return None, resp
+    finally:
+        if held:
+            yield _IO, _release, key
+        _land(key, flight, data)
+
+
+def _drive(flow, call):
+    """Run a _flow in this thread; `call()` returns (response, 200 body or None)."""
+    send, error = None, None
+    while True:
+        try:
+            step = flow.throw(error) if error is not None else flow.send(send)
+        except StopIteration as done:
+            return done.value
+        send, error = None, None
+        try:
+            if step[0] == _IO:
+                send = step[1](*step[2:])
+            elif step[0] == _SLEEP:
+                time.sleep(step[1])
+            elif step[0] == _FOLLOW:
+                step[1].done.wait(FORECAST_FLIGHT_WAIT)
+            else:
+                send = call()
+        except BaseException as e:  # into the flow, so its lock and flight are always released
+            error = e
+
+
+async def _adrive(flow, call):
+    """_drive without blocking the event loop; `call()` is a coroutine function."""
+    send, error = None, None
+    while True:
+        try:
+            step = flow.throw(error) if error is not None else flow.send(send)
+        except StopIteration as done:
+            return done.value
+        send, error = None, None
+        try:
+            if step[0] == _IO:
+                send = await sync_to_async(step[1])(*step[2:])
+            elif step[0] == _SLEEP:
+                await asyncio.sleep(step[1])
+            elif step[0] == _FOLLOW:
+                deadline = time.monotonic() + FORECAST_FLIGHT_WAIT
+                while not step[1].done.is_set() and time.monotonic() < deadline:
+                    await asyncio.sleep(FORECAST_FLIGHT_POLL)
+            else:
+                send = await call()
+        except BaseException as e:
+            error = e
+
+
+# -------------------- decorators --------------------
+def cached_forecast(view: str, *target_params: str):
+    """
+    Wrap an APIView `get` so successful (200) responses are served from the
+    cache. Requests missing `library` or any of `target_params` go straight
+    through and get the view's own 400. On a miss, concurrent identical
+    requests in this process wait for the first one, and workers sharing
+    the cache wait on its lock, so only one of them computes.
+    """
+    def deco(get):
+        @wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            def call():
+                resp = get(self, request, *args, **kwargs)
+                return resp, (resp.data if resp.status_code == 200 else None)
+
+            body, resp = _drive(_flow(view, request.query_params, target_params), call)
+            return resp if resp is not None else Response(body, status=200)
+        return wrapper
+    return deco
+
+
+def acached_forecast(view: str, *target_params: str):
+    """
+    cached_forecast for an async Django view returning a JsonResponse. Keys
+    and flights are the same, so sync and async views of one endpoint share
+    entries.
+    """
+    def deco(get):
+        @wraps(get)
+        async def wrapper(self, request, *args, **kwargs):
+            async def call():
+                resp = await get(self, request, *args, **kwargs)
+                return resp, (json.loads(resp.content) if resp.status_code == 200 else None)
+
+            body, resp = await _adrive(_flow(view, request.GET, target_params), call)
+            return resp if resp is not None else JsonResponse(body, status=200)
+        return wrapper
+    return deco
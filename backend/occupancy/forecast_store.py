@@ -0,0 +1,195 @@
+# occupancy/forecast_store.py
+"""
+Precomputed forecasts in the Forecast table.
+
+A *run* is one recursive rollout for (library, family, version) from a base
+hour B: rows ts = B + k hours, horizon_min = 60 * k, for k = 1..steps, so a
+run is identified by its base (ts - horizon_min). compute_forecasts writes,
+per library and its active model:
+
+  - a rolling run from the current hour, which ForecastAtView reads
+  - one run per upcoming local day from that day's midnight, which is
+    exactly what ForecastDayView would compute for it
+
+A run is served only while it is current: every row's data_ts equals the
+library's watermark (latest SignalHourly hour with samples), and it was
+written in the current hour and at most FORECAST_STORE_MAX_AGE seconds ago
+(hybrid post-processing caps by the current local hour and weekday).
+Otherwise the views fall back to live inference.
+"""
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .infer import PH_TZ, load_artifacts_cached
+from .models import Forecast, Library, SignalHourly
+from .utils.active import get_active_family_version
+
+FORECAST_STORE_MAX_AGE = int(os.getenv("FORECAST_STORE_MAX_AGE", "3600"))
+
+
+def watermark(library: Library):
+    """Latest UTC hour with observed data for the library (None when it has none)."""
+    return (SignalHourly.objects.filter(library=library, samples__gt=0)
+            .aggregate(last=Max("hour"))["last"])
+
+
+def load_run(library: Library, family: str, version: str, base_utc: pd.Timestamp,
+             steps: int) -> Optional[np.ndarray]:
+    """Predictions for base+1h .. base+steps h from a current stored run, else None."""
+    out = load_prefix(library, family, version, base_utc, steps)
+    return out if out is not None and len(out) == steps else None
+
+
+def load_prefix(library: Library, family: str, version: str, base_utc: pd.Timestamp,
+                steps: int) -> Optional[np.ndarray]:
+    """
+    The stored predictions for base+1h .. base+k h of a current run, for the
+    largest k <= steps that has every hour (None when there is none, or when
+    any stored row of the run is stale).
+    """
+    base = pd.Timestamp(base_utc).tz_convert("UTC").to_pydatetime()
+    now = timezone.now()
+    # Manila is UTC+8, so the UTC hour is also the local hour the live path caps by
+    fresh_since = max(now - timedelta(seconds=FORECAST_STORE_MAX_AGE), now.replace(minute=0, second=0, microsecond=0))
+    rows = list(Forecast.objects
+                .filter(library=library, model_family=family, model_version=version,
+                        ts__gt=base, ts__lte=base + timedelta(hours=steps),
+                        horizon_min__gte=60, horizon_min__lte=60 * steps,
+                        created_at__gte=fresh_since)
+                .values_list("ts", "horizon_min", "occupancy_pred", "data_ts"))
+    out = np.full(steps, np.nan)
+    marks = set()
+    for ts, horizon, pred, data_ts in rows:
+        k = horizon // 60
+        if ts - timedelta(minutes=horizon) == base:
+            out[k - 1] = pred
+            marks.add(data_ts)
+    if not marks or marks != {watermark(library)}:
+        return None
+    missing = np.flatnonzero(np.isnan(out))
+    k = int(missing[0]) if len(missing) else steps
+    return out[:k] if k else None
+
+
+def _run_rows(library: Library, family: str, version: str, base_utc: pd.Timestamp, preds: np.ndarray,
+              data_ts) -> List[Forecast]:
+    return [
+        Forecast(library=library, ts=(base_utc + pd.Timedelta(hours=k)).to_pydatetime(), horizon_min=60 * k,
+                 occupancy_pred=float(p), model_version=version, model_family=family,
+                 data_ts=data_ts)
+        for k, p in enumerate(np.asarray(preds, dtype=float), start=1)
+    ]
+
+
+def _compute_one(job: Dict[str, Any], hours: int) -> Dict[str, Any]:
+    """Model work for one library (no DB access: histories were fetched by the caller)."""
+    from .views_forecast import _forecast_steps, day_rollout
+
+    out = {"runs": [], "error": None, "ms": None}
+    t0 = time.perf_counter()
+    try:
+        model, scaler, window, meta = job["artifacts"]
+        lib_key = job["library"].key
+        rolling = job["rolling"]
+        if len(rolling) >= int(window):
+            preds = _forecast_steps(model, scaler, window, rolling.values.astype(float), hours,
+                                    pd.DatetimeIndex(rolling.index), meta, lib_key)
+            out["runs"].append((rolling.index[-1], preds))
+        for start_utc, history in job["days"]:
+            if len(history) >= int(window):
+                out["runs"].append((start_utc, day_rollout(model, scaler, window, meta, lib_key, history, start_utc)))
+    except Exception as e:  # report, don't abort the other libraries
+        out["error"] = f"{type(e).__name__}: {e}"
+    out["ms"] = (time.perf_counter() - t0) * 1e3
+    return out
+
+
+def compute_forecasts(library_keys: Optional[List[str]] = None, hours: int = 24, days: int = 2,
+                      max_workers: Optional[int] = None, stale_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Compute and store the rolling run and the next `days` local-day runs for
+    every library's active model. Artifacts load and rollouts run in a thread
+    pool across libraries; DB reads and the bulk upsert stay on this thread.
+    Returns one report row per library.
+    """
+    from .views_forecast import day_history, rolling_history
+
+    now_h = pd.Timestamp.now(tz="UTC").floor("h")
+    today = now_h.tz_convert(PH_TZ).normalize()
+    day_starts = [(today + pd.Timedelta(days=d)).tz_convert("UTC") for d in range(days)]
+
+    libs = Library.objects.order_by("key")
+    if library_keys:
+        libs = libs.filter(key__in=library_keys)
+    jobs = []
+    report: List[Dict[str, Any]] = []
+    for lib in libs:
+        family, version = get_active_family_version(lib)
+        row = {"library": lib.key, "family": family, "version": version, "rows": 0, "ms": None,
+               "skipped": False, "error": None}
+        report.append(row)
+        if stale_only and load_run(lib, family, version, now_h, hours) is not None:
+            row["skipped"] = True
+            continue
+        jobs.append({"library": lib, "family": family, "version": version, "report": row,
+                     "data_ts": watermark(lib)})
+    if not jobs:
+        return report
+
+    workers = max_workers or min(8, len(jobs))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        loaded = list(pool.map(_load, jobs))
+        for job, (artifacts, error) in zip(jobs, loaded):
+            job["artifacts"], job["report"]["error"] = artifacts, error
+        jobs = [j for j in jobs if j["artifacts"] is not None]
+        for job in jobs:
+            window = int(job["artifacts"][2])
+            job["rolling"] = rolling_history(job["library"], window)
+            job["days"] = [(s, day_history(job["library"], window, s)) for s in day_starts]
+
+        results = list(pool.map(lambda j: _compute_one(j, hours), jobs))
+
+    rows: Dict[tuple, Forecast] = {}
+    for job, res in zip(jobs, results):
+        job["report"]["error"], job["report"]["ms"] = res["error"], res["ms"]
+        keys = set()
+        for base, preds in res["runs"]:
+            for f in _run_rows(job["library"], job["family"], job["version"], base, preds, job["data_ts"]):
+                # With the watermark at a local midnight the rolling run and that day's run share a base;
+                # one upsert may not touch a row twice (Postgres rejects the whole statement)
+                key = (f.library_id, f.ts, f.horizon_min, f.model_version, f.model_family)
+                rows[key] = f
+                keys.add(key)
+        job["report"]["rows"] = len(keys)
+    with transaction.atomic():
+        Forecast.objects.bulk_create(
+            list(rows.values()), batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["library", "ts", "horizon_min", "model_version", "model_family"],
+            update_fields=["occupancy_pred", "data_ts", "created_at"],  # created_at: auto_now_add, i.e. now
+        )
+    return report
+
+
+def _load(job: Dict[str, Any]) -> Tuple[Optional[tuple], Optional[str]]:
+    try:
+        return load_artifacts_cached(job["family"], job["library"].key, job["version"]), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def prune(days: int = 7) -> int:
+    """Delete stored forecasts whose target hour is more than `days` days in the past."""
+    deleted, _ = Forecast.objects.filter(ts__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -1,10 +1,16 @@
 # infer.py
+import logging
 from pathlib import Path
-import json, pickle, numpy as np
+import numpy as np
 import pandas as pd
 from django.conf import settings
-from functools import lru_cache
-from keras.models import load_model
+
+from .ml.features import FeaturePlan, WindowRing, calendar_slots
+from .ml.loader import ARTIFACTS, REGISTRY, load_artifacts_dir
+from .ml.remote import CLIENT, RemoteModel, remote_artifacts, rollout_job
+from .ml.rollouts import ROLLOUTS, rollout_key
+
+logger = logging.getLogger(__name__)
 
 ARTIFACTS_ROOT = Path(settings.BASE_DIR) / "artifacts"
 PH_TZ = "Asia/Manila"
@@ -34,73 +40,36 @@ def correct_live_occupancy(raw_occupancy, lib_key):
 def _utc_now():
     return pd.Timestamp.now(tz="UTC")
 
-@lru_cache(maxsize=64)
 def load_artifacts_cached(family: str, lib_key: str, version: str):
-    return load_artifacts(family, lib_key, version)
+    if CLIENT is not None:
+        try:
+            return remote_artifacts(family, lib_key, version)
+        except OSError as e:
+            logger.warning("Inference server unreachable (%s); loading %s/%s in-process", e, family, lib_key)
+    return ARTIFACTS.get(family, lib_key, version)
 
 def load_artifacts(family: str, lib_key: str, version: str):
-    root = ARTIFACTS_ROOT / family / lib_key
-    model_p = root / "model.keras"
-    pre_p   = root / "preproc.pkl"
-    meta_p  = root / "meta.json"
-    for p in (model_p, pre_p, meta_p):
-        if not p.exists():
-            raise FileNotFoundError(f"Missing artifact: {p.as_posix()}")
-
-    model  = load_model(model_p, compile=False)
-    with open(pre_p, "rb") as f: preproc = pickle.load(f)
-    with open(meta_p, "r")  as f: meta    = json.load(f)
-
-    window = int(preproc["spec"]["window"])
-    scaler = preproc.get("occ_scaler", None)
-
-    feature_order = preproc.get("spec", {}).get("feature_order")
-    ohe = preproc.get("ohe")
-    scaling_metadata = preproc.get("spec", {}).get("scaling_metadata", {})
-    
-    if isinstance(meta, dict):
-        meta = {**meta, "feature_order": feature_order, "ohe": ohe, "scaling_metadata": scaling_metadata}
-    else:
-        meta = {"model_version": "v1", "feature_order": feature_order, "ohe": ohe, "scaling_metadata": scaling_metadata}
-
-    return model, scaler, window, meta
+    """Uncached load of (model, scaler, window, meta); see ml.loader.load_artifacts_dir."""
+    return load_artifacts_dir(REGISTRY.resolve(family, lib_key, version), family)
 
 # -------------------- Data fetch --------------------
 def get_series_df(library, hours: int = 14*24, end_utc: pd.Timestamp | None = None):
-    from .models import Signal
+    """
+    Corrected hourly occupancy for the `hours` hours ending at `end_utc`
+    (default: the current hour), from the SignalHourly rollup via the
+    shared series cache; hours with no data are 0.
+    """
+    from .series_cache import hourly_values
 
     need = max(1, int(hours))
     end = (end_utc.tz_convert("UTC").floor("h") if isinstance(end_utc, pd.Timestamp)
            else _utc_now().floor("h"))
     start = end - pd.Timedelta(hours=need-1)
-
-    qs = (Signal.objects
-          .filter(library=library, ts__gte=start, ts__lte=end)
-          .order_by("ts")
-          .values_list("ts", "wifi_clients"))
-    df = pd.DataFrame(list(qs), columns=["ts", "wifi_clients"])
-
-    if df.empty:
-        qs2 = (Signal.objects
-               .filter(library=library)
-               .order_by("-ts")
-               .values_list("ts", "wifi_clients")[: need * 2])
-        df = pd.DataFrame(list(qs2), columns=["ts", "wifi_clients"]).iloc[::-1]
-        if df.empty:
-            idx = pd.date_range(start=start, end=end, freq="h", tz="UTC")
-            return pd.Series(0, index=idx, name="occupancy")
-
-    df["ts"] = pd.to_datetime(df["ts"], utc=True, errors="coerce")
-    df = df.dropna(subset=["ts"]).set_index("ts").sort_index()
-    s = df["wifi_clients"].resample("h").max().fillna(0).astype(int)
-
-    lib_key = library.key if hasattr(library, 'key') else str(library)
-    s = s.apply(lambda x: correct_live_occupancy(x, lib_key))
-    s = s.round().astype(int)
-
     idx = pd.date_range(start=start, end=end, freq="h", tz="UTC")
-    s = s.reindex(idx, fill_value=0)
-    return s.rename("occupancy")
+
+    # Shared per-library cache of recent hours, backed by the SignalHourly rollup
+    vals = hourly_values(library, start, end).astype(int)
+    return pd.Series(vals, index=idx, name="occupancy")
 
 # -------------------- ENHANCED Feature engineering --------------------
 def _sched_row(ts_local: pd.Timestamp) -> dict:
@@ -219,7 +188,7 @@ def _row_vector(ts_utc: pd.Timestamp, occ_value: float, occ_scaler, ohe, feature
             # Scale based on library capacity, not training data range
             occ_scaled = occ_value / library_capacity  # Convert to 0-1 range based on capacity
         except Exception as e:
-            print(f"Capacity scaling error: {e}, using fallback")
+            logger.warning("Capacity scaling error: %s, using fallback", e)
             occ_scaled = occ_value / 100  # Fallback scaling
     else:
         # Manual capacity-based scaling
@@ -251,7 +220,7 @@ def _row_vector(ts_utc: pd.Timestamp, occ_value: float, occ_scaler, ohe, feature
             cat_vec = _ohe_vec(int(sched["hour"]), int(sched["day_of_week"]), ohe).ravel()
             ohe_names = list(ohe.get_feature_names_out(['hour', 'day_of_week']))
         except Exception as e:
-            print(f"OHE error: {e}")
+            logger.warning("OHE error: %s", e)
             cat_vec = np.array([])
             ohe_names = []
     else:
@@ -267,7 +236,7 @@ def _row_vector(ts_utc: pd.Timestamp, occ_value: float, occ_scaler, ohe, feature
     try:
         result = np.array([feature_bank[name] for name in feature_order], dtype=float)
     except KeyError as e:
-        print(f"Missing feature in order: {e}")
+        logger.warning("Missing feature in order: %s", e)
         result = np.zeros(len(feature_order), dtype=float)
         for i, name in enumerate(feature_order):
             if name in feature_bank:
@@ -278,17 +247,25 @@ def _row_vector(ts_utc: pd.Timestamp, occ_value: float, occ_scaler, ohe, feature
 def _one_step_hybrid(
     model, occ_scaler, ohe, feature_order, meta, lib_key: str,
     window_ts: pd.DatetimeIndex,
-    window_vals: np.ndarray
+    window_vals: np.ndarray,
+    plan: FeaturePlan | None = None,
 ) -> float:
-    rows = [
-        _row_vector(ts, occ, occ_scaler, ohe, feature_order, meta, lib_key)
-        for ts, occ in zip(window_ts, window_vals)
-    ]
-    X = np.stack(rows, axis=0)[None, ...]  # Shape: (1, window, n_features)
-    
-    # Make prediction
-    yhat_scaled = model.predict(X, verbose=0).ravel()[0]
+    # Whole window in one vectorized pass (same values as stacking _row_vector per timestep)
+    plan = plan or FeaturePlan(feature_order, ohe)
+    library_capacity = LIBRARY_CAPACITIES.get(lib_key, 100)
+    X = plan.build(window_ts, window_vals, library_capacity)[None, ...]  # Shape: (1, window, n_features)
+    return _predict_hybrid(model, X, occ_scaler, lib_key, predict_fn=(meta or {}).get("predict_fn"))
 
+def _predict_hybrid(model, X: np.ndarray, occ_scaler, lib_key: str, predict_fn=None) -> float:
+    # Make prediction (traced single-sample call when the artifact loader built one)
+    if predict_fn is not None:
+        yhat_scaled = predict_fn(X).ravel()[0]
+    else:
+        yhat_scaled = model.predict(X, verbose=0).ravel()[0]
+    return _scale_hybrid(yhat_scaled, occ_scaler, lib_key)
+
+def _scale_hybrid(yhat_scaled: float, occ_scaler, lib_key: str) -> float:
+    """Turn one scaled model output into occupancy (library-specific caps and multipliers)."""
     # SPECIAL HANDLING FOR MIGUEL_PRO - Based on actual data patterns
     if lib_key == "miguel_pro":
         # Use data-driven capacity limits instead of theoretical 500
@@ -381,7 +358,7 @@ def _one_step_hybrid(
         # Ensure final prediction is realistic
         yhat = max(0, min(yhat, library_capacity * 0.9))
     
-    print(f"Prediction debug - scaled: {yhat_scaled:.4f}, capacity: {library_capacity}, final: {yhat:.1f}")
+    logger.debug("Prediction debug - scaled: %.4f, capacity: %s, final: %.1f", yhat_scaled, library_capacity, yhat)
     return float(yhat)
 
 def _one_step_simple(model, scaler, window, recent_vals: np.ndarray, lib_key: str) -> float:
@@ -400,52 +377,209 @@ def _one_step_simple(model, scaler, window, recent_vals: np.ndarray, lib_key: st
     
     return float(yhat)
 
+def _is_hybrid(meta: dict | None, base_index) -> bool:
+    return bool((meta or {}).get("feature_order")) and (meta or {}).get("ohe") is not None and base_index is not None
+
+def _rollout_slots(base_index: pd.DatetimeIndex, window: int, steps: int) -> np.ndarray:
+    """Hour-of-week slots of the last `window` history hours followed by the `steps` hours ahead."""
+    hist_ts = pd.DatetimeIndex(pd.to_datetime(base_index, utc=True))[-window:]
+    future_ts = pd.date_range(pd.Timestamp(hist_ts[-1]) + pd.Timedelta(hours=1), periods=steps, freq="h")
+    return np.concatenate([calendar_slots(hist_ts), calendar_slots(future_ts)])
+
+def _hybrid_rollout_state(window, base_series: np.ndarray, base_index: pd.DatetimeIndex, meta: dict,
+                          lib_key: str, steps: int, slots: np.ndarray | None = None):
+    """(plan, capacity, seeded WindowRing, calendar rows for every step ahead) of a hybrid rollout."""
+    plan = meta.get("feature_plan") or FeaturePlan(meta["feature_order"], meta["ohe"])
+    library_capacity = LIBRARY_CAPACITIES.get(lib_key, 100)
+    if slots is None:
+        slots = _rollout_slots(base_index, window, steps)
+
+    hist_vals = np.asarray(base_series, dtype=float)[-window:]
+    ring = WindowRing(plan.rows(slots[:window], hist_vals, library_capacity))
+
+    # Calendar rows for every step ahead in one gather; only occupancy changes per step
+    future_rows = plan.rows(slots[window:], np.zeros(steps), library_capacity)
+    return plan, library_capacity, ring, future_rows
+
+def _walk_forward_remote(jobs: list[dict], steps: int) -> list[np.ndarray]:
+    """Rollouts for RemoteModel jobs on their inference server; in-process when it is unreachable."""
+    by_client: dict = {}
+    for i, job in enumerate(jobs):
+        by_client.setdefault(job["model"].client, []).append(i)
+    out: list = [None] * len(jobs)
+    for client, idxs in by_client.items():
+        try:
+            preds = client.rollouts([rollout_job(jobs[i]) for i in idxs], steps)
+        except OSError as e:
+            logger.warning("Inference server unreachable (%s); rolling out %d job(s) in-process", e, len(idxs))
+            local = []
+            for i in idxs:
+                model, scaler, window, meta = ARTIFACTS.get(*jobs[i]["model"].key)
+                local.append({**jobs[i], "model": model, "scaler": scaler, "window": window, "meta": meta})
+            preds = walk_forward_many(local, steps)
+        for i, y in zip(idxs, preds):
+            out[i] = y
+    return out
+
 def walk_forward(model, scaler, window, base_series: np.ndarray, steps: int,
                  base_index: pd.DatetimeIndex | None = None, meta: dict | None = None,
                  lib_key: str = "unknown") -> np.ndarray:
     
-    print(f"Walk forward for {lib_key}: window={window}, steps={steps}, series_range={base_series.min():.1f}-{base_series.max():.1f}")
+    if isinstance(model, RemoteModel):
+        return _walk_forward_remote([{"model": model, "window": window, "base_series": base_series,
+                                      "base_index": base_index, "lib_key": lib_key}], steps)[0]
+
+    logger.debug("Walk forward for %s: window=%s, steps=%s, series_range=%.1f-%.1f",
+                 lib_key, window, steps, base_series.min(), base_series.max())
     
-    feature_order = (meta or {}).get("feature_order")
-    ohe = (meta or {}).get("ohe")
     occ_scaler = scaler
+    steps = int(steps)
 
     # HYBRID PATH
-    if feature_order and ohe is not None and base_index is not None:
-        print(f"Using HYBRID path for {lib_key} (capacity: {LIBRARY_CAPACITIES.get(lib_key, 'unknown')})")
-        buf_vals = list(map(float, base_series))
-        buf_ts = pd.DatetimeIndex(pd.to_datetime(base_index, utc=True)).tz_convert("UTC")
-
-        preds = []
-        for step in range(int(steps)):
-            window_vals = np.array(buf_vals[-window:], dtype=float)
-            window_ts   = pd.DatetimeIndex(buf_ts[-window:]).tz_convert("UTC")
-            
-            y = _one_step_hybrid(model, occ_scaler, ohe, feature_order, meta, lib_key, window_ts, window_vals)
-            preds.append(y)
-            
-            # Update buffers
-            last_ts = pd.Timestamp(buf_ts[-1]).tz_convert("UTC")
-            buf_ts  = buf_ts.append(pd.DatetimeIndex([last_ts + pd.Timedelta(hours=1)]))
-            buf_vals.append(y)
-            
-            print(f"Step {step+1}: predicted {y:.1f} users")
-            
-        return np.array(preds, dtype=float)
+    if _is_hybrid(meta, base_index):
+        logger.debug("Using HYBRID path for %s (capacity: %s)", lib_key, LIBRARY_CAPACITIES.get(lib_key, "unknown"))
+        key = rollout_key(model, lib_key, window, base_series, base_index)
+        done = ROLLOUTS.get(key, steps)
+        if done is not None and len(done.preds) >= steps:
+            logger.debug("Checkpoint hit for %s: %d of %d steps", lib_key, steps, len(done.preds))
+            return done.preds[:steps].copy()
+
+        plan, library_capacity, ring, future_rows = _hybrid_rollout_state(window, base_series, base_index,
+                                                                          meta, lib_key, steps)
+        preds = np.empty(steps, dtype=float)
+        start = 0
+        if done is not None:
+            # Resume after the longest earlier rollout from this seed
+            start = len(done.preds)
+            preds[:start] = done.preds
+            ring = WindowRing(done.state)
+            logger.debug("Resuming %s from checkpoint at step %d", lib_key, start)
+
+        predict_fn = meta.get("predict_fn")
+        for step in range(start, steps):
+            y = _predict_hybrid(model, ring.view(), occ_scaler, lib_key, predict_fn=predict_fn)
+            preds[step] = y
+
+            # Shift the newest prediction into the window
+            row = future_rows[step]
+            if plan.occ_col is not None:
+                row[plan.occ_col] = y / library_capacity
+            ring.push(row)
+
+            logger.debug("Step %d: predicted %.1f users", step + 1, y)
+
+        ROLLOUTS.put(key, model, preds, ring.view()[0])
+        return preds
 
     # CLASSIC PATH (fallback)
-    print(f"Using CLASSIC path for {lib_key}")
+    logger.debug("Using CLASSIC path for %s", lib_key)
+    key = rollout_key(model, lib_key, window, base_series)
+    done = ROLLOUTS.get(key, steps)
+    if done is not None and len(done.preds) >= steps:
+        return done.preds[:steps].copy()
     buf = base_series.astype(float).tolist()
     preds = []
-    for step in range(int(steps)):
+    if done is not None:
+        buf, preds = done.state.tolist(), done.preds.tolist()
+    for step in range(len(preds), steps):
         window_vals = np.array(buf[-window:], dtype=float)
         y = _one_step_simple(model, scaler, window, window_vals, lib_key)
         preds.append(y)
         buf.append(y)
-        print(f"Step {step+1}: predicted {y:.1f} users")
-        
+        logger.debug("Step %d: predicted %.1f users", step + 1, y)
+
+    ROLLOUTS.put(key, model, preds, np.array(buf[-window:], dtype=float))
     return np.array(preds, dtype=float)
 
+def walk_forward_many(jobs: list[dict], steps: int) -> list[np.ndarray]:
+    """
+    walk_forward for many libraries at once; each job holds walk_forward's
+    keyword arguments (model, scaler, window, base_series, base_index, meta,
+    lib_key). Hybrid jobs whose NumPy models share a topology advance
+    together: every step runs ONE stacked forward pass for the group (models
+    on the stack axis, libraries sharing a model on the batch axis; see
+    ml.stacked). Other jobs go through walk_forward one by one; jobs for
+    RemoteModels go to the inference server in one request. Returns the
+    predictions per job, in job order.
+    """
+    from .ml.stacked import stack_models, topology_key
+
+    steps = int(steps)
+    out: list = [None] * len(jobs)
+    remote = [i for i, job in enumerate(jobs) if isinstance(job["model"], RemoteModel)]
+    if remote:
+        for i, preds in zip(remote, _walk_forward_remote([jobs[i] for i in remote], steps)):
+            out[i] = preds
+        local = [i for i in range(len(jobs)) if out[i] is None]
+        for i, preds in zip(local, walk_forward_many([jobs[i] for i in local], steps) if local else []):
+            out[i] = preds
+        return out
+    groups: dict = {}
+    topologies: dict = {}
+    for i, job in enumerate(jobs):
+        key = None
+        if _is_hybrid(job.get("meta"), job.get("base_index")):
+            m = job["model"]
+            key = topologies[id(m)] if id(m) in topologies else topologies.setdefault(id(m), topology_key(m))
+        if key is not None:
+            groups.setdefault((key, int(job["window"])), []).append(i)
+    groups = {k: v for k, v in groups.items() if len(v) > 1}
+    grouped = {i for members in groups.values() for i in members}
+    for i, job in enumerate(jobs):
+        if i not in grouped:
+            out[i] = walk_forward(steps=steps, **job)
+
+    # Grouped jobs already rolled out this far (see ml.rollouts) are served from their checkpoint;
+    # shorter checkpoints are not resumed here, the group rolls out from the seed
+    ckpt_keys: dict = {}
+    for i in grouped:
+        job = jobs[i]
+        ckpt_keys[i] = rollout_key(job["model"], job["lib_key"], job["window"], job["base_series"], job["base_index"])
+        done = ROLLOUTS.get(ckpt_keys[i], steps)
+        if done is not None and len(done.preds) >= steps:
+            out[i] = done.preds[:steps].copy()
+    groups = {k: [i for i in v if out[i] is None] for k, v in groups.items()}
+    groups = {k: v for k, v in groups.items() if v}
+
+    for (_key, window), members in groups.items():
+        models = list({id(jobs[i]["model"]): jobs[i]["model"] for i in members}.values())
+        row_of = {id(m): r for r, m in enumerate(models)}
+        slots, used = [], [0] * len(models)
+        for i in members:
+            r = row_of[id(jobs[i]["model"])]
+            slots.append((r, used[r]))
+            used[r] += 1
+        logger.debug("Walk forward x%d (%d models): window=%s, steps=%s", len(members), len(models), window, steps)
+
+        # Libraries rolled from the same hours share their calendar slots
+        slot_sets: dict = {}
+        states = []
+        for i in members:
+            index = jobs[i]["base_index"]
+            span = pd.DatetimeIndex(index).asi8[-window:].tobytes()
+            if span not in slot_sets:
+                slot_sets[span] = _rollout_slots(index, window, steps)
+            states.append(_hybrid_rollout_state(window, jobs[i]["base_series"], index, jobs[i]["meta"],
+                                                jobs[i]["lib_key"], steps, slots=slot_sets[span]))
+        stacked = stack_models(models)
+        X = np.zeros((len(models), max(used)) + tuple(states[0][2].view().shape[1:]), dtype=np.float32)
+        preds = np.empty((len(members), steps), dtype=float)
+        for step in range(steps):
+            for (r, b), (_plan, _cap, ring, _rows) in zip(slots, states):
+                X[r, b] = ring.view()[0]
+            ys = stacked(X).reshape(X.shape[0], X.shape[1], -1)
+            for n, (i, (r, b), (plan, capacity, ring, future_rows)) in enumerate(zip(members, slots, states)):
+                y = _scale_hybrid(float(ys[r, b, 0]), jobs[i]["scaler"], jobs[i]["lib_key"])
+                preds[n, step] = y
+                row = future_rows[step]
+                if plan.occ_col is not None:
+                    row[plan.occ_col] = y / capacity
+                ring.push(row)
+        for n, i in enumerate(members):
+            out[i] = preds[n]
+            ROLLOUTS.put(ckpt_keys[i], jobs[i]["model"], preds[n], states[n][2].view()[0])
+    return out
+
 def one_step(
     model,
     scaler,
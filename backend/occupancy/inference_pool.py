@@ -0,0 +1,73 @@
+# occupancy/inference_pool.py
+"""
+Bounded thread pool for model work requested by the async views.
+
+Under ASGI, Django runs every sync view and every async ORM call on ONE
+thread per process, so a view that spends 100 ms in a rollout holds up the
+health check and every history request behind it. The async views in
+views_async await `run_model(fn, ...)` instead: the rollout runs on one of
+INFERENCE_WORKERS threads (NumPy releases the GIL inside its kernels) while
+the event loop and the ORM thread keep serving other requests. At most
+INFERENCE_WORKERS (default: the CPU count, up to 4) calls run at once; the
+rest wait in the pool's queue, which caps the memory and CPU a burst of
+forecasts can take.
+
+Functions sent here must not touch the database: the views fetch their
+inputs first (see views_forecast.at_inputs) and pass them in.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# Rollouts are CPU-bound: more threads than cores only contend for the GIL with the event loop
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+_STATS = {"submitted": 0, "running": 0, "completed": 0, "errors": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ThreadPoolExecutor(max_workers=max(1, INFERENCE_WORKERS), thread_name_prefix="inference")
+        return _POOL
+
+
+def _count(name: str, delta: int = 1) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += delta
+
+
+def _call(fn: Callable, *args, **kwargs):
+    _count("running")
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        _count("errors")
+        raise
+    finally:
+        _count("running", -1)
+        _count("completed")
+
+
+async def run_model(fn: Callable, *args, **kwargs) -> Any:
+    """Await fn(*args, **kwargs) on the inference pool."""
+    _count("submitted")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool(), functools.partial(_call, fn, *args, **kwargs))
+
+
+def stats() -> Dict[str, int]:
+    with _STATS_LOCK:
+        out = dict(_STATS)
+    out["workers"] = max(1, INFERENCE_WORKERS)
+    out["queued"] = out["submitted"] - out["completed"] - out["running"]
+    return out
@@ -0,0 +1,256 @@
+# occupancy/inference_server.py
+"""
+Local inference server shared by every web worker on the host
+(manage.py inference_server; workers reach it through INFERENCE_SOCKET,
+see ml/remote.py).
+
+It holds the artifacts once, in its own ArtifactCache and rollout
+checkpoints, instead of once per worker. Connection threads only parse
+requests; ONE batcher thread runs the models. It takes the first queued
+request, keeps gathering for INFERENCE_BATCH_WINDOW_MS (or until
+INFERENCE_MAX_BATCH jobs), and then:
+
+  rollout   all jobs with the same step count go through ONE
+            walk_forward_many call, so concurrent rollouts of one model (or
+            of same-topology models) take one stacked forward pass per step
+  predict   inputs for the same model are concatenated into one forward pass
+  describe  (scaler, window, meta) for a client's load_artifacts_cached;
+            answered by the connection thread
+
+Errors are returned to the request that caused them (and re-raised in the
+client); one bad job does not fail the rest of its batch.
+"""
+from __future__ import annotations
+
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .infer import ARTIFACTS, walk_forward_many
+from .ml.remote import recv_frame, send_frame
+
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "2"))
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "256"))
+
+
+class _Pending:
+    """One queued rollout/predict request and, once the batcher is done with it, its reply."""
+    __slots__ = ("op", "payload", "reply", "done")
+
+    def __init__(self, op: str, payload: Dict[str, Any]):
+        self.op = op
+        self.payload = payload
+        self.reply = None
+        self.done = threading.Event()
+
+    @property
+    def size(self) -> int:
+        return len(self.payload["jobs"]) if self.op == "rollout" else 1
+
+    def finish(self, ok: bool, value: Any) -> None:
+        self.reply = (ok, value)
+        self.done.set()
+
+
+def _describe(key) -> tuple:
+    _model, scaler, window, meta = ARTIFACTS.get(*key)
+    return scaler, int(window), {k: v for k, v in meta.items() if not callable(v)}
+
+
+def _server_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """A client's rollout job (ml.remote.rollout_job) as walk_forward keyword arguments."""
+    model, scaler, window, meta = ARTIFACTS.get(*job["key"])
+    index = job["base_index"]
+    return {"model": model, "scaler": scaler, "window": int(window), "base_series": job["base_series"],
+            "base_index": None if index is None else pd.DatetimeIndex(pd.to_datetime(index, utc=True)),
+            "meta": meta, "lib_key": job["lib_key"]}
+
+
+class InferenceServer:
+    def __init__(self, path: str, batch_window_ms: float = INFERENCE_BATCH_WINDOW_MS,
+                 max_batch: int = INFERENCE_MAX_BATCH):
+        self.path = path
+        self.batch_window = batch_window_ms / 1e3
+        self.max_batch = max(1, int(max_batch))
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue()
+        self._sock: Optional[socket.socket] = None
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._stats = {"connections": 0, "requests": 0, "jobs": 0, "batches": 0, "max_batch_jobs": 0,
+                       "errors": 0}
+
+    # ---------------- lifecycle ----------------
+    def bind(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # a stale socket from a previous run
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)  # owner read/write only: frames are pickles
+        try:
+            sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        sock.listen(128)
+        self._sock = sock
+
+    def serve_forever(self) -> None:
+        if self._sock is None:
+            self.bind()
+        threading.Thread(target=self._batch_loop, name="inference-batcher", daemon=True).start()
+        while not self._stopping.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            self._count("connections")
+            threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+
+    def shutdown(self) -> None:
+        self._stopping.set()
+        self._queue.put(None)  # stops the batcher
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)  # wakes accept()
+            except OSError:
+                pass
+            self._sock.close()
+            self._sock = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    # ---------------- connections ----------------
+    def _serve_connection(self, conn: socket.socket) -> None:
+        with conn:
+            while True:
+                try:
+                    op, payload = recv_frame(conn)
+                except (OSError, EOFError):
+                    return
+                self._count("requests")
+                if op in ("rollout", "predict"):
+                    pending = _Pending(op, payload)
+                    self._queue.put(pending)
+                    pending.done.wait()
+                    reply = pending.reply
+                else:
+                    reply = self._answer(op, payload)
+                try:
+                    send_frame(conn, reply)
+                except OSError:
+                    return
+
+    def _answer(self, op: str, payload: Dict[str, Any]) -> tuple:
+        try:
+            if op == "describe":
+                return True, _describe(payload["key"])
+            if op == "stats":
+                return True, self.stats()
+            raise ValueError(f"Unknown inference server operation: {op}")
+        except Exception as e:
+            self._count("errors")
+            return False, e
+
+    # ---------------- batching ----------------
+    def _batch_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, jobs = [first], first.size
+            deadline = time.monotonic() + self.batch_window
+            while jobs < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                batch.append(nxt)
+                jobs += nxt.size
+            with self._stats_lock:
+                self._stats["batches"] += 1
+                self._stats["jobs"] += jobs
+                self._stats["max_batch_jobs"] = max(self._stats["max_batch_jobs"], jobs)
+            self._run_rollouts([p for p in batch if p.op == "rollout"])
+            self._run_predicts([p for p in batch if p.op == "predict"])
+
+    def _run_rollouts(self, pendings: List[_Pending]) -> None:
+        """Every job of every request, one walk_forward_many call per step count."""
+        by_steps: Dict[int, List[tuple]] = {}
+        results: Dict[int, List[Any]] = {}
+        for p in pendings:
+            try:
+                jobs = [_server_job(job) for job in p.payload["jobs"]]
+            except Exception as e:
+                self._count("errors")
+                p.finish(False, e)
+                continue
+            results[id(p)] = [None] * len(jobs)
+            for n, job in enumerate(jobs):
+                by_steps.setdefault(int(p.payload["steps"]), []).append((p, n, job))
+        failed: Dict[int, Exception] = {}
+        for steps, entries in by_steps.items():
+            try:
+                preds = walk_forward_many([job for _p, _n, job in entries], steps)
+            except Exception:  # retry one by one, so only the bad jobs fail
+                preds = []
+                for p, _n, job in entries:
+                    try:
+                        preds.append(walk_forward_many([job], steps)[0])
+                    except Exception as job_error:
+                        failed.setdefault(id(p), job_error)
+                        preds.append(None)
+            for (p, n, _job), y in zip(entries, preds):
+                results[id(p)][n] = y
+        for p in pendings:
+            if p.done.is_set():
+                continue
+            if id(p) in failed:
+                self._count("errors")
+                p.finish(False, failed[id(p)])
+            else:
+                p.finish(True, results[id(p)])
+
+    def _run_predicts(self, pendings: List[_Pending]) -> None:
+        """Inputs for one model concatenated into a single forward pass."""
+        by_key: Dict[tuple, List[_Pending]] = {}
+        for p in pendings:
+            by_key.setdefault(tuple(p.payload["key"]), []).append(p)
+        for key, group in by_key.items():
+            try:
+                model, _scaler, _window, meta = ARTIFACTS.get(*key)
+                predict = meta.get("predict_fn")
+                X = np.concatenate([np.asarray(p.payload["X"], dtype=np.float32) for p in group])
+                # A traced predict_fn has a batch-of-one signature; the model itself takes any batch
+                y = np.asarray(predict(X) if predict is not None and len(group) == 1 else model.predict(X, verbose=0))
+            except Exception as e:
+                self._count("errors")
+                for p in group:
+                    p.finish(False, e)
+                continue
+            start = 0
+            for p in group:
+                n = len(p.payload["X"])
+                p.finish(True, y[start:start + n])
+                start += n
+
+    # ---------------- stats ----------------
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            out: Dict[str, Any] = dict(self._stats)
+        out["mean_batch_jobs"] = round(out["jobs"] / out["batches"], 2) if out["batches"] else 0.0
+        out["resident"] = ARTIFACTS.resident()
+        return out
@@ -0,0 +1,30 @@
+# occupancy/management/commands/backfill_hourly.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from occupancy.models import Library
+from occupancy.rollup import rollup_library
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the SignalHourly rollup from Signal (migration 0005 builds it once); "
+        "run whenever LIBRARY_CORRECTION_FACTORS changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", action="append", help="Limit to a library key (repeatable).")
+
+    def handle(self, *args, **opts):
+        libs = Library.objects.order_by("key")
+        if opts["library"]:
+            libs = libs.filter(key__in=opts["library"])
+            missing = set(opts["library"]) - set(libs.values_list("key", flat=True))
+            if missing:
+                raise CommandError(f"Unknown library: {', '.join(sorted(missing))}")
+
+        for lib in libs:
+            t0 = time.perf_counter()
+            n = rollup_library(lib)
+            self.stdout.write(f"{lib.key:<22} {n:>7} hourly rows in {time.perf_counter() - t0:.2f}s")
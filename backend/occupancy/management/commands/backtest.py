@@ -0,0 +1,48 @@
+# occupancy/management/commands/backtest.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from occupancy.backtest import run_backtest
+
+
+class Command(BaseCommand):
+    help = (
+        "Rolling-origin backtest of every model candidate against the stored hourly history; stores one "
+        "ModelEvaluation (r2, mse, rmse) per candidate and horizon."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", action="append", help="Limit to a library key (repeatable).")
+        parser.add_argument("--family", action="append", help="Limit to a model family (repeatable).")
+        parser.add_argument("--days", type=int, default=14, help="Days of history to replay, up to the latest data.")
+        parser.add_argument("--horizon", type=int, action="append",
+                            help="Hours forecast from each origin, recursively (repeatable; default 1 and 24).")
+        parser.add_argument("--stride", type=int, default=1, help="Hours between origins.")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Library processes in parallel (default: CPU count; 1 = this process).")
+        parser.add_argument("--dry-run", action="store_true", help="Report scores without storing them.")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        rows = run_backtest(opts["library"], opts["family"], days=opts["days"], horizons=opts["horizon"] or (1, 24),
+                            stride=opts["stride"], max_workers=opts["workers"], save=not opts["dry_run"])
+        total = time.perf_counter() - t0
+
+        self.stdout.write(f"{'library':<22} {'family':<14} {'version':<8} {'h':>3} {'origins':>8} "
+                          f"{'rmse':>8} {'r2':>8} {'ms':>9}")
+        for r in rows:
+            head = f"{r['library']:<22} {r['family']:<14} {r['version']:<8} {r['horizon']:>3}"
+            if r["skipped"]:
+                self.stdout.write(f"{head} {'no data':>8}")
+            elif r["error"]:
+                self.stdout.write(self.style.ERROR(f"{head} {r['error']}"))
+            else:
+                r2 = "-" if r["r2"] is None else f"{r['r2']:.3f}"
+                self.stdout.write(f"{head} {r['origins']:>8} {r['rmse']:>8.2f} {r2:>8} {r['ms']:>9.1f}")
+        stored = 0 if opts["dry_run"] else sum(not (r["skipped"] or r["error"]) for r in rows)
+        self.stdout.write(f"{len(rows)} run(s), {stored} evaluation(s) stored in {total:.2f}s")
+
+        failed = [r for r in rows if r["error"]]
+        if failed:
+            raise CommandError(f"{len(failed)} run(s) failed")
@@ -0,0 +1,562 @@
+# occupancy/management/commands/bench.py
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import time
+import types
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from occupancy import forecast_cache
+from occupancy.infer import ARTIFACTS, ARTIFACTS_ROOT, load_artifacts_cached, walk_forward, walk_forward_many
+from occupancy.ml.memory import smaps_rollup
+from occupancy.ml.rollouts import ROLLOUTS
+from occupancy.preload import warm_up
+
+
+class _ConstantModel:
+    """Model stand-in so a suite can time the rollout machinery without TF."""
+
+    def predict(self, X, verbose=0):
+        return np.full((X.shape[0], 1), 0.1, dtype=np.float32)
+
+
+def _seed_history(window: int, end: str = "2025-08-17 08:00"):
+    idx = pd.date_range(end=pd.Timestamp(end, tz="UTC"), periods=window, freq="h")
+    vals = np.random.default_rng(0).integers(0, 60, size=window).astype(float)
+    return idx, vals
+
+
+def _timed(fn, repeat: int) -> float:
+    """Best-of-`repeat` wall time in seconds, each from cold rollout checkpoints (stdout is discarded)."""
+    best = float("inf")
+    for _ in range(repeat):
+        ROLLOUTS.clear()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+# Fresh interpreter: boot Django, answer one /api/health/ request, report time + memory
+_STARTUP_PROBE = textwrap.dedent("""
+    import json, os, sys, time
+    t0 = time.perf_counter()
+    if os.environ.get("BENCH_EAGER_ML"):
+        import keras  # what every worker paid when infer.py imported Keras at module level
+    import django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "wifi_occupancy_prediction_project.settings")
+    django.setup()
+    from django.conf import settings
+    from django.test import Client
+    host = next((h for h in settings.ALLOWED_HOSTS if h and h != "*"), "localhost")
+    status = Client(HTTP_HOST=host).get("/api/health/").status_code
+    elapsed = time.perf_counter() - t0
+    rss_kib = 0
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss_kib = int(line.split()[1])
+    print(json.dumps({"status": status, "seconds": elapsed, "rss_kib": rss_kib,
+                      "tensorflow": "tensorflow" in sys.modules, "keras": "keras" in sys.modules}))
+""")
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmarks for the forecast hot path."
+
+    SUITES = ("walk_forward", "predict", "startup", "fork", "forecast_cache", "range", "campus",
+              "checkpoints", "concurrency", "inference_server", "backtest")
+
+    def add_arguments(self, parser):
+        parser.add_argument("suite", choices=self.SUITES)
+        parser.add_argument("--family", default="cnn_lstm_attn")
+        parser.add_argument("--library", default="miguel_pro")
+        parser.add_argument("--model-version", default="v1")
+        parser.add_argument("--real-model", action="store_true",
+                            help="Time the real model instead of a constant stand-in.")
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--calls", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=3, help="Forked children for the fork and inference_server suites.")
+        parser.add_argument("--hours", type=int, default=3, help="Forecast horizon for the campus and inference_server suites.")
+        parser.add_argument("--concurrency", type=int, default=8,
+                            help="forecast/day requests in flight for the concurrency suite.")
+
+    def handle(self, *args, **opts):
+        handler = getattr(self, f"bench_{opts['suite']}", None)
+        if handler is None:
+            raise CommandError(f"Unknown suite {opts['suite']}")
+        handler(**opts)
+
+    # ---------------- suites ----------------
+    def bench_walk_forward(self, family, library, model_version, real_model, repeat, **_):
+        """Per-step rollout cost for growing horizons; should stay flat as steps grows."""
+        model, scaler, window, meta = load_artifacts_cached(family, library, model_version)
+        if not real_model:
+            model = _ConstantModel()
+        idx, vals = _seed_history(int(window))
+
+        self.stdout.write(f"walk_forward {family}/{library} window={window} "
+                          f"model={'real' if real_model else 'constant'}")
+        self.stdout.write(f"{'steps':>8} {'total ms':>10} {'per step us':>12}")
+        for steps in (24, 240, 720, 2160):
+            secs = _timed(lambda: walk_forward(model, scaler, window, vals, steps, idx, meta, library), repeat)
+            self.stdout.write(f"{steps:>8} {secs * 1e3:>10.1f} {secs / steps * 1e6:>12.1f}")
+
+    def bench_predict(self, family, library, model_version, calls, **_):
+        """Per-call latency of the traced predict_fn vs model.predict for a batch of one."""
+        model, scaler, window, meta = load_artifacts_cached(family, library, model_version)
+        predict_fn = meta.get("predict_fn")
+        n_features = len(meta.get("feature_order") or ["occupancy_scaled"])
+        X = np.random.default_rng(0).random((1, int(window), n_features), dtype=np.float32)
+
+        ref = np.asarray(model.predict(X, verbose=0)).ravel()
+        got = np.asarray(predict_fn(X)).ravel()
+        self.stdout.write(f"predict {family}/{library} input={X.shape} "
+                          f"max|diff|={float(np.max(np.abs(ref - got))):.2e}")
+
+        def per_call(fn):
+            fn(X)  # warm-up / tracing
+            samples = []
+            for _ in range(calls):
+                t0 = time.perf_counter()
+                fn(X)
+                samples.append(time.perf_counter() - t0)
+            return np.median(samples) * 1e6, np.percentile(samples, 95) * 1e6
+
+        rows = [
+            ("model.predict", per_call(lambda x: model.predict(x, verbose=0))),
+            ("predict_fn", per_call(predict_fn)),
+        ]
+        self.stdout.write(f"{'path':<16} {'p50 us':>10} {'p95 us':>10}")
+        for name, (p50, p95) in rows:
+            self.stdout.write(f"{name:<16} {p50:>10.1f} {p95:>10.1f}")
+
+    def bench_startup(self, repeat, **_):
+        """Time-to-first /api/health/ and resident memory of a worker that has not forecast yet."""
+        def probe(eager: bool) -> dict:
+            env = {**os.environ, "PYTHONWARNINGS": "ignore"}
+            env.pop("BENCH_EAGER_ML", None)
+            if eager:
+                env["BENCH_EAGER_ML"] = "1"
+            out = subprocess.run([sys.executable, "-c", _STARTUP_PROBE], cwd=settings.BASE_DIR, env=env,
+                                 capture_output=True, text=True, check=True).stdout
+            return json.loads(out.strip().splitlines()[-1])
+
+        self.stdout.write(f"{'mode':<14} {'health':>6} {'first resp s':>13} {'RSS MiB':>9} {'TF loaded':>10}")
+        for label, eager in (("lazy", False), ("eager keras", True)):
+            runs = [probe(eager) for _ in range(repeat)]
+            best = min(runs, key=lambda r: r["seconds"])
+            self.stdout.write(f"{label:<14} {best['status']:>6} {best['seconds']:>13.2f} "
+                              f"{best['rss_kib'] / 1024:>9.0f} {str(best['tensorflow']):>10}")
+
+    def bench_fork(self, family, model_version, workers, **_):
+        """
+        Per-worker memory when every library's model is loaded in the parent
+        before fork (shared pages) vs loaded again in each child after fork.
+        """
+        libs = sorted(p.name for p in (ARTIFACTS_ROOT / family).iterdir() if p.is_dir())
+
+        def load_all():
+            for lib in libs:
+                model, _scaler, window, meta = load_artifacts_cached(family, lib, model_version)
+                warm_up(model, window, meta)
+
+        def run(preload: bool):
+            ARTIFACTS.clear()
+            if preload:
+                load_all()
+            ready_r, ready_w = os.pipe()
+            go_r, go_w = os.pipe()
+            pids = []
+            for _ in range(workers):
+                pid = os.fork()
+                if pid == 0:  # child: serve-like warm state, then park until measured
+                    try:
+                        os.close(ready_r)
+                        os.close(go_w)
+                        load_all()
+                        os.write(ready_w, b"x")
+                        os.read(go_r, 1)
+                    finally:
+                        os._exit(0)
+                pids.append(pid)
+            os.close(ready_w)
+            os.close(go_r)
+            for _ in range(workers):
+                os.read(ready_r, 1)
+            stats = [smaps_rollup(pid) for pid in pids]
+            os.close(go_w)
+            os.close(ready_r)
+            for pid in pids:
+                os.waitpid(pid, 0)
+            ARTIFACTS.clear()
+            return stats
+
+        self.stdout.write(f"fork {family} x{len(libs)} libraries, {workers} worker(s)")
+        self.stdout.write(f"{'mode':<14} {'RSS MiB':>9} {'PSS MiB':>9} {'shared MiB':>11} {'private MiB':>12}")
+        for label, preload in (("after fork", False), ("before fork", True)):
+            stats = run(preload)
+            mean = {k: np.mean([m[k] for m in stats]) / 1024 for k in ("Rss", "Pss", "Shared", "Private")}
+            self.stdout.write(f"{label:<14} {mean['Rss']:>9.1f} {mean['Pss']:>9.1f} "
+                              f"{mean['Shared']:>11.1f} {mean['Private']:>12.1f}")
+
+    def bench_forecast_cache(self, library, calls, **_):
+        """forecast/at and forecast/day view latency: first (computed) call vs cached repeats."""
+        from django.core.cache import cache
+        from rest_framework.test import APIRequestFactory
+
+        from occupancy.views_forecast import ForecastAtView, ForecastDayView
+
+        factory = APIRequestFactory()
+        when = (pd.Timestamp.now(tz="Asia/Manila") + pd.Timedelta(hours=1)).strftime("%Y-%m-%d %H:00")
+        day = (pd.Timestamp.now(tz="Asia/Manila") + pd.Timedelta(days=1)).date().isoformat()
+        cases = (("forecast/at", ForecastAtView.as_view(), {"library": library, "when": when}),
+                 ("forecast/day", ForecastDayView.as_view(), {"library": library, "date": day}))
+
+        cache.clear()
+        ROLLOUTS.clear()
+        forecast_cache.reset_stats()
+        self.stdout.write(f"{'endpoint':<14} {'miss ms':>9} {'hit p50 us':>11} {'hit p95 us':>11}")
+        for name, view, params in cases:
+            t0 = time.perf_counter()
+            resp = view(factory.get("/", params))
+            miss = time.perf_counter() - t0
+            if resp.status_code != 200:
+                raise CommandError(f"{name}: HTTP {resp.status_code} {resp.data}")
+            samples = []
+            for _ in range(calls):
+                t0 = time.perf_counter()
+                view(factory.get("/", params))
+                samples.append(time.perf_counter() - t0)
+            self.stdout.write(f"{name:<14} {miss * 1e3:>9.1f} {np.median(samples) * 1e6:>11.1f} "
+                              f"{np.percentile(samples, 95) * 1e6:>11.1f}")
+        self.stdout.write(f"hit ratio {forecast_cache.stats()['hit_ratio']:.3f}")
+
+    def bench_range(self, family, library, model_version, repeat, **_):
+        """One forecast/range request vs one forecast/day request per day, for growing spans."""
+        from django.core.cache import cache
+        from rest_framework.test import APIRequestFactory
+
+        from occupancy.views_forecast import ForecastDayView, ForecastRangeView
+
+        factory = APIRequestFactory()
+        day_view, range_view = ForecastDayView.as_view(), ForecastRangeView.as_view()
+        start = pd.Timestamp.now(tz="Asia/Manila").normalize()
+        common = {"library": library, "family": family, "version": model_version}
+
+        def call(view, **params):
+            cache.clear()  # time the computation, not the response cache
+            ROLLOUTS.clear()
+            resp = view(factory.get("/", {**common, **params}))
+            if resp.status_code != 200:
+                raise CommandError(f"HTTP {resp.status_code} {resp.data}")
+
+        self.stdout.write(f"range {family}/{library}")
+        self.stdout.write(f"{'days':>5} {'range ms':>10} {'N x day ms':>11} {'range ms/day':>13}")
+        for n in (1, 7, 30):
+            end = (start + pd.Timedelta(days=n - 1)).date().isoformat()
+            rng = _timed(lambda: call(range_view, start=start.date().isoformat(), end=end), repeat)
+            days = _timed(lambda: [call(day_view, date=(start + pd.Timedelta(days=d)).date().isoformat())
+                                   for d in range(n)], repeat)
+            self.stdout.write(f"{n:>5} {rng * 1e3:>10.1f} {days * 1e3:>11.1f} {rng / n * 1e3:>13.2f}")
+
+    def bench_campus(self, family, model_version, hours, repeat, **_):
+        """
+        Campus-wide rollout for 6 / 60 / 600 synthetic libraries: one
+        walk_forward per library vs walk_forward_many (stacked forward pass
+        per step). Library i uses real library i % 6's model and a random
+        history; then the real forecast/campus endpoint for reference.
+        """
+        from rest_framework.test import APIRequestFactory
+
+        from occupancy.views_forecast import CampusForecastView
+
+        libs = sorted(p.name for p in (ARTIFACTS_ROOT / family).iterdir() if p.is_dir())
+        loaded = [(lib, load_artifacts_cached(family, lib, model_version)) for lib in libs]
+        rng = np.random.default_rng(0)
+
+        def jobs_for(n):
+            jobs = []
+            for i in range(n):
+                lib, (model, scaler, window, meta) = loaded[i % len(loaded)]
+                idx, _vals = _seed_history(int(window) + 6)
+                jobs.append({"model": model, "scaler": scaler, "window": int(window),
+                             "base_series": rng.integers(0, 60, size=len(idx)).astype(float),
+                             "base_index": idx, "meta": meta, "lib_key": lib})
+            return jobs
+
+        self.stdout.write(f"campus {family} hours={hours} ({len(loaded)} distinct models)")
+        self.stdout.write(f"{'libraries':>10} {'one-by-one ms':>14} {'batched ms':>11} {'speedup':>8}")
+        for n in (6, 60, 600):
+            jobs = jobs_for(n)
+            seq = _timed(lambda: [walk_forward(steps=hours, **job) for job in jobs], repeat)
+            many = _timed(lambda: walk_forward_many(jobs, hours), repeat)
+            self.stdout.write(f"{n:>10} {seq * 1e3:>14.1f} {many * 1e3:>11.1f} {seq / many:>7.1f}x")
+
+        view, factory = CampusForecastView.as_view(), APIRequestFactory()
+        secs = _timed(lambda: view(factory.get("/", {"hours": hours})), repeat)
+        self.stdout.write(f"forecast/campus (active models, {len(libs)} libraries): {secs * 1e3:.1f} ms")
+
+    def bench_checkpoints(self, family, library, model_version, repeat, **_):
+        """
+        Rollout checkpoints: a forecast/range request cold vs resumed from an
+        earlier, shorter range with the same start, and forecast/day for the
+        start day after the range rolled over it.
+        """
+        from django.core.cache import cache
+        from rest_framework.test import APIRequestFactory
+
+        from occupancy.views_forecast import ForecastDayView, ForecastRangeView
+
+        factory = APIRequestFactory()
+        day_view, range_view = ForecastDayView.as_view(), ForecastRangeView.as_view()
+        start = pd.Timestamp.now(tz="Asia/Manila").normalize()
+        common = {"library": library, "family": family, "version": model_version}
+
+        def call(view, **params):
+            cache.clear()  # checkpoints only, not the response cache
+            resp = view(factory.get("/", {**common, **params}))
+            if resp.status_code != 200:
+                raise CommandError(f"HTTP {resp.status_code} {resp.data}")
+
+        def span(n):
+            return {"start": start.date().isoformat(), "end": (start + pd.Timedelta(days=n - 1)).date().isoformat()}
+
+        def best(fn, prepare):
+            runs = []
+            for _ in range(repeat):
+                ROLLOUTS.clear()
+                prepare()
+                t0 = time.perf_counter()
+                fn()
+                runs.append(time.perf_counter() - t0)
+            return min(runs)
+
+        rows = [
+            ("range 60 d, cold", best(lambda: call(range_view, **span(60)), lambda: None)),
+            ("range 60 d after 30 d", best(lambda: call(range_view, **span(60)), lambda: call(range_view, **span(30)))),
+            ("day 1, cold", best(lambda: call(day_view, date=start.date().isoformat()), lambda: None)),
+            ("day 1 after range", best(lambda: call(day_view, date=start.date().isoformat()),
+                                       lambda: call(range_view, **span(7)))),
+        ]
+        self.stdout.write(f"checkpoints {family}/{library}")
+        self.stdout.write(f"{'request':<24} {'ms':>8}")
+        for name, secs in rows:
+            self.stdout.write(f"{name:<24} {secs * 1e3:>8.1f}")
+        self.stdout.write(f"rollout cache: {ROLLOUTS.stats()}")
+
+    def bench_concurrency(self, family, library, model_version, concurrency, repeat, **_):
+        """
+        One ASGI worker (AsyncClient, in-process) under a burst of
+        `concurrency` forecast/day requests, with health and history/day
+        requests arriving every 5 ms while the burst runs: the DRF views
+        (run, like every sync view under ASGI, on one thread) vs views_async.
+        """
+        from django.core.cache import cache
+        from django.test import AsyncClient, override_settings
+        from django.urls import path
+
+        from api import views as api_views
+        from occupancy import inference_pool, views_async, views_forecast
+
+        def urlconf(views):
+            mod = types.ModuleType(f"bench_urls_{views.__name__}")
+            mod.urlpatterns = [
+                path("api/health/", api_views.health),
+                path("occupancy/forecast/day", views.ForecastDayView.as_view()),
+                path("occupancy/history/day", views.HistoryDayView.as_view()),
+            ]
+            return mod
+
+        start = pd.Timestamp.now(tz="Asia/Manila").normalize()
+        host = next((h for h in settings.ALLOWED_HOSTS if h and h != "*"), "localhost")
+        days = [(start + pd.Timedelta(days=2 + d)).date().isoformat() for d in range(concurrency)]
+
+        async def burst():
+            client = AsyncClient(HTTP_HOST=host)
+            done = asyncio.Event()
+            probes = {"health": [], "history": []}
+
+            async def timed(url, params=None):
+                t0 = time.perf_counter()
+                resp = await client.get(url, params or {})
+                if resp.status_code != 200:
+                    raise CommandError(f"{url}: HTTP {resp.status_code}")
+                return time.perf_counter() - t0
+
+            async def forecast(day):
+                return await timed("/occupancy/forecast/day", {"library": library, "family": family,
+                                                               "version": model_version, "date": day})
+
+            async def probe():
+                while not done.is_set():
+                    probes["health"].append(await timed("/api/health/"))
+                    probes["history"].append(await timed("/occupancy/history/day",
+                                                         {"library": library, "date": start.date().isoformat()}))
+                    await asyncio.sleep(0.005)
+
+            prober = asyncio.ensure_future(probe())
+            t0 = time.perf_counter()
+            await asyncio.gather(*(forecast(d) for d in days))
+            wall = time.perf_counter() - t0
+            done.set()
+            await prober
+            return wall, probes
+
+        self.stdout.write(f"concurrency {family}/{library}: {concurrency} forecast/day in flight, "
+                          f"{inference_pool.INFERENCE_WORKERS} inference threads")
+        self.stdout.write(f"{'views':<7} {'burst ms':>9} {'health p50':>11} {'health max':>11} "
+                          f"{'history p50':>12} {'history max':>12} {'probes':>7}")
+        for label, views in (("sync", views_forecast), ("async", views_async)):
+            best = None
+            with override_settings(ROOT_URLCONF=urlconf(views)):
+                for _ in range(repeat):
+                    cache.clear()
+                    ROLLOUTS.clear()
+                    run = asyncio.run(burst())
+                    best = run if best is None or run[0] < best[0] else best
+            wall, probes = best
+            ms = {k: np.asarray(v) * 1e3 for k, v in probes.items()}
+            self.stdout.write(f"{label:<7} {wall * 1e3:>9.1f} {np.median(ms['health']):>11.1f} "
+                              f"{ms['health'].max():>11.1f} {np.median(ms['history']):>12.1f} "
+                              f"{ms['history'].max():>12.1f} {len(ms['health']):>7}")
+
+    def bench_inference_server(self, family, model_version, workers, calls, hours, **_):
+        """
+        `workers` forked web-worker stand-ins, each running `calls` rollouts
+        of `hours` steps (random seeds, cycling every library's model) at the
+        same time: models loaded in every worker vs one inference server
+        (manage.py inference_server) shared by all of them.
+        """
+        import tempfile
+
+        from django.db import connections
+
+        from occupancy.ml.remote import InferenceClient, RemoteModel
+
+        libs = sorted(p.name for p in (ARTIFACTS_ROOT / family).iterdir() if p.is_dir())
+
+        def local_models():
+            return {lib: ARTIFACTS.get(family, lib, model_version) for lib in libs}
+
+        def remote_models():
+            client = InferenceClient(sock_path)
+            out = {}
+            for lib in libs:
+                key = (family, lib, model_version)
+                scaler, window, meta = client.describe(key)
+                out[lib] = (RemoteModel(client, key), scaler, window, meta)
+            return out
+
+        def work(models, seed):
+            rng = np.random.default_rng(seed)
+            for n in range(calls):
+                lib = libs[n % len(libs)]
+                model, scaler, window, meta = models[lib]
+                idx, _vals = _seed_history(int(window))
+                walk_forward(model, scaler, int(window), rng.integers(0, 60, size=len(idx)).astype(float),
+                             hours, base_index=idx, meta=meta, lib_key=lib)
+
+        def run(make_models):
+            """Wall seconds for every worker's rollouts, and the workers' mean PSS (KiB) once loaded."""
+            ARTIFACTS.clear()
+            connections.close_all()
+            ready_r, ready_w = os.pipe()
+            go_r, go_w = os.pipe()
+            pids = []
+            for w in range(workers):
+                pid = os.fork()
+                if pid == 0:  # child: load (or describe), park, then roll out until done
+                    code = 1
+                    try:
+                        os.close(ready_r)
+                        os.close(go_w)
+                        models = make_models()
+                        os.write(ready_w, b"x")
+                        os.read(go_r, 1)
+                        ROLLOUTS.clear()
+                        work(models, seed=w)
+                        code = 0
+                    finally:
+                        os._exit(code)
+                pids.append(pid)
+            os.close(ready_w)
+            os.close(go_r)
+            for _ in range(workers):
+                os.read(ready_r, 1)
+            pss = np.mean([smaps_rollup(pid)["Pss"] for pid in pids])
+            t0 = time.perf_counter()
+            os.close(go_w)
+            failed = sum(os.waitpid(pid, 0)[1] != 0 for pid in pids)
+            wall = time.perf_counter() - t0
+            os.close(ready_r)
+            if failed:
+                raise CommandError(f"{failed} worker(s) failed")
+            return wall, pss
+
+        sock_path = os.path.join(tempfile.mkdtemp(), "inference.sock")
+        server = subprocess.Popen([sys.executable, "manage.py", "inference_server", "--socket", sock_path,
+                                   "--no-preload"], cwd=settings.BASE_DIR,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            deadline = time.monotonic() + 60
+            while True:
+                try:
+                    InferenceClient(sock_path).stats()
+                    break
+                except OSError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise CommandError("inference server did not start")
+                    time.sleep(0.1)
+
+            total = workers * calls
+            self.stdout.write(f"inference_server {family} x{len(libs)} libraries: {workers} worker(s) x "
+                              f"{calls} rollouts of {hours} h")
+            self.stdout.write(f"{'mode':<11} {'wall s':>8} {'rollouts/s':>11} {'worker PSS MiB':>15} "
+                              f"{'mean batch':>11}")
+            wall, pss = run(local_models)
+            self.stdout.write(f"{'in-process':<11} {wall:>8.2f} {total / wall:>11.1f} {pss / 1024:>15.1f} "
+                              f"{'-':>11}")
+            wall, pss = run(remote_models)
+            stats = InferenceClient(sock_path).stats()
+            self.stdout.write(f"{'server':<11} {wall:>8.2f} {total / wall:>11.1f} {pss / 1024:>15.1f} "
+                              f"{stats['mean_batch_jobs']:>11.2f}")
+            server_pss = smaps_rollup(server.pid)["Pss"] / 1024
+            self.stdout.write(f"server process PSS: {server_pss:.1f} MiB, "
+                              f"max batch {stats['max_batch_jobs']} job(s)")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def bench_backtest(self, family, library, model_version, repeat, **_):
+        """
+        Backtest of one model over 14 days of synthetic history, 1-step and
+        24-step horizons: one walk_forward per origin vs occupancy.backtest
+        (sliding-window batches / walk_forward_many across origins).
+        """
+        from occupancy import backtest
+
+        artifacts = load_artifacts_cached(family, library, model_version)
+        model, scaler, window, meta = artifacts
+        index, _vals = _seed_history(14 * 24)
+        values = np.random.default_rng(0).integers(0, 60, size=len(index)).astype(float)
+
+        def per_origin(steps):
+            origins = backtest._origins(len(values), int(window), steps, 1)
+            return [walk_forward(model, scaler, int(window), values[o - int(window):o], steps,
+                                 index[o - int(window):o], meta, library) for o in origins]
+
+        self.stdout.write(f"backtest {family}/{library}: 14 days, window {window}")
+        self.stdout.write(f"{'horizon':>8} {'origins':>8} {'per-origin ms':>14} {'batched ms':>11} {'speedup':>8}")
+        for steps in (1, 24):
+            n = len(backtest._origins(len(values), int(window), steps, 1))
+            seq = _timed(lambda: per_origin(steps), repeat)
+            batched = _timed(lambda: backtest.score(artifacts, library, index, values, steps), repeat)
+            self.stdout.write(f"{steps:>8} {n:>8} {seq * 1e3:>14.1f} {batched * 1e3:>11.1f} {seq / batched:>7.1f}x")
@@ -0,0 +1,77 @@
+# occupancy/management/commands/build_bundles.py
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from occupancy.ml.bundle import BUNDLE_FILE, ArtifactBundle, source_hashes, write_bundle
+from occupancy.ml.loader import (FAMILIES, MODEL_FILE, PREPROC_FILE, META_FILE, REGISTRY, _load_keras,
+                                 _safe_load_json, _safe_load_pickle)
+from occupancy.ml.npengine import GRAPH_FILE, WEIGHTS_FILE, NumpyModel, export_keras_model, export_matches, has_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Compile every artifacts/<family>/<lib_key>[/<version>]/ folder into a single memory-mappable "
+        f"{BUNDLE_FILE} (weights + feature plan + scaler/OHE parameters + meta)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--family", action="append", choices=FAMILIES,
+                            help="Limit to a family (repeatable).")
+        parser.add_argument("--library", action="append", help="Limit to a library key (repeatable).")
+        parser.add_argument("--atol", type=float, default=1e-5,
+                            help="Max allowed |triplet - bundle| on the parity check.")
+
+    def handle(self, *args, **opts):
+        families = set(opts["family"] or FAMILIES)
+        libraries = set(opts["library"] or [])
+        rng = np.random.default_rng(0)
+        failures = 0
+
+        REGISTRY.refresh(force=True)
+        for entry in REGISTRY.entries():
+            if entry.family not in families or (libraries and entry.lib_key not in libraries):
+                continue
+            root = entry.path
+            rel = root.relative_to(REGISTRY.root).as_posix()
+            if not (root / PREPROC_FILE).exists() or not (root / META_FILE).exists():
+                self.stdout.write(f"{rel}: skipped (no {PREPROC_FILE}/{META_FILE})")
+                continue
+
+            # Weights come from the NumPy export; refresh it first when missing or stale
+            model_p = root / MODEL_FILE
+            if model_p.exists() and not (has_export(root) and export_matches(root, model_p)):
+                export_keras_model(_load_keras(model_p), root, source=model_p)
+            if not has_export(root):
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"{rel}: no model to bundle"))
+                continue
+
+            graph = _safe_load_json(root / GRAPH_FILE)
+            with np.load(root / WEIGHTS_FILE, allow_pickle=False) as npz:
+                arrays = {k: npz[k] for k in npz.files}
+            pre = _safe_load_pickle(root / PREPROC_FILE)
+            size = write_bundle(root / BUNDLE_FILE, graph, arrays, pre, _safe_load_json(root / META_FILE),
+                                source=source_hashes(root))
+
+            # Parity: model output and scaler round trip, bundle vs the files it came from
+            t0 = time.perf_counter()
+            bundle = ArtifactBundle(root / BUNDLE_FILE)
+            load_ms = (time.perf_counter() - t0) * 1e3
+            ref = NumpyModel.load(root)
+            X = rng.random((4,) + tuple(d or 1 for d in ref.input_shape)[1:], dtype=np.float32)
+            diff = float(np.max(np.abs(ref(X) - NumpyModel(bundle.graph, bundle.arrays, pack=False)(X))))
+            scaler = bundle.preproc().get("occ_scaler")
+            if scaler is not None:
+                y = X[:, -1, :1].astype(float)
+                diff = max(diff, float(np.max(np.abs(
+                    scaler.inverse_transform(y) - pre["occ_scaler"].inverse_transform(y)))))
+
+            ok = diff <= opts["atol"]
+            failures += int(not ok)
+            style = self.style.SUCCESS if ok else self.style.ERROR
+            self.stdout.write(style(f"{rel}: {size / 1024:.0f} KiB, open {load_ms:.2f} ms, max|diff|={diff:.2e}"))
+
+        if failures:
+            raise CommandError(f"{failures} bundle(s) failed")
@@ -0,0 +1,45 @@
+# occupancy/management/commands/compute_forecasts.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from occupancy.forecast_store import compute_forecasts, prune
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute each library's active-model forecasts into the Forecast table: a rolling run from the "
+        "current hour (forecast/at) and one run per upcoming local day (forecast/day)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--library", action="append", help="Limit to a library key (repeatable).")
+        parser.add_argument("--hours", type=int, default=24, help="Length of the rolling run.")
+        parser.add_argument("--days", type=int, default=2, help="Local days to store, starting today.")
+        parser.add_argument("--workers", type=int, default=None, help="Parallel libraries (default: up to 8).")
+        parser.add_argument("--stale-only", action="store_true",
+                            help="Skip libraries whose stored rolling run is still current.")
+        parser.add_argument("--prune-days", type=int, default=7,
+                            help="Delete forecasts for hours older than this many days (0 keeps all).")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        rows = compute_forecasts(opts["library"], hours=opts["hours"], days=opts["days"],
+                                 max_workers=opts["workers"], stale_only=opts["stale_only"])
+        total = time.perf_counter() - t0
+
+        self.stdout.write(f"{'library':<22} {'family':<14} {'version':<8} {'rows':>6} {'ms':>9}")
+        for r in rows:
+            if r["skipped"]:
+                self.stdout.write(f"{r['library']:<22} {r['family']:<14} {r['version']:<8} {'current':>6}")
+            elif r["error"]:
+                self.stdout.write(self.style.ERROR(f"{r['library']:<22} {r['family']:<14} {r['version']:<8} {r['error']}"))
+            else:
+                self.stdout.write(f"{r['library']:<22} {r['family']:<14} {r['version']:<8} {r['rows']:>6} {r['ms']:>9.1f}")
+        if opts["prune_days"]:
+            self.stdout.write(f"pruned {prune(opts['prune_days'])} old forecast(s)")
+        self.stdout.write(f"{sum(r['rows'] for r in rows)} forecast row(s) in {total:.2f}s")
+
+        failed = [r for r in rows if r["error"]]
+        if failed:
+            raise CommandError(f"{len(failed)} library(ies) failed")
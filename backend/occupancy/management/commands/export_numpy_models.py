@@ -0,0 +1,51 @@
+# occupancy/management/commands/export_numpy_models.py
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from occupancy.ml.loader import ARTIFACTS_ROOT, FAMILIES, MODEL_FILE, _load_keras
+from occupancy.ml.npengine import NumpyModel, export_keras_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Export every artifacts/<family>/<lib_key>/model.keras to graph.json + weights.npz "
+        "so the API can serve it with the NumPy engine (no TensorFlow at runtime)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--family", action="append", choices=FAMILIES,
+                            help="Limit to a family (repeatable).")
+        parser.add_argument("--library", action="append", help="Limit to a library key (repeatable).")
+        parser.add_argument("--atol", type=float, default=1e-4,
+                            help="Max allowed |keras - numpy| on the parity check.")
+
+    def handle(self, *args, **opts):
+        families = opts["family"] or FAMILIES
+        libraries = set(opts["library"] or [])
+        rng = np.random.default_rng(0)
+        failures = 0
+
+        for family in families:
+            fam_dir = ARTIFACTS_ROOT / family
+            if not fam_dir.is_dir():
+                continue
+            for model_p in sorted(fam_dir.glob(f"**/{MODEL_FILE}")):
+                lib_dir = model_p.parent
+                rel = lib_dir.relative_to(ARTIFACTS_ROOT).as_posix()
+                if libraries and not libraries.intersection(lib_dir.relative_to(fam_dir).parts):
+                    continue
+
+                model = _load_keras(model_p)
+                export_keras_model(model, lib_dir, source=model_p)
+
+                # Parity check on a random batch
+                shape = tuple(d or 1 for d in NumpyModel.load(lib_dir).input_shape)
+                X = rng.random((4,) + shape[1:], dtype=np.float32)
+                diff = float(np.max(np.abs(model.predict(X, verbose=0) - NumpyModel.load(lib_dir)(X))))
+                ok = diff <= opts["atol"]
+                failures += int(not ok)
+                style = self.style.SUCCESS if ok else self.style.ERROR
+                self.stdout.write(style(f"{rel}: exported, max|diff|={diff:.2e}"))
+
+        if failures:
+            raise CommandError(f"{failures} export(s) exceeded atol={opts['atol']}")
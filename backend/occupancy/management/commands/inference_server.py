@@ -0,0 +1,51 @@
+# occupancy/management/commands/inference_server.py
+import os
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from occupancy.inference_server import INFERENCE_BATCH_WINDOW_MS, INFERENCE_MAX_BATCH, InferenceServer
+
+
+class Command(BaseCommand):
+    help = ("Run the local inference server: holds the models once and batches concurrent rollouts "
+            "from every web worker (point the workers at it with INFERENCE_SOCKET).")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=os.getenv("INFERENCE_SOCKET") or "/tmp/occupancy-inference.sock")
+        parser.add_argument("--window-ms", type=float, default=INFERENCE_BATCH_WINDOW_MS,
+                            help="How long to gather requests into one batch.")
+        parser.add_argument("--max-batch", type=int, default=INFERENCE_MAX_BATCH,
+                            help="Jobs per batch at most.")
+        parser.add_argument("--no-preload", action="store_true",
+                            help="Load models on first use instead of every active model at start.")
+
+    def handle(self, *args, **opts):
+        if not opts["no_preload"]:
+            self._preload()
+        server = InferenceServer(opts["socket"], batch_window_ms=opts["window_ms"], max_batch=opts["max_batch"])
+        server.bind()
+        signal.signal(signal.SIGTERM, lambda *_: server.shutdown())
+        self.stdout.write(f"inference server on {opts['socket']} "
+                          f"(batch window {opts['window_ms']:g} ms, max {opts['max_batch']} jobs)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+
+    def _preload(self):
+        # Straight into this process's cache: load_artifacts_cached would ask the server itself
+        from occupancy.infer import ARTIFACTS
+        from occupancy.preload import active_model_keys
+
+        keys = active_model_keys()
+        connections.close_all()  # the server never touches the database again
+        for family, lib_key, version in keys:
+            try:
+                ARTIFACTS.get(family, lib_key, version)
+                self.stdout.write(f"loaded {family}/{lib_key} {version}")
+            except Exception as e:
+                self.stdout.write(self.style.WARNING(f"{family}/{lib_key} {version}: {type(e).__name__}: {e}"))
@@ -0,0 +1,29 @@
+# occupancy/management/commands/memory_report.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from occupancy.ml.memory import child_pids, smaps_rollup
+
+
+class Command(BaseCommand):
+    help = "Per-process RSS / PSS / shared memory for a gunicorn master and its workers (Linux)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pid", type=int, default=os.getpid(), help="Master pid (default: this process).")
+
+    def handle(self, *args, **opts):
+        pid = opts["pid"]
+        try:
+            pids = [pid] + child_pids(pid)
+            rows = [(p, smaps_rollup(p)) for p in pids]
+        except FileNotFoundError as e:
+            raise CommandError(f"/proc not readable for pid {pid}: {e}")
+
+        self.stdout.write(f"{'pid':>8} {'role':<7} {'RSS MiB':>9} {'PSS MiB':>9} {'shared MiB':>11} {'private MiB':>12}")
+        for p, m in rows:
+            role = "master" if p == pid else "worker"
+            self.stdout.write(f"{p:>8} {role:<7} {m['Rss'] / 1024:>9.1f} {m['Pss'] / 1024:>9.1f} "
+                              f"{m['Shared'] / 1024:>11.1f} {m['Private'] / 1024:>12.1f}")
+        total_pss = sum(m["Pss"] for _, m in rows)
+        self.stdout.write(f"total PSS {total_pss / 1024:.1f} MiB across {len(rows)} process(es)")
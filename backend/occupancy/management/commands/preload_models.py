@@ -0,0 +1,32 @@
+# occupancy/management/commands/preload_models.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from occupancy.preload import preload_active_models
+
+
+class Command(BaseCommand):
+    help = "Load and warm up every library's active model, reporting per-model load and warm-up times."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Parallel loads (default: up to 8).")
+        parser.add_argument("--no-warm", action="store_true", help="Load only; skip the dummy forward pass.")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        rows = preload_active_models(max_workers=opts["workers"], warm=not opts["no_warm"])
+        total = time.perf_counter() - t0
+
+        self.stdout.write(f"{'library':<22} {'family':<14} {'version':<8} {'load ms':>9} {'warm ms':>9}")
+        for r in rows:
+            if r["ok"]:
+                warm = f"{r['warm_ms']:>9.1f}" if r["warm_ms"] is not None else f"{'-':>9}"
+                self.stdout.write(f"{r['library']:<22} {r['family']:<14} {r['version']:<8} {r['load_ms']:>9.1f} {warm}")
+            else:
+                self.stdout.write(self.style.ERROR(f"{r['library']:<22} {r['family']:<14} {r['version']:<8} {r['error']}"))
+        self.stdout.write(f"{len(rows)} model(s) in {total:.2f}s")
+
+        failed = [r for r in rows if not r["ok"]]
+        if failed:
+            raise CommandError(f"{len(failed)} model(s) failed to preload")
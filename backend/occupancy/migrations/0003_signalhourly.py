@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('occupancy', '0002_activemodel_modelcandidate_modelevaluation_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SignalHourly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('raw_max', models.IntegerField(default=0)),
+                ('corrected', models.IntegerField(default=0)),
+                ('samples', models.IntegerField(default=0)),
+                ('library', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hourly', to='occupancy.library')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('library', 'hour'), name='uniq_signal_hourly_per_library_hour')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 00:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('occupancy', '0003_signalhourly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='forecast',
+            name='data_ts',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Builds the SignalHourly rollup (created empty by 0003) from existing signals, so
+# forecasts, profiles and history read real data right after deploying it.
+from datetime import timezone as dt_timezone
+
+import numpy as np
+import pandas as pd
+from django.db import migrations
+from django.db.models import Count, Max
+from django.db.models.functions import TruncHour
+
+# infer.LIBRARY_CORRECTION_FACTORS as of this migration (later changes: manage.py backfill_hourly)
+CORRECTION_FACTORS = {
+    'miguel_pro': 1.5,
+    'gisbert_2nd_floor': 8.0,
+    'american_corner': 3.5,
+    'gisbert_4th_floor': 5.0,
+    'gisbert_5th_floor': 10.0,
+    'gisbert_3rd_floor': 5.0,
+}
+
+
+def backfill(apps, schema_editor):
+    """Same rows as rollup.rollup_library, for every library that has signals and no rollup yet."""
+    Library = apps.get_model("occupancy", "Library")
+    Signal = apps.get_model("occupancy", "Signal")
+    SignalHourly = apps.get_model("occupancy", "SignalHourly")
+    db = schema_editor.connection.alias
+
+    for lib in Library.objects.using(db).all():
+        if SignalHourly.objects.using(db).filter(library=lib).exists():
+            continue
+        agg = list(Signal.objects.using(db)
+                   .filter(library=lib)
+                   .annotate(bucket=TruncHour("ts", tzinfo=dt_timezone.utc))
+                   .values("bucket")
+                   .annotate(raw_max=Max("wifi_clients"), samples=Count("id")))
+        if not agg:
+            continue
+        buckets = pd.DatetimeIndex([r["bucket"] for r in agg]).tz_convert("UTC")
+        idx = pd.date_range(buckets.min(), buckets.max(), freq="h", tz="UTC")
+        raw = np.zeros(len(idx), dtype=np.int64)
+        samples = np.zeros(len(idx), dtype=np.int64)
+        for i, r in zip(idx.get_indexer(buckets), agg):
+            raw[i], samples[i] = r["raw_max"], r["samples"]
+        corrected = np.round(raw * CORRECTION_FACTORS.get(lib.key, 1.0)).astype(np.int64)
+        SignalHourly.objects.using(db).bulk_create([
+            SignalHourly(library=lib, hour=ts.to_pydatetime(), raw_max=int(r), corrected=int(c), samples=int(n))
+            for ts, r, c, n in zip(idx, raw, corrected, samples)
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('occupancy', '0004_forecast_data_ts'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
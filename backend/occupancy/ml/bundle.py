@@ -0,0 +1,258 @@
+# backend/occupancy/ml/bundle.py
+"""
+Single-file, memory-mappable artifact bundle.
+
+Layout of `artifact.bundle`:
+
+  offset 0   b"OCCBNDL\\0"                 8-byte magic
+  offset 8   uint32 LE format version
+  offset 12  uint32 LE header length (bytes of UTF-8 JSON)
+  offset 16  JSON header
+  ...        zero padding up to `data_offset` (page aligned)
+  data       raw little-endian arrays, each starting on a 64-byte boundary
+
+The header carries the NumPy-engine graph, an index of the arrays
+({name: dtype, shape, offset}), the preprocessing needed at inference time
+(window, feature_order, scaler min/scale, OHE categories) and meta.json.
+Opening a bundle maps the file read-only and hands out zero-copy views, so
+loading costs one small JSON parse and the weight pages are shared by every
+process that maps the same file. No pickle, Keras or sklearn is involved.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BUNDLE_FILE = "artifact.bundle"
+BUNDLE_FORMAT = 1
+
+_MAGIC = b"OCCBNDL\0"
+_PREFIX = struct.Struct("<8sII")
+_ARRAY_ALIGN = 64
+_DATA_ALIGN = mmap.ALLOCATIONGRANULARITY
+
+# Files a bundle is compiled from; their hashes are recorded to detect staleness
+SOURCE_FILES = ("model.keras", "preproc.pkl", "meta.json")
+
+
+def _align(n: int, to: int) -> int:
+    return (n + to - 1) // to * to
+
+
+def _jsonable(v):
+    if isinstance(v, dict):
+        return {str(k): _jsonable(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    if isinstance(v, np.ndarray):
+        return _jsonable(v.tolist())
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+# -------------------- sklearn stand-ins --------------------
+class MinMaxParams:
+    """The parts of a fitted MinMaxScaler used at inference: X * scale_ + min_ and back."""
+
+    def __init__(self, min_, scale_, data_min_=None, data_max_=None, feature_range=(0, 1)):
+        self.min_ = np.asarray(min_, dtype=float)
+        self.scale_ = np.asarray(scale_, dtype=float)
+        self.data_min_ = None if data_min_ is None else np.asarray(data_min_, dtype=float)
+        self.data_max_ = None if data_max_ is None else np.asarray(data_max_, dtype=float)
+        self.feature_range = tuple(feature_range)
+        self.n_features_in_ = int(self.scale_.size)
+
+    @classmethod
+    def from_sklearn(cls, scaler) -> "MinMaxParams":
+        return cls(scaler.min_, scaler.scale_, getattr(scaler, "data_min_", None),
+                   getattr(scaler, "data_max_", None), getattr(scaler, "feature_range", (0, 1)))
+
+    def to_json(self) -> Dict[str, Any]:
+        return _jsonable({"min_": self.min_, "scale_": self.scale_, "data_min_": self.data_min_,
+                          "data_max_": self.data_max_, "feature_range": self.feature_range})
+
+    def transform(self, X):
+        return np.asarray(X, dtype=float) * self.scale_ + self.min_
+
+    def inverse_transform(self, X):
+        return (np.asarray(X, dtype=float) - self.min_) / self.scale_
+
+
+class OneHotParams:
+    """The parts of a fitted OneHotEncoder used at inference (categories, dropped index, names)."""
+
+    def __init__(self, categories: Sequence[Sequence], drop_idx: Optional[Sequence[Optional[int]]] = None,
+                 feature_names_in: Optional[Sequence[str]] = None, handle_unknown: str = "error"):
+        self.categories_ = [np.asarray(c) for c in categories]
+        self.drop_idx_ = None if drop_idx is None else np.asarray(drop_idx, dtype=object)
+        if feature_names_in is not None:
+            self.feature_names_in_ = np.asarray(list(feature_names_in), dtype=object)
+        self.handle_unknown = handle_unknown
+        self.n_features_in_ = len(self.categories_)
+
+    @classmethod
+    def from_sklearn(cls, ohe) -> "OneHotParams":
+        drop = getattr(ohe, "drop_idx_", None)
+        return cls(ohe.categories_, None if drop is None else list(drop),
+                   getattr(ohe, "feature_names_in_", None), getattr(ohe, "handle_unknown", "error"))
+
+    def to_json(self) -> Dict[str, Any]:
+        return _jsonable({
+            "categories": [c for c in self.categories_],
+            "drop_idx": None if self.drop_idx_ is None else [None if d is None else int(d) for d in self.drop_idx_],
+            "feature_names_in": list(getattr(self, "feature_names_in_", [])) or None,
+            "handle_unknown": self.handle_unknown,
+        })
+
+    def _kept(self, i: int) -> List[int]:
+        drop = None if self.drop_idx_ is None else self.drop_idx_[i]
+        return [j for j in range(len(self.categories_[i])) if drop is None or j != drop]
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        names = list(input_features) if input_features is not None else \
+            list(getattr(self, "feature_names_in_", [f"x{i}" for i in range(self.n_features_in_)]))
+        return np.asarray([f"{names[i]}_{cats[j]}" for i, cats in enumerate(self.categories_)
+                           for j in self._kept(i)], dtype=object)
+
+    def transform(self, X) -> np.ndarray:
+        X = np.asarray(getattr(X, "values", X))
+        cols = []
+        for i, cats in enumerate(self.categories_):
+            vals = X[:, i]
+            if self.handle_unknown == "error" and not np.isin(vals, cats).all():
+                raise ValueError(f"Found unknown categories in column {i} during transform")
+            for j in self._kept(i):
+                cols.append(vals == cats[j])
+        return np.stack(cols, axis=1).astype(float) if cols else np.zeros((len(X), 0))
+
+
+# -------------------- write --------------------
+def write_bundle(path: Path, graph: Dict[str, Any], arrays: Dict[str, np.ndarray], preproc: Dict[str, Any],
+                 meta: Dict[str, Any], source: Optional[Dict[str, str]] = None) -> int:
+    """
+    Write a bundle atomically (temp file + rename). `preproc` is the raw
+    preproc.pkl dict; its sklearn objects are reduced to plain parameters.
+    Returns the file size in bytes.
+    """
+    spec = dict(preproc.get("spec") or {})
+    scaler, ohe = preproc.get("occ_scaler"), preproc.get("ohe")
+    pre_json = {
+        "spec": _jsonable(spec),
+        "occ_scaler": MinMaxParams.from_sklearn(scaler).to_json() if scaler is not None else None,
+        "ohe": OneHotParams.from_sklearn(ohe).to_json() if ohe is not None else None,
+    }
+
+    index: Dict[str, Dict[str, Any]] = {}
+    offset = 0
+    blobs: List[Tuple[int, bytes]] = []
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr, dtype=np.asarray(arr).dtype.newbyteorder("<"))
+        offset = _align(offset, _ARRAY_ALIGN)
+        index[name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+        blobs.append((offset, arr.tobytes()))
+        offset += arr.nbytes
+
+    header = {"format": BUNDLE_FORMAT, "graph": graph, "arrays": index, "preproc": pre_json,
+              "meta": _jsonable(meta), "source": source or {}}
+    # data_offset depends on the header length, which includes data_offset: settle it in two passes
+    header["data_offset"] = 0
+    for _ in range(2):
+        raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        header["data_offset"] = _align(_PREFIX.size + len(raw), _DATA_ALIGN)
+    raw = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_offset = header["data_offset"]
+    assert _PREFIX.size + len(raw) <= data_offset
+
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp{os.getpid()}")
+    with open(tmp, "wb") as f:
+        f.write(_PREFIX.pack(_MAGIC, BUNDLE_FORMAT, len(raw)))
+        f.write(raw)
+        for off, blob in blobs:
+            f.seek(data_offset + off)
+            f.write(blob)
+        f.truncate(data_offset + offset)
+    os.replace(tmp, path)
+    return data_offset + offset
+
+
+# -------------------- read --------------------
+def read_header(path: Path) -> Dict[str, Any]:
+    """Parse just the JSON header (no mapping)."""
+    with open(path, "rb") as f:
+        magic, fmt, n = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != _MAGIC:
+            raise ValueError(f"{Path(path).as_posix()} is not an artifact bundle")
+        if fmt != BUNDLE_FORMAT:
+            raise ValueError(f"Unsupported bundle format {fmt}")
+        return json.loads(f.read(n).decode("utf-8"))
+
+
+class ArtifactBundle:
+    """A mapped bundle: `header`, zero-copy read-only `arrays`, and sklearn-free preprocessing."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.header = read_header(self.path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        base = self.header["data_offset"]
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, spec in self.header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arr = np.frombuffer(self._map, dtype=dtype, count=count, offset=base + spec["offset"])
+            self.arrays[name] = arr.reshape(spec["shape"])
+
+    @property
+    def graph(self) -> Dict[str, Any]:
+        return self.header["graph"]
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self.header["meta"]
+
+    def preproc(self) -> Dict[str, Any]:
+        """preproc.pkl-shaped dict with MinMaxParams / OneHotParams in place of sklearn objects."""
+        pre = self.header["preproc"]
+        out: Dict[str, Any] = {"spec": pre.get("spec") or {}}
+        if pre.get("occ_scaler"):
+            out["occ_scaler"] = MinMaxParams(**pre["occ_scaler"])
+        if pre.get("ohe"):
+            o = pre["ohe"]
+            out["ohe"] = OneHotParams(o["categories"], o.get("drop_idx"), o.get("feature_names_in"),
+                                      o.get("handle_unknown", "error"))
+        return out
+
+
+def source_hashes(root: Path, names: Iterable[str] = SOURCE_FILES) -> Dict[str, str]:
+    from .npengine import file_sha256
+
+    root = Path(root)
+    return {name: file_sha256(root / name) for name in names if (root / name).exists()}
+
+
+def bundle_matches(root: Path) -> bool:
+    """
+    True when `root` has a bundle built from the files still next to it. A
+    bundle shipped on its own (no source files present) is always current.
+    """
+    p = Path(root) / BUNDLE_FILE
+    if not p.exists():
+        return False
+    try:
+        recorded = read_header(p).get("source") or {}
+    except (OSError, ValueError):
+        return False
+    present = [n for n in SOURCE_FILES if (Path(root) / n).exists()]
+    if not present:
+        return True
+    return all(n in recorded for n in present) and source_hashes(root, present) == \
+        {n: recorded[n] for n in present}
@@ -0,0 +1,243 @@
+# backend/occupancy/ml/cache.py
+"""
+Content-addressed, memory-bounded artifact cache.
+
+Entries are stored by a sha256 of the artifact files (model / export,
+preproc, meta), and each (family, lib_key, version) key points at a digest.
+A cheap stat() signature is checked on every lookup; only when it changes is
+the content re-hashed, and only when the hash changes is the artifact
+reloaded. The reload happens outside the cache lock and the new entry is
+swapped in whole, so readers see either the old or the new bundle, never a
+mix. Entries are evicted least-recently-used once the resident bytes exceed
+the budget.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Every file that can affect what load_artifacts returns
+ARTIFACT_FILES = ("artifact.bundle", "model.keras", "graph.json", "weights.npz", "preproc.pkl", "meta.json")
+
+# Byte budget for resident artifacts (default 512 MiB)
+ARTIFACT_CACHE_BYTES = int(os.getenv("ARTIFACT_CACHE_BYTES", str(512 * 1024 * 1024)))
+
+Key = Tuple[str, str, str]
+
+
+def artifact_dir(root: Path, family: str, lib_key: str, version: Optional[str] = None) -> Path:
+    """<root>/<family>/<lib_key>/<version>/ when that folder exists, else <root>/<family>/<lib_key>/."""
+    base = Path(root) / family / lib_key
+    if version:
+        versioned = base / str(version)
+        if versioned.is_dir():
+            return versioned
+    return base
+
+
+def _stat_signature(root: Path) -> Tuple:
+    sig = []
+    for name in ARTIFACT_FILES:
+        try:
+            st = (root / name).stat()
+        except FileNotFoundError:
+            continue
+        sig.append((name, st.st_size, st.st_mtime_ns))
+    return tuple(sig)
+
+
+def content_digest(root: Path) -> str:
+    """sha256 over the names and bytes of every artifact file present in `root`."""
+    h = hashlib.sha256()
+    for name in ARTIFACT_FILES:
+        p = root / name
+        if not p.exists():
+            continue
+        h.update(name.encode())
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def resident_bytes(bundle: Tuple[Any, Any, int, Dict[str, Any]], root: Path) -> int:
+    """Approximate memory held by a loaded (model, scaler, window, meta) bundle."""
+    model, _scaler, _window, meta = bundle
+    n = getattr(model, "nbytes", None)
+    if n is None:
+        try:
+            n = sum(int(w.numpy().nbytes) for w in model.weights)
+        except Exception:
+            n = sum(p.stat().st_size for p in (root / "model.keras",) if p.exists())
+    plan = meta.get("feature_plan") if isinstance(meta, dict) else None
+    if plan is not None:
+        n += plan.table.nbytes
+    # Scaler + OHE: the pickle size is a fair stand-in
+    pre = root / "preproc.pkl"
+    if pre.exists():
+        n += pre.stat().st_size
+    return int(n)
+
+
+class _Entry:
+    __slots__ = ("bundle", "nbytes", "root")
+
+    def __init__(self, bundle, nbytes: int, root: Path):
+        self.bundle = bundle
+        self.nbytes = nbytes
+        self.root = root
+
+
+class ArtifactCache:
+    """
+    get(family, lib_key, version) -> (model, scaler, window, meta)
+
+    `resolve(family, lib_key, version)` picks the artifact directory
+    (default: artifact_dir) and `loader(root, family, lib_key)` does the
+    actual load from it.
+    """
+
+    def __init__(self, root: Path, loader: Callable[[Path, str, str], Tuple[Any, Any, int, Dict[str, Any]]],
+                 max_bytes: int = ARTIFACT_CACHE_BYTES,
+                 resolve: Optional[Callable[[str, str, Optional[str]], Path]] = None):
+        self.root = Path(root)
+        self.loader = loader
+        self.resolve = resolve or (lambda family, lib_key, version: artifact_dir(self.root, family, lib_key, version))
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Key, threading.Lock] = {}
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()  # digest -> entry, LRU order
+        self._keys: Dict[Key, Tuple[str, Tuple]] = {}  # key -> (digest, stat signature)
+        self._bytes = 0
+        self.hits = self.misses = self.reloads = self.evictions = 0
+        self.load_seconds = 0.0
+
+    # ---------------- lookups ----------------
+    def get(self, family: str, lib_key: str, version: str):
+        key = (family, lib_key, str(version))
+        root = self.resolve(family, lib_key, version)
+        sig = _stat_signature(root)
+
+        entry = self._lookup(key, sig)
+        if entry is not None:
+            return entry.bundle
+
+        with self._key_lock(key):
+            # Another thread may have finished the same load while we waited
+            entry = self._lookup(key, sig, count=False)
+            if entry is not None:
+                return entry.bundle
+            return self._refresh(key, root, sig).bundle
+
+    def _lookup(self, key: Key, sig: Tuple, count: bool = True) -> Optional[_Entry]:
+        with self._lock:
+            known = self._keys.get(key)
+            if known is None or known[1] != sig:
+                return None
+            entry = self._entries.get(known[0])
+            if entry is None:  # evicted
+                return None
+            self._entries.move_to_end(known[0])
+            if count:
+                self.hits += 1
+            return entry
+
+    def _refresh(self, key: Key, root: Path, sig: Tuple) -> _Entry:
+        digest = content_digest(root)
+        with self._lock:
+            previous = self._keys.get(key)
+            entry = self._entries.get(digest)
+            if entry is not None:
+                # Same bytes (touched file, or shared by another key/version): no reload
+                self._entries.move_to_end(digest)
+                self._keys[key] = (digest, sig)
+                self.hits += 1
+                self._release(previous, digest)
+                return entry
+            self.misses += 1
+            if previous is not None:
+                self.reloads += 1
+
+        t0 = time.perf_counter()
+        bundle = self.loader(root, key[0], key[1])
+        elapsed = time.perf_counter() - t0
+        entry = _Entry(bundle, resident_bytes(bundle, root), root)
+
+        # Files changed mid-load: serve this bundle, but re-check on the next call
+        if _stat_signature(root) != sig:
+            sig = ()
+
+        with self._lock:
+            self.load_seconds += elapsed
+            if digest not in self._entries:
+                self._entries[digest] = entry
+                self._bytes += entry.nbytes
+            self._keys[key] = (digest, sig)
+            self._release(previous, digest)
+            self._evict(keep=digest)
+        return entry
+
+    # ---------------- bookkeeping (call with self._lock held) ----------------
+    def _key_lock(self, key: Key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _release(self, previous: Optional[Tuple[str, Tuple]], current: str) -> None:
+        """Drop the entry a key used to point at, unless still referenced."""
+        if not previous or previous[0] == current:
+            return
+        old = previous[0]
+        if any(d == old for d, _ in self._keys.values()):
+            return
+        entry = self._entries.pop(old, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _evict(self, keep: str) -> None:
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            digest = next(iter(self._entries))
+            if digest == keep:
+                self._entries.move_to_end(digest)
+                digest = next(iter(self._entries))
+            entry = self._entries.pop(digest)
+            self._bytes -= entry.nbytes
+            self.evictions += 1
+            for k in [k for k, (d, _) in self._keys.items() if d == digest]:
+                del self._keys[k]
+
+    # ---------------- admin ----------------
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "keys": len(self._keys),
+                "bytes_resident": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else None,
+                "reloads": self.reloads,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 4),
+            }
+
+    def resident(self) -> List[Dict[str, Any]]:
+        """One row per cached key: which digest it serves and how big that entry is."""
+        with self._lock:
+            return [
+                {"family": k[0], "library": k[1], "version": k[2], "digest": d[:12],
+                 "bytes": self._entries[d].nbytes if d in self._entries else 0}
+                for k, (d, _) in sorted(self._keys.items())
+            ]
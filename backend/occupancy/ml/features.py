@@ -0,0 +1,252 @@
+# backend/occupancy/ml/features.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+PH_TZ = "Asia/Manila"
+
+OCC_FEATURE = "occupancy_scaled"
+
+# Numeric schedule features, in the order infer._row_vector builds them
+SCHED_FEATURES = (
+    "is_weekend", "is_sunday", "library_open", "class_hours", "activity_period",
+    "morning_peak", "afternoon_peak", "evening_peak", "is_holiday", "is_preliminary",
+    "study_intensity", "hour_sin", "hour_cos", "dow_sin", "dow_cos",
+)
+
+# Every calendar feature depends only on (local hour, day of week): 7 x 24 slots
+N_SLOTS = 7 * 24
+
+_HOUR_ALIASES = ("hour", "hr")
+_DOW_ALIASES = ("day_of_week", "dow", "weekday")
+
+
+def sched_columns(hour: np.ndarray, dow: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Vectorized twin of infer._sched_row: one float64 column per schedule
+    feature, computed for every (local hour, day of week) pair at once.
+    """
+    hour = np.asarray(hour, dtype=np.int64)
+    dow = np.asarray(dow, dtype=np.int64)
+
+    weekday = dow < 5
+    saturday = dow == 5
+
+    is_weekend = dow >= 5
+    is_sunday = dow == 6
+    library_open = np.where(weekday, (hour >= 7) & (hour < 20),
+                            saturday & (hour >= 7) & (hour < 12))
+    class_hours = weekday & (hour >= 7) & (hour < 22)
+    activity_period = ((dow == 0) | (dow == 2)) & (hour >= 15) & (hour < 18)
+    morning_peak = np.where(weekday, (hour >= 8) & (hour < 11),
+                            saturday & (hour >= 9) & (hour < 12))
+    afternoon_peak = weekday & (hour >= 13) & (hour < 16)
+    evening_peak = weekday & (hour >= 18) & (hour < 20)
+
+    # Holiday / preliminary flags are always off at inference time
+    is_holiday = np.zeros(hour.shape, dtype=bool)
+    is_preliminary = np.zeros(hour.shape, dtype=bool)
+
+    day_weight = np.select(
+        [(dow == 0) | (dow == 2), dow == 4, is_weekend],
+        [1.2, 0.8, 0.5],
+        default=1.0,
+    )
+    study_intensity = library_open * (
+        class_hours.astype(np.int64) + activity_period
+        + (1 - is_holiday.astype(np.int64)) + (1 - is_preliminary.astype(np.int64))
+    ) * day_weight
+
+    return {
+        "is_weekend": is_weekend.astype(float),
+        "is_sunday": is_sunday.astype(float),
+        "library_open": library_open.astype(float),
+        "class_hours": class_hours.astype(float),
+        "activity_period": activity_period.astype(float),
+        "morning_peak": morning_peak.astype(float),
+        "afternoon_peak": afternoon_peak.astype(float),
+        "evening_peak": evening_peak.astype(float),
+        "is_holiday": is_holiday.astype(float),
+        "is_preliminary": is_preliminary.astype(float),
+        "study_intensity": study_intensity.astype(float),
+        "hour_sin": np.sin(2 * np.pi * hour / 24.0),
+        "hour_cos": np.cos(2 * np.pi * hour / 24.0),
+        "dow_sin": np.sin(2 * np.pi * dow / 7.0),
+        "dow_cos": np.cos(2 * np.pi * dow / 7.0),
+    }
+
+
+def calendar_slots(ts_utc: pd.DatetimeIndex) -> np.ndarray:
+    """Hour-of-week slot (dow * 24 + local hour) for every timestamp."""
+    idx = pd.DatetimeIndex(ts_utc)
+    idx = idx.tz_localize("UTC") if idx.tz is None else idx
+    local = idx.tz_convert(PH_TZ)
+    return local.dayofweek.to_numpy(dtype=np.int64) * 24 + local.hour.to_numpy(dtype=np.int64)
+
+
+def _ohe_columns(ohe) -> Tuple[List[str], Dict[str, Tuple[int, Any]]]:
+    """
+    Map each OHE output name to (input position, category value), following
+    ohe.categories_ and the dropped category of each input.
+    Returns (input kinds, mapping); empty mapping when the encoder is unusable,
+    which mirrors the zero-filled fallback of infer._row_vector.
+    """
+    if ohe is None:
+        return [], {}
+
+    ohe_in = list(getattr(ohe, "feature_names_in_", [])) or ["hour", "day_of_week"]
+    kinds = []
+    for name in ohe_in:
+        low = str(name).lower()
+        if low in _HOUR_ALIASES:
+            kinds.append("hour")
+        elif low in _DOW_ALIASES:
+            kinds.append("dow")
+        else:
+            kinds.append("zero")
+
+    try:
+        names = list(ohe.get_feature_names_out(["hour", "day_of_week"]))
+    except Exception:
+        return kinds, {}
+
+    drop_idx = getattr(ohe, "drop_idx_", None)
+    pairs: List[Tuple[int, Any]] = []
+    for i, cats in enumerate(getattr(ohe, "categories_", [])):
+        drop = drop_idx[i] if drop_idx is not None else None
+        for j, cat in enumerate(cats):
+            if drop is not None and j == drop:
+                continue
+            pairs.append((i, cat))
+
+    if len(pairs) != len(names):
+        return kinds, {}
+    return kinds, dict(zip(names, pairs))
+
+
+class FeaturePlan:
+    """
+    Compiled column plan for one model's `feature_order` + fitted OHE.
+
+    Built once per artifact. Compiling also evaluates the calendar features
+    for all 168 hour-of-week slots into `table`, a (168, n_features - 1)
+    float32 array in feature_order (occupancy column left out), so a feature
+    row for any timestamp is a single gather.
+    """
+
+    def __init__(self, feature_order: Sequence[str], ohe=None):
+        self.feature_order: List[str] = list(feature_order or [])
+        self.n_features = len(self.feature_order)
+        self.occ_col: Optional[int] = (
+            self.feature_order.index(OCC_FEATURE) if OCC_FEATURE in self.feature_order else None
+        )
+
+        self._ohe_kinds, ohe_map = _ohe_columns(ohe)
+        self._ohe_categories = [np.asarray(c) for c in getattr(ohe, "categories_", [])] if ohe_map else []
+        self._ohe_strict = bool(ohe_map) and getattr(ohe, "handle_unknown", "error") == "error"
+
+        # (column index, source) for everything except occupancy
+        self._sched: List[Tuple[int, str]] = []
+        self._ohe: List[Tuple[int, int, Any]] = []
+        for col, name in enumerate(self.feature_order):
+            if name == OCC_FEATURE:
+                continue
+            if name in SCHED_FEATURES:
+                self._sched.append((col, name))
+            elif name in ohe_map:
+                i, cat = ohe_map[name]
+                self._ohe.append((col, i, cat))
+            # anything else stays 0.0 (same as the KeyError fallback in _row_vector)
+
+        cal_cols = [c for c in range(self.n_features) if c != self.occ_col]
+        # Plain slice when the calendar columns are contiguous (occupancy first/last)
+        if cal_cols and cal_cols == list(range(cal_cols[0], cal_cols[-1] + 1)):
+            self._cal_cols: slice | List[int] = slice(cal_cols[0], cal_cols[-1] + 1)
+        else:
+            self._cal_cols = cal_cols
+
+        slots = np.arange(N_SLOTS)
+        full = self.calendar(slots % 24, slots // 24)
+        self.table = np.ascontiguousarray(full[:, cal_cols], dtype=np.float32)
+        self.table.setflags(write=False)
+
+    def calendar(self, hour: np.ndarray, dow: np.ndarray) -> np.ndarray:
+        """(n, n_features) matrix of the calendar features; occupancy column left at 0."""
+        hour = np.asarray(hour, dtype=np.int64)
+        dow = np.asarray(dow, dtype=np.int64)
+        out = np.zeros((hour.shape[0], self.n_features), dtype=float)
+
+        if self._sched:
+            sched = sched_columns(hour, dow)
+            for col, name in self._sched:
+                out[:, col] = sched[name]
+
+        if self._ohe:
+            inputs = []
+            for kind in self._ohe_kinds:
+                if kind == "hour":
+                    inputs.append(hour)
+                elif kind == "dow":
+                    inputs.append(dow)
+                else:
+                    inputs.append(np.zeros_like(hour))
+            for col, i, cat in self._ohe:
+                out[:, col] = inputs[i] == cat
+
+            if self._ohe_strict:
+                # sklearn raises on unknown categories; _row_vector then drops every OHE column
+                known = np.ones(hour.shape[0], dtype=bool)
+                for vals, cats in zip(inputs, self._ohe_categories):
+                    known &= np.isin(vals, cats)
+                if not known.all():
+                    ohe_cols = [col for col, _, _ in self._ohe]
+                    out[np.ix_(~known, ohe_cols)] = 0.0
+        return out
+
+    def rows(self, slots: np.ndarray, occ_values: np.ndarray, capacity: float) -> np.ndarray:
+        """(len(slots), n_features) float32 matrix: table gather + scaled occupancy."""
+        slots = np.asarray(slots, dtype=np.int64)
+        out = np.empty((slots.shape[0], self.n_features), dtype=np.float32)
+        out[:, self._cal_cols] = self.table[slots]
+        if self.occ_col is not None:
+            out[:, self.occ_col] = np.asarray(occ_values, dtype=float) / capacity
+        return out
+
+    def build(self, ts_utc: pd.DatetimeIndex, occ_values: np.ndarray, capacity: float) -> np.ndarray:
+        """
+        Vectorized twin of stacking infer._row_vector over a window:
+        returns the (len(ts_utc), n_features) float32 matrix.
+        """
+        return self.rows(calendar_slots(ts_utc), occ_values, capacity)
+
+
+class WindowRing:
+    """
+    Rolling (window, n_features) model input for recursive forecasting.
+
+    Rows are stored twice in a (2 * window) buffer (a mirrored ring), so the
+    latest `window` rows are always one contiguous slice: pushing a step is
+    two row writes, and `view()` never copies or reallocates.
+    """
+
+    def __init__(self, rows: np.ndarray):
+        rows = np.asarray(rows, dtype=np.float32)
+        self.window, n_features = rows.shape
+        self._buf = np.empty((2 * self.window, n_features), dtype=np.float32)
+        self._buf[: self.window] = rows
+        self._buf[self.window:] = rows
+        self._head = 0  # index of the oldest row in the current window
+
+    def view(self) -> np.ndarray:
+        """Current window as a (1, window, n_features) float32 view."""
+        return self._buf[self._head: self._head + self.window][None, ...]
+
+    def push(self, row: np.ndarray) -> None:
+        """Drop the oldest row and append `row` as the newest one."""
+        h = self._head
+        self._buf[h] = row
+        self._buf[h + self.window] = row
+        self._head = (h + 1) % self.window
@@ -9,6 +9,13 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import pandas as pd
 
+from .bundle import BUNDLE_FILE, ArtifactBundle, bundle_matches
+from .cache import ArtifactCache
+from .features import FeaturePlan
+from .npengine import NumpyModel, export_matches, has_export
+from .predictor import make_predictor
+from .registry import ArtifactRegistry
+
 try:
     # If running inside Django
     from django.conf import settings
@@ -23,6 +30,11 @@ MODEL_FILE  = os.getenv("MODEL_FILE", "model.keras")
 PREPROC_FILE= os.getenv("PREPROC_FILE", "preproc.pkl")
 META_FILE   = os.getenv("META_FILE", "meta.json")
 
+# Inference engine: "auto" serves the NumPy export (graph.json + weights.npz) when it
+# was exported from the current model.keras, "keras" always loads model.keras,
+# "numpy" requires the export (lets the API run without TensorFlow installed)
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "auto").strip().lower()
+
 # Optional default family for UI fallback / student default suggestion
 MODEL_DEFAULT_FAMILY = os.getenv("MODEL_DEFAULT_FAMILY", "cnn_lstm_attn")
 
@@ -54,30 +66,65 @@ def _safe_load_json(p: Path) -> Dict[str, Any]:
         return json.load(f)
 
 def _load_keras(path: Path):
-    # Import lazily so unit tests (without TF) can still run
+    # The only place the TensorFlow/Keras stack gets imported: Django startup,
+    # migrations, management commands and the health check never pay for it,
+    # and neither do workers serving the NumPy exports.
     from keras.models import load_model
     return load_model(path, compile=False)
 
-def load_artifacts(family: str, lib_key: str) -> Tuple[Any, Any, int, Dict[str, Any]]:
+def model_engine(root: Path, bundled: Optional[bool] = None) -> str:
+    """
+    Which engine load_model_from_dir will use for an artifact dir: "numpy" or "keras".
+    `bundled` is a bundle_matches(root) result the caller already has (hashing
+    the source files is the expensive part).
+    """
+    if MODEL_ENGINE == "keras":
+        return "keras"
+    if bundle_matches(root) if bundled is None else bundled:
+        return "numpy"
+    model_p = root / MODEL_FILE
+    if has_export(root):
+        if MODEL_ENGINE == "numpy" or not model_p.exists() or export_matches(root, model_p):
+            return "numpy"
+    return "keras"
+
+def load_model_from_dir(root: Path, bundled: Optional[bool] = None):
+    """Load the servable model in an artifact dir, honouring MODEL_ENGINE."""
+    if model_engine(root, bundled) == "numpy":
+        return NumpyModel.load(root)
+    if MODEL_ENGINE == "numpy":
+        raise FileNotFoundError(f"Missing NumPy export in {root.as_posix()} (run export_numpy_models)")
+    return _load_keras(root / MODEL_FILE)
+
+def load_artifacts_dir(root: Path, family: str) -> Tuple[Any, Any, int, Dict[str, Any]]:
     """
-    Returns: (model, scaler/occ_scaler, window:int, meta:dict)
+    Returns: (model, scaler/occ_scaler, window:int, meta:dict) for one artifact folder.
 
     - Works for all families; hybrid paths (cnn_lstm / cnn_lstm_attn) carry the
       'feature_order' and 'ohe' inside the returned meta (if present in preproc).
     - For simple CNN/LSTM, scaler is whatever was saved as 'occ_scaler' (or None).
+    - A current artifact.bundle (see ml/bundle.py) is preferred over the three files.
     """
-    if family not in FAMILIES:
-        raise ValueError(f"Unknown model family '{family}'. Expected one of {FAMILIES}.")
-
-    model_p, pre_p, meta_p = artifacts_triplet_paths(family, lib_key)
-    for p in (model_p, pre_p, meta_p):
+    bundled = MODEL_ENGINE != "keras" and bundle_matches(root)
+    if bundled:
+        # Compiled bundle: one mapped file, no unzip / unpickle / sklearn
+        bundle = ArtifactBundle(root / BUNDLE_FILE)
+        model = NumpyModel(bundle.graph, bundle.arrays, pack=False)
+        return _assemble(model, bundle.preproc(), bundle.meta, family)
+
+    model_p, pre_p, meta_p = root / MODEL_FILE, root / PREPROC_FILE, root / META_FILE
+    if not has_export(root):
+        _assert_exists(model_p)
+    for p in (pre_p, meta_p):
         _assert_exists(p)
 
     # Load on disk
-    model  = _load_keras(model_p)
+    model  = load_model_from_dir(root, bundled=bundled)
     pre    = _safe_load_pickle(pre_p)
     meta   = _safe_load_json(meta_p)
+    return _assemble(model, pre, meta, family)
 
+def _assemble(model, pre: Dict[str, Any], meta: Any, family: str) -> Tuple[Any, Any, int, Dict[str, Any]]:
     # Pull training-time spec
     spec   = (pre or {}).get("spec", {})
     window = int(spec.get("window", 24))
@@ -88,6 +135,12 @@ def load_artifacts(family: str, lib_key: str) -> Tuple[Any, Any, int, Dict[str,
     # Hybrid extras (if any)
     feature_order: Optional[List[str]] = (spec or {}).get("feature_order")
     ohe = (pre or {}).get("ohe")
+    scaling_metadata = (spec or {}).get("scaling_metadata", {})
+
+    # 168-slot (hour-of-week) calendar feature table, cached alongside the model
+    feature_plan = FeaturePlan(feature_order, ohe) if feature_order else None
+    # Traced fixed-signature forward pass for (1, window, n_features) float32 inputs
+    predict_fn = make_predictor(model, window, len(feature_order) if feature_order else None)
 
     # Enrich meta so the inference code can auto-switch to hybrid when available
     if isinstance(meta, dict):
@@ -95,6 +148,9 @@ def load_artifacts(family: str, lib_key: str) -> Tuple[Any, Any, int, Dict[str,
             **meta,
             "feature_order": feature_order,
             "ohe": ohe,
+            "scaling_metadata": scaling_metadata,
+            "feature_plan": feature_plan,
+            "predict_fn": predict_fn,
             "model_family": meta.get("model_family", family),
         }
     else:
@@ -103,10 +159,26 @@ def load_artifacts(family: str, lib_key: str) -> Tuple[Any, Any, int, Dict[str,
             "model_family": family,
             "feature_order": feature_order,
             "ohe": ohe,
+            "scaling_metadata": scaling_metadata,
+            "feature_plan": feature_plan,
+            "predict_fn": predict_fn,
         }
 
     return model, occ_scaler, window, meta
 
+# Every artifact folder on disk, indexed once and refreshed incrementally
+REGISTRY = ArtifactRegistry(ARTIFACTS_ROOT, FAMILIES)
+
+# Process-wide loaded artifacts: content-addressed, byte-bounded, reloads when files change
+ARTIFACTS = ArtifactCache(ARTIFACTS_ROOT, lambda root, family, _lib_key: load_artifacts_dir(root, family),
+                          resolve=REGISTRY.resolve)
+
+def load_artifacts(family: str, lib_key: str, version: Optional[str] = None) -> Tuple[Any, Any, int, Dict[str, Any]]:
+    """Cached (model, scaler, window, meta) for (family, library[, version])."""
+    if family not in FAMILIES:
+        raise ValueError(f"Unknown model family '{family}'. Expected one of {FAMILIES}.")
+    return ARTIFACTS.get(family, lib_key, version or "")
+
 def get_model_bundle(family: str, lib_key: str):
     """
     Back-compat for legacy callers:
@@ -139,37 +211,22 @@ def list_library_families(lib_key: str) -> List[Dict[str, Any]]:
       [
         {"family":"cnn", "versions":["v1.2"]},
         {"family":"lstm","versions":["v1.0"]},
-        {"family":"cnn_lstm","versions":["v1.1"]},
         ...
       ]
-    The “versions” here are read from each family's <meta.json> -> model_version.
-    (One version per family, matching your current layout.)
+    Flat folders report their <meta.json> -> model_version; versioned
+    subfolders report their folder names.
     """
-    out: List[Dict[str, Any]] = []
-    for fam in FAMILIES:
-        m_p, p_p, j_p = artifacts_triplet_paths(fam, lib_key)
-        if m_p.exists() and p_p.exists() and j_p.exists():
-            try:
-                meta = _safe_load_json(j_p)
-                ver = str(meta.get("model_version", "v1"))
-                out.append({"family": fam, "versions": [ver]})
-            except Exception:
-                # If meta is malformed, still expose family with unknown version
-                out.append({"family": fam, "versions": []})
-    return out
+    out: Dict[str, List[str]] = {}
+    for e in REGISTRY.entries(lib_key=lib_key):
+        if e.complete:
+            out.setdefault(e.family, []).append(e.version)
+    return [{"family": fam, "versions": out[fam]} for fam in FAMILIES if fam in out]
 
 def list_all_libraries() -> List[str]:
     """
     Enumerate library keys present under any family, e.g. ["american_corner", "gisbert_3rd_floor", ...]
     """
-    libs: set[str] = set()
-    for fam in FAMILIES:
-        fam_dir = ARTIFACTS_ROOT / fam
-        if fam_dir.exists() and fam_dir.is_dir():
-            for child in fam_dir.iterdir():
-                if child.is_dir():
-                    libs.add(child.name)
-    return sorted(libs)
+    return REGISTRY.libraries()
 
 def default_family() -> str:
     """Single place to read the default family (for UI or fallbacks)."""
@@ -0,0 +1,36 @@
+# backend/occupancy/ml/memory.py
+"""Per-process memory accounting from /proc (Linux), used to check weight sharing across workers."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List
+
+_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def smaps_rollup(pid: int | str = "self") -> Dict[str, int]:
+    """{field: KiB} from /proc/<pid>/smaps_rollup (Rss, Pss, Shared_*, Private_*)."""
+    out = {k: 0 for k in _FIELDS}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        key, _, rest = line.partition(":")
+        if key in out:
+            out[key] = int(rest.split()[0])
+    out["Shared"] = out["Shared_Clean"] + out["Shared_Dirty"]
+    out["Private"] = out["Private_Clean"] + out["Private_Dirty"]
+    return out
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of `pid` (e.g. the workers of a gunicorn master)."""
+    children = Path(f"/proc/{pid}/task/{pid}/children")
+    if children.exists():
+        return [int(p) for p in children.read_text().split()]
+    out = []
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            out.append(int(stat.parent.name))
+    return sorted(out)
@@ -0,0 +1,330 @@
+# backend/occupancy/ml/npengine.py
+"""
+NumPy-only forward pass for the exported occupancy models.
+
+`export_keras_model` turns a loaded Keras model into two files next to it:
+  graph.json   - layer list in topological order (class, config subset, inputs)
+  weights.npz  - every layer weight as "<layer>/<index>" float32 arrays
+`NumpyModel.load` reads them back and runs inference without TensorFlow.
+
+Only the layers used by the cnn / lstm / cnn_lstm / cnn_lstm_attn families
+are supported; anything else is rejected at export time.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import reduce
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .shared import pack_readonly
+
+GRAPH_FILE = "graph.json"
+WEIGHTS_FILE = "weights.npz"
+GRAPH_FORMAT = 1
+
+# Config keys kept per layer class (everything else is irrelevant for inference)
+_KEEP_CONFIG = {
+    "InputLayer": ("batch_shape", "batch_input_shape"),
+    "Dense": ("activation", "use_bias"),
+    "Conv1D": ("activation", "use_bias", "padding", "strides", "dilation_rate", "kernel_size", "data_format"),
+    "MaxPooling1D": ("pool_size", "strides", "padding", "data_format"),
+    "Flatten": ("data_format",),
+    "Reshape": ("target_shape",),
+    "LSTM": ("activation", "recurrent_activation", "use_bias", "return_sequences", "go_backwards"),
+    "Multiply": (),
+    "Add": (),
+    "Concatenate": ("axis",),
+    "Dropout": (),
+}
+
+
+# -------------------- activations --------------------
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+_ACTIVATIONS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "softmax": _softmax,
+}
+
+
+def _activation(name: Optional[str]) -> Callable[[np.ndarray], np.ndarray]:
+    name = name or "linear"
+    if name not in _ACTIVATIONS:
+        raise ValueError(f"Unsupported activation '{name}'.")
+    return _ACTIVATIONS[name]
+
+
+def _first(v):
+    return int(v[0] if isinstance(v, (list, tuple)) else v)
+
+
+def _same_pad(length: int, span: int, stride: int) -> tuple[int, int]:
+    out = -(-length // stride)
+    total = max((out - 1) * stride + span - length, 0)
+    return total // 2, total - total // 2
+
+
+# -------------------- layers --------------------
+def _dense(cfg, w, x):
+    y = x @ w[0]
+    if cfg.get("use_bias", True):
+        y = y + w[1]
+    return _activation(cfg.get("activation"))(y)
+
+
+def _conv_windows(cfg, x, k: int) -> np.ndarray:
+    """Padded, strided, dilated (b, t, c, k) input windows of a Conv1D with kernel size k."""
+    if cfg.get("data_format", "channels_last") != "channels_last":
+        raise ValueError("Conv1D: only channels_last is supported.")
+    stride = _first(cfg.get("strides", 1))
+    dilation = _first(cfg.get("dilation_rate", 1))
+    span = (k - 1) * dilation + 1
+    padding = cfg.get("padding", "valid")
+
+    if padding == "same":
+        left, right = _same_pad(x.shape[1], span, stride)
+        x = np.pad(x, ((0, 0), (left, right), (0, 0)))
+    elif padding == "causal":
+        x = np.pad(x, ((0, 0), (span - 1, 0), (0, 0)))
+
+    return np.lib.stride_tricks.sliding_window_view(x, span, axis=1)[:, ::stride, :, ::dilation]
+
+
+def _conv1d(cfg, w, x):
+    kernel = w[0]                                   # (k, c_in, c_out)
+    win = _conv_windows(cfg, x, kernel.shape[0])    # (b, t, c, k)
+    y = np.einsum("btck,kco->bto", win, kernel, optimize=True)
+    if cfg.get("use_bias", True):
+        y = y + w[1]
+    return _activation(cfg.get("activation"))(y)
+
+
+def _maxpool1d(cfg, w, x):
+    pool = _first(cfg.get("pool_size", 2))
+    stride = _first(cfg.get("strides") or pool)
+    if cfg.get("padding", "valid") == "same":
+        left, right = _same_pad(x.shape[1], pool, stride)
+        x = np.pad(x, ((0, 0), (left, right), (0, 0)), constant_values=-np.inf)
+    win = np.lib.stride_tricks.sliding_window_view(x, pool, axis=1)[:, ::stride]  # (b, t, c, pool)
+    return win.max(axis=-1)
+
+
+def _lstm(cfg, w, x):
+    kernel, recurrent = w[0], w[1]
+    bias = w[2] if cfg.get("use_bias", True) else 0.0
+    xw = x @ kernel + bias                          # input projection for all steps at once
+    return _lstm_scan(cfg, xw, recurrent.shape[0], lambda h: h @ recurrent)
+
+
+def _lstm_scan(cfg, xw, units: int, recur: Callable[[np.ndarray], np.ndarray]):
+    """Run the LSTM recurrence over projected inputs xw (b, t, 4 * units); recur(h) = h @ R."""
+    if cfg.get("go_backwards"):
+        raise ValueError("LSTM: go_backwards is not supported.")
+    act = _activation(cfg.get("activation", "tanh"))
+    rec_act = _activation(cfg.get("recurrent_activation", "sigmoid"))
+
+    b, t, _ = xw.shape
+    h = np.zeros((b, units), dtype=xw.dtype)
+    c = np.zeros((b, units), dtype=xw.dtype)
+    seq = np.empty((b, t, units), dtype=xw.dtype) if cfg.get("return_sequences") else None
+
+    for step in range(t):
+        z = xw[:, step] + recur(h)
+        i = rec_act(z[:, :units])
+        f = rec_act(z[:, units:2 * units])
+        g = act(z[:, 2 * units:3 * units])
+        o = rec_act(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * act(c)
+        if seq is not None:
+            seq[:, step] = h
+    return seq if seq is not None else h
+
+
+_LAYERS = {
+    "Dense": _dense,
+    "Conv1D": _conv1d,
+    "MaxPooling1D": _maxpool1d,
+    "LSTM": _lstm,
+    "Flatten": lambda cfg, w, x: x.reshape(x.shape[0], -1),
+    "Reshape": lambda cfg, w, x: x.reshape((x.shape[0],) + tuple(cfg["target_shape"])),
+    "Dropout": lambda cfg, w, x: x,
+}
+
+_MERGES = {
+    "Multiply": lambda cfg, xs: reduce(np.multiply, xs),
+    "Add": lambda cfg, xs: reduce(np.add, xs),
+    "Concatenate": lambda cfg, xs: np.concatenate(xs, axis=cfg.get("axis", -1)),
+}
+
+
+# -------------------- model --------------------
+class NumpyModel:
+    """
+    Drop-in stand-in for a Keras model at inference time: `model(X)` and
+    `model.predict(X, verbose=0)` both return a float32 NumPy array.
+    """
+
+    def __init__(self, graph: Dict[str, Any], weights: Dict[str, np.ndarray], pack: bool = True):
+        if int(graph.get("format", 0)) != GRAPH_FORMAT:
+            raise ValueError(f"Unsupported graph format {graph.get('format')!r}.")
+        self.graph = graph
+        self.layers: List[Dict[str, Any]] = graph["layers"]
+        self.inputs: List[str] = graph["inputs"]
+        self.outputs: List[str] = graph["outputs"]
+        self.input_shape = tuple(graph["input_shape"])
+        by_layer = {
+            layer["name"]: [np.asarray(weights[key], dtype=np.float32) for key in layer.get("weights", [])]
+            for layer in self.layers
+        }
+        # One read-only, page-aligned shared region per model (shared across forked workers);
+        # pack=False keeps the given arrays as they are (e.g. views into a mapped bundle)
+        self._weights = pack_readonly(by_layer) if pack else by_layer
+
+    @classmethod
+    def load(cls, root: Path) -> "NumpyModel":
+        root = Path(root)
+        graph = json.loads((root / GRAPH_FILE).read_text(encoding="utf-8"))
+        with np.load(root / WEIGHTS_FILE, allow_pickle=False) as npz:
+            weights = {k: npz[k] for k in npz.files}
+        return cls(graph, weights)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(w.nbytes for ws in self._weights.values() for w in ws)
+
+    def __call__(self, X: np.ndarray, training: bool = False) -> np.ndarray:
+        x = np.asarray(X, dtype=np.float32)
+        values: Dict[str, np.ndarray] = {self.inputs[0]: x}
+        for layer in self.layers:
+            name, cls = layer["name"], layer["class_name"]
+            if cls == "InputLayer":
+                continue
+            cfg = layer.get("config", {})
+            args = [values[src] for src in layer["inbound"]]
+            if cls in _MERGES:
+                values[name] = _MERGES[cls](cfg, args)
+            else:
+                values[name] = _LAYERS[cls](cfg, self._weights[name], args[0])
+        return values[self.outputs[0]]
+
+    def predict(self, X: np.ndarray, verbose: int = 0, batch_size: Optional[int] = None) -> np.ndarray:
+        return self(X)
+
+
+def has_export(root: Path) -> bool:
+    root = Path(root)
+    return (root / GRAPH_FILE).exists() and (root / WEIGHTS_FILE).exists()
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def export_matches(root: Path, model_p: Path) -> bool:
+    """True when the export in `root` was produced from the current `model_p` bytes."""
+    try:
+        graph = json.loads((Path(root) / GRAPH_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    source = graph.get("source") or {}
+    return bool(source.get("sha256")) and source["sha256"] == file_sha256(model_p)
+
+
+# -------------------- export --------------------
+def _history_names(args) -> List[str]:
+    """Collect source layer names from a serialized Keras 3 inbound node."""
+    out: List[str] = []
+    if isinstance(args, dict):
+        if args.get("class_name") == "__keras_tensor__":
+            out.append(args["config"]["keras_history"][0])
+        else:
+            for v in args.values():
+                out.extend(_history_names(v))
+    elif isinstance(args, (list, tuple)):
+        for v in args:
+            out.extend(_history_names(v))
+    return out
+
+
+def export_keras_model(model, out_dir: Path, source: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Write graph.json + weights.npz for `model` into `out_dir`; returns the graph.
+    `source` (the model.keras it was loaded from) is fingerprinted so loaders
+    can tell when the export has gone stale.
+    """
+    config = model.get_config()
+    input_shape = model.input_shape[0] if isinstance(model.input_shape, list) else model.input_shape
+    by_name = {layer.name: layer for layer in model.layers}
+
+    layers_cfg: Sequence[Dict[str, Any]] = config.get("layers", [])
+    functional = any(l.get("inbound_nodes") for l in layers_cfg)
+
+    graph_layers: List[Dict[str, Any]] = []
+    weights: Dict[str, np.ndarray] = {}
+
+    if functional:
+        def _names(refs):
+            refs = [refs] if refs and isinstance(refs[0], str) else refs
+            return [ref[0] for ref in refs]
+
+        inputs, outputs = _names(config["input_layers"]), _names(config["output_layers"])
+        order = [(l["config"]["name"], l["class_name"], _history_names(l.get("inbound_nodes", [])))
+                 for l in layers_cfg]
+    else:
+        # Sequential: a plain chain in model.layers order
+        inputs, prev, order = ["input"], "input", []
+        for layer in model.layers:
+            order.append((layer.name, layer.__class__.__name__, [prev]))
+            prev = layer.name
+        outputs = [prev]
+
+    for name, cls, inbound in order:
+        if cls not in _KEEP_CONFIG:
+            raise ValueError(f"Layer '{name}' ({cls}) is not supported by the NumPy engine.")
+        layer_cfg = by_name[name].get_config() if name in by_name else {}
+        keep = {k: layer_cfg[k] for k in _KEEP_CONFIG[cls] if k in layer_cfg}
+        if cls == "LSTM" and keep.get("go_backwards"):
+            raise ValueError(f"Layer '{name}': go_backwards LSTMs are not supported.")
+        keys = []
+        if name in by_name:
+            for i, arr in enumerate(by_name[name].get_weights()):
+                key = f"{name}/{i}"
+                weights[key] = np.asarray(arr, dtype=np.float32)
+                keys.append(key)
+        graph_layers.append({"name": name, "class_name": cls, "config": keep,
+                             "inbound": inbound, "weights": keys})
+
+    graph = {
+        "format": GRAPH_FORMAT,
+        "input_shape": list(input_shape),
+        "inputs": inputs,
+        "outputs": outputs,
+        "layers": graph_layers,
+    }
+    if source is not None:
+        graph["source"] = {"file": Path(source).name, "sha256": file_sha256(source)}
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    (out_dir / GRAPH_FILE).write_text(json.dumps(graph, indent=2), encoding="utf-8")
+    np.savez(out_dir / WEIGHTS_FILE, **weights)
+    return graph
@@ -0,0 +1,75 @@
+# backend/occupancy/ml/predictor.py
+from __future__ import annotations
+
+import sys
+from typing import Callable, Optional
+
+import numpy as np
+
+from .npengine import NumpyModel
+
+PredictFn = Callable[[np.ndarray], np.ndarray]
+
+
+def _input_signature(model, window: int, n_features: Optional[int]):
+    shape = getattr(model, "input_shape", None)
+    if isinstance(shape, list):
+        shape = shape[0]
+    if n_features is None and shape is not None:
+        n_features = shape[-1]
+    return int(window), int(n_features) if n_features is not None else None
+
+
+def make_predictor(model, window: int, n_features: Optional[int] = None) -> PredictFn:
+    """
+    Build a low-overhead single-sample inference call for `model`.
+
+    `model.predict` sets up a data adapter, callbacks and a progress loop on
+    every call, which dominates the cost for a batch of one. The returned
+    fn(X) takes a (1, window, n_features) float32 array and returns the raw
+    (1, n_outputs) output as a NumPy array. With the TensorFlow backend the
+    forward pass is traced once into a tf.function with a fixed input
+    signature; otherwise it falls back to a direct `model(x)` call.
+    A NumpyModel is already a plain function of X and is returned as is.
+    Inputs that do not match the signature go through `model.predict`.
+    """
+    if isinstance(model, NumpyModel):
+        # Plain NumPy forward pass: no per-call framework overhead to skip
+        return model
+
+    window, n_features = _input_signature(model, window, n_features)
+    expected = (1, window, n_features)
+
+    def _slow(X: np.ndarray) -> np.ndarray:
+        return np.asarray(model.predict(X, verbose=0))
+
+    fast: Optional[PredictFn] = None
+    # Keras is only ever imported by loader._load_keras, so a Keras model implies it is
+    # already loaded; never trigger the TensorFlow import from here.
+    keras = sys.modules.get("keras")
+
+    if keras is not None and n_features is not None:
+        if keras.backend.backend() == "tensorflow":
+            import tensorflow as tf
+
+            traced = tf.function(
+                lambda x: model(x, training=False),
+                input_signature=[tf.TensorSpec(shape=expected, dtype=tf.float32)],
+            )
+
+            def fast(X: np.ndarray) -> np.ndarray:
+                return traced(tf.constant(X, dtype=tf.float32)).numpy()
+        else:
+            def fast(X: np.ndarray) -> np.ndarray:
+                return keras.ops.convert_to_numpy(model(X, training=False))
+
+    if fast is None:
+        return _slow
+
+    def predict(X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.shape != expected:
+            return _slow(X)
+        return fast(X)
+
+    return predict
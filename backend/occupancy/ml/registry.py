@@ -0,0 +1,177 @@
+# backend/occupancy/ml/registry.py
+"""
+In-memory manifest of everything under artifacts/.
+
+Two layouts are recognised per (family, library):
+  flat       artifacts/<family>/<lib_key>/{model.keras,preproc.pkl,meta.json}
+             (version = meta.json "model_version", or "v1")
+  versioned  artifacts/<family>/<lib_key>/<version>/{...}
+
+Refreshes are incremental: a directory is only re-listed when its mtime
+changes, and a library is only re-read when the mtimes of its folder, its
+meta.json or its version folders change. Lookups between refreshes are
+plain dict reads; a refresh runs at most every `ttl` seconds.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .bundle import read_header
+
+ARTIFACT_REGISTRY_TTL = float(os.getenv("ARTIFACT_REGISTRY_TTL", "2"))
+
+_MODEL_FILES = ("model.keras", "graph.json")
+_BUNDLE_FILE = "artifact.bundle"
+
+
+@dataclass(frozen=True)
+class ArtifactEntry:
+    family: str
+    lib_key: str
+    version: str
+    path: Path
+    layout: str                   # "flat" | "versioned"
+    meta_version: Optional[str]   # meta.json "model_version", if readable
+    complete: bool                # artifact.bundle, or model (or NumPy export) + preproc.pkl + meta.json
+
+
+def _mtime(p: Path) -> Optional[int]:
+    try:
+        return p.stat().st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def _read_meta_version(d: Path) -> Optional[str]:
+    try:
+        if (d / "meta.json").exists():
+            meta = json.loads((d / "meta.json").read_text(encoding="utf-8"))
+        else:
+            meta = read_header(d / _BUNDLE_FILE)["meta"]
+        v = meta.get("model_version")
+        return str(v) if v is not None else None
+    except Exception:
+        return None
+
+
+def _is_artifact_dir(d: Path) -> bool:
+    return any((d / f).exists() for f in ("meta.json", _BUNDLE_FILE) + _MODEL_FILES)
+
+
+def _entry(family: str, lib_key: str, version: str, path: Path, layout: str) -> ArtifactEntry:
+    has_model = any((path / f).exists() for f in _MODEL_FILES)
+    triplet = has_model and (path / "preproc.pkl").exists() and (path / "meta.json").exists()
+    return ArtifactEntry(
+        family=family, lib_key=lib_key, version=version, path=path, layout=layout,
+        meta_version=_read_meta_version(path),
+        complete=triplet or (path / _BUNDLE_FILE).exists(),
+    )
+
+
+class ArtifactRegistry:
+    def __init__(self, root: Path, families: Sequence[str], ttl: float = ARTIFACT_REGISTRY_TTL):
+        self.root = Path(root)
+        self.families = tuple(families)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._listings: Dict[Path, Tuple[int, List[str]]] = {}          # dir -> (mtime, child dirs)
+        self._libs: Dict[Tuple[str, str], Tuple[Tuple, List[ArtifactEntry]]] = {}
+        self._checked = float("-inf")
+        self.scans = 0  # libraries re-read from disk (not served from the manifest)
+
+    # ---------------- refresh ----------------
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked < self.ttl:
+            return
+        with self._lock:
+            if not force and now - self._checked < self.ttl:
+                return
+            seen = set()
+            for family in self.families:
+                for lib_key in self._subdirs(self.root / family):
+                    key = (family, lib_key)
+                    seen.add(key)
+                    self._refresh_lib(key)
+            for key in set(self._libs) - seen:
+                del self._libs[key]
+            self._checked = time.monotonic()
+
+    def _subdirs(self, d: Path) -> List[str]:
+        m = _mtime(d)
+        if m is None:
+            self._listings.pop(d, None)
+            return []
+        cached = self._listings.get(d)
+        if cached is None or cached[0] != m:
+            names = sorted(c.name for c in d.iterdir() if c.is_dir())
+            self._listings[d] = cached = (m, names)
+        return cached[1]
+
+    def _refresh_lib(self, key: Tuple[str, str]) -> None:
+        family, lib_key = key
+        lib_dir = self.root / family / lib_key
+        subdirs = self._subdirs(lib_dir)
+        sig = (_mtime(lib_dir), _mtime(lib_dir / "meta.json"), _mtime(lib_dir / _BUNDLE_FILE),
+               tuple((name, _mtime(lib_dir / name), _mtime(lib_dir / name / "meta.json")) for name in subdirs))
+        cached = self._libs.get(key)
+        if cached is not None and cached[0] == sig:
+            return
+
+        self.scans += 1
+        entries: List[ArtifactEntry] = []
+        if _is_artifact_dir(lib_dir):
+            flat = _entry(family, lib_key, "v1", lib_dir, "flat")
+            entries.append(replace(flat, version=flat.meta_version or "v1"))
+        for name in subdirs:
+            if _is_artifact_dir(lib_dir / name):
+                entries.append(_entry(family, lib_key, name, lib_dir / name, "versioned"))
+        self._libs[key] = (sig, entries)
+
+    # ---------------- queries ----------------
+    def entries(self, family: Optional[str] = None, lib_key: Optional[str] = None) -> List[ArtifactEntry]:
+        self.refresh()
+        if family is not None and lib_key is not None:
+            cached = self._libs.get((family, lib_key))
+            return list(cached[1]) if cached else []
+        out = []
+        for (fam, lib), (_sig, items) in sorted(self._libs.items()):
+            if (family is None or fam == family) and (lib_key is None or lib == lib_key):
+                out.extend(items)
+        return out
+
+    def libraries(self) -> List[str]:
+        """Every library folder found under any family."""
+        self.refresh()
+        return sorted({lib for _fam, lib in self._libs})
+
+    def meta_version(self, family: str, lib_key: str) -> Optional[str]:
+        """model_version from the flat layout's meta.json (None when absent/unreadable)."""
+        for e in self.entries(family, lib_key):
+            if e.layout == "flat":
+                return e.meta_version
+        return None
+
+    def resolve(self, family: str, lib_key: str, version: Optional[str] = None) -> Path:
+        """
+        Directory serving (family, lib_key, version): the matching version
+        folder if there is one, else the flat layout (the folder path is
+        returned even when missing, so loading reports which file is absent).
+        """
+        flat = None
+        for e in self.entries(family, lib_key):
+            if e.layout == "versioned" and version and e.version == str(version):
+                return e.path
+            if e.layout == "flat":
+                flat = e.path
+        return flat or self.root / family / lib_key
+
+    def manifest(self) -> List[Dict[str, Any]]:
+        """JSON-ready rows; paths relative to the artifacts root."""
+        return [{**asdict(e), "path": e.path.relative_to(self.root).as_posix()} for e in self.entries()]
@@ -0,0 +1,173 @@
+# backend/occupancy/ml/remote.py
+"""
+Client side of the local inference server (manage.py inference_server).
+
+With INFERENCE_SOCKET set, a web worker does not load models: it asks the
+server, over that Unix socket, for each model's scaler, window and meta
+and gets a `RemoteModel` handle in place of the model. infer.walk_forward
+and walk_forward_many send rollouts for RemoteModels to the server, which
+gathers concurrent requests from every worker into batched forward passes
+(see occupancy/inference_server.py). RemoteModel.predict does the same for
+single forward passes.
+
+Frames are a 4-byte big-endian length and a pickle. Pickle is only safe
+between processes that trust each other: the server creates the socket
+readable and writable by its own user only.
+
+Connections are per thread (a request and its reply are not interleaved
+with another thread's). A failed call raises OSError and drops the
+connection; infer falls back to in-process inference on OSError.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import socket
+import struct
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .registry import ARTIFACT_REGISTRY_TTL
+
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", "")
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+
+_HEADER = struct.Struct("!I")
+
+Key = Tuple[str, str, str]
+
+
+# -------------------- framing --------------------
+def send_frame(sock: socket.socket, obj: Any) -> None:
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("inference server closed the connection")
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> Any:
+    (n,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return pickle.loads(_recv_exact(sock, n))
+
+
+# -------------------- client --------------------
+class InferenceClient:
+    def __init__(self, path: str, timeout: float = INFERENCE_TIMEOUT):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _conn(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            sock.close()
+
+    def call(self, op: str, **payload) -> Any:
+        """Send one request and wait for its reply; errors raised by the server are re-raised here."""
+        sock = self._conn()
+        try:
+            send_frame(sock, (op, payload))
+            ok, value = recv_frame(sock)
+        except OSError:
+            self.close()
+            raise
+        if not ok:
+            raise value
+        return value
+
+    # ---- operations ----
+    def describe(self, key: Key) -> Tuple[Any, int, Dict[str, Any]]:
+        return self.call("describe", key=key)
+
+    def predict(self, key: Key, X: np.ndarray) -> np.ndarray:
+        return self.call("predict", key=key, X=np.asarray(X, dtype=np.float32))
+
+    def rollouts(self, jobs: List[Dict[str, Any]], steps: int) -> List[np.ndarray]:
+        return self.call("rollout", jobs=jobs, steps=int(steps))
+
+    def stats(self) -> Dict[str, Any]:
+        return self.call("stats")
+
+
+class RemoteModel:
+    """Handle for a model held by the inference server, in place of the model object."""
+
+    def __init__(self, client: InferenceClient, key: Key):
+        self.client = client
+        self.key = key
+
+    def predict(self, X, verbose=0) -> np.ndarray:
+        return self.client.predict(self.key, X)
+
+    __call__ = predict
+
+    def __repr__(self) -> str:
+        return f"RemoteModel{self.key}"
+
+
+def rollout_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    What the server needs of a walk_forward job for a RemoteModel: the model
+    key and the last `window` values and timestamps (all a rollout reads).
+    """
+    window = int(job["window"])
+    index = job.get("base_index")
+    return {
+        "key": job["model"].key,
+        "lib_key": job.get("lib_key", "unknown"),
+        "window": window,
+        "base_series": np.asarray(job["base_series"], dtype=float)[-window:],
+        "base_index": None if index is None else np.asarray(index.asi8[-window:]),
+    }
+
+
+# -------------------- artifacts --------------------
+CLIENT: Optional[InferenceClient] = InferenceClient(INFERENCE_SOCKET) if INFERENCE_SOCKET else None
+
+_DESCRIBED: Dict[Key, Tuple[float, tuple]] = {}
+_DESCRIBED_LOCK = threading.Lock()
+
+
+def remote_artifacts(family: str, lib_key: str, version: str) -> tuple:
+    """
+    (RemoteModel, scaler, window, meta) from the server, re-described at most
+    every ARTIFACT_REGISTRY_TTL seconds so retrained models show up as they
+    do in-process. meta["predict_fn"] forwards to the server.
+    """
+    key = (family, lib_key, str(version))
+    now = time.monotonic()
+    with _DESCRIBED_LOCK:
+        hit = _DESCRIBED.get(key)
+    if hit is not None and now - hit[0] < ARTIFACT_REGISTRY_TTL:
+        return hit[1]
+    scaler, window, meta = CLIENT.describe(key)
+    model = hit[1][0] if hit is not None else RemoteModel(CLIENT, key)
+    artifacts = (model, scaler, window, {**meta, "predict_fn": model.predict})
+    with _DESCRIBED_LOCK:
+        _DESCRIBED[key] = (now, artifacts)
+    return artifacts
@@ -0,0 +1,131 @@
+# backend/occupancy/ml/rollouts.py
+"""
+Checkpoints of recursive rollouts, so a forecast that starts where an
+earlier one started resumes instead of recursing again.
+
+A rollout is fully determined by its model, library, window and seed (the
+last `window` history values, plus their timestamps for hybrid models),
+and for hybrid models by the current hour as well (their post-processing
+reads the wall clock). `rollout_key` hashes exactly that. An entry keeps
+every prediction made so far plus the model input state after the last
+one (hourly checkpoints: each step's prediction is kept, and the end state
+allows continuing):
+
+  - a request for <= the stored steps is a slice of the predictions
+  - a longer request resumes from the end state and extends the entry
+
+New data changes the seed, a reloaded artifact is a new model object and
+the hour is in the key, so entries never need invalidating; the cache is
+an LRU bounded by ROLLOUT_CACHE_BYTES (0 disables it).
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ROLLOUT_CACHE_BYTES = int(os.getenv("ROLLOUT_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+
+def rollout_key(model, lib_key: str, window: int, seed_vals: np.ndarray,
+                seed_ts: Optional[pd.DatetimeIndex] = None) -> Tuple:
+    """Key of the rollout seeded by the last `window` values (and timestamps, for hybrid models)."""
+    window = int(window)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.ascontiguousarray(np.asarray(seed_vals, dtype=float)[-window:]).tobytes())
+    hour = None
+    if seed_ts is not None:
+        h.update(pd.DatetimeIndex(pd.to_datetime(seed_ts, utc=True)).asi8[-window:].tobytes())
+        hour = int(time.time()) // 3600
+    return (id(model), lib_key, window, h.hexdigest(), hour)
+
+
+class Checkpoint:
+    """Predictions for steps 1..n of a rollout and the model input state after step n."""
+    __slots__ = ("preds", "state")
+
+    def __init__(self, preds: np.ndarray, state: np.ndarray):
+        self.preds = preds
+        self.state = state
+
+    @property
+    def nbytes(self) -> int:
+        return self.preds.nbytes + self.state.nbytes
+
+
+class RolloutCache:
+    def __init__(self, max_bytes: int = ROLLOUT_CACHE_BYTES):
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        # key -> (model, checkpoint); holding the model keeps id(model) in the key unique
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Checkpoint]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = self.resumes = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable, steps: int) -> Optional[Checkpoint]:
+        """The checkpoint for `key` (counted as a hit when it covers `steps`, else as a resume)."""
+        if self.max_bytes <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if len(entry[1].preds) >= steps:
+                self.hits += 1
+            else:
+                self.resumes += 1
+            return entry[1]
+
+    def put(self, key: Hashable, model, preds: np.ndarray, state: np.ndarray) -> None:
+        """Store predictions + end state (copied), unless a longer rollout is already stored."""
+        if self.max_bytes <= 0:
+            return
+        ckpt = Checkpoint(np.array(preds, dtype=float), np.array(state))
+        ckpt.preds.setflags(write=False)
+        ckpt.state.setflags(write=False)
+        if ckpt.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.get(key)
+            if old is not None:
+                if len(old[1].preds) >= len(ckpt.preds):
+                    return
+                self._bytes -= old[1].nbytes
+            self._entries[key] = (model, ckpt)
+            self._entries.move_to_end(key)
+            self._bytes += ckpt.nbytes
+            while self._bytes > self.max_bytes:
+                _key, (_model, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped.nbytes
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.resumes + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes_resident": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "resumes": self.resumes,
+                "misses": self.misses,
+                "hit_ratio": (self.hits / lookups) if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+# Process-wide checkpoints used by infer.walk_forward
+ROLLOUTS = RolloutCache()
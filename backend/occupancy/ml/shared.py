@@ -0,0 +1,42 @@
+# backend/occupancy/ml/shared.py
+"""
+Fork-friendly weight storage.
+
+Model weights are packed into one anonymous shared mapping per model
+(page-aligned, 64-byte aligned per array) and exposed as read-only NumPy
+views. When the gunicorn master loads models before forking, every worker
+maps the same physical pages: nothing writes to them, and Python refcount
+traffic only touches the small ndarray headers, never the weight data.
+"""
+from __future__ import annotations
+
+import mmap
+from typing import Dict, List
+
+import numpy as np
+
+_ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def pack_readonly(arrays: Dict[str, List[np.ndarray]]) -> Dict[str, List[np.ndarray]]:
+    """Copy every array into a single shared, page-aligned region; return read-only views."""
+    total = sum(_aligned(a.nbytes) for arrs in arrays.values() for a in arrs)
+    region = mmap.mmap(-1, max(total, mmap.PAGESIZE))  # MAP_SHARED | MAP_ANONYMOUS, page-aligned
+
+    out: Dict[str, List[np.ndarray]] = {}
+    offset = 0
+    for name, arrs in arrays.items():
+        views = []
+        for a in arrs:
+            a = np.ascontiguousarray(a)
+            view = np.frombuffer(region, dtype=a.dtype, count=a.size, offset=offset).reshape(a.shape)
+            view[...] = a
+            view.flags.writeable = False
+            views.append(view)
+            offset += _aligned(a.nbytes)
+        out[name] = views
+    return out
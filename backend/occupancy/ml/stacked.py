@@ -0,0 +1,177 @@
+# backend/occupancy/ml/stacked.py
+"""
+One forward pass for many same-shaped NumPy models.
+
+Libraries train separate models of the same architecture, so at inference
+time their graphs differ only in weights (and layer names). `StackedModel`
+stacks every layer's weights along a leading model axis and evaluates
+X of shape (M, B, window, features) as B samples for each of the M models:
+the result equals `np.stack([models[m](X[m]) for m in range(M)])`, computed
+with batched matmuls instead of M separate passes.
+
+`topology_key` tells which models can share a stack; `stack_models` keeps
+recently used stacks (bounded by STACK_CACHE_BYTES) so a steady request mix
+does not re-stack weights.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .npengine import _LAYERS, _MERGES, NumpyModel, _activation, _conv_windows, _lstm_scan
+
+# Bytes of stacked weights kept per process (each stack is a copy of its models' weights)
+STACK_CACHE_BYTES = int(os.getenv("STACK_CACHE_BYTES", str(128 * 1024 * 1024)))
+
+
+def topology_key(model) -> Optional[Tuple]:
+    """
+    Hashable description of a NumpyModel's graph (input shape, layer classes
+    and configs, wiring by position and weight shapes); equal keys stack.
+    None for anything that is not a NumpyModel.
+    """
+    if not isinstance(model, NumpyModel):
+        return None
+    pos = {layer["name"]: i for i, layer in enumerate(model.layers)}
+    layers = tuple(
+        (layer["class_name"],
+         json.dumps(layer.get("config", {}), sort_keys=True),
+         tuple(pos.get(src, -1) for src in layer.get("inbound", [])),
+         tuple(w.shape for w in model._weights.get(layer["name"], [])))
+        for layer in model.layers
+    )
+    return (tuple(model.input_shape[1:]), layers,
+            tuple(pos.get(n, -1) for n in model.inputs), tuple(pos.get(n, -1) for n in model.outputs))
+
+
+# -------------------- stacked layers: x is (M, B, ...), weights (M, ...) --------------------
+def _per_model(w: np.ndarray, ndim: int) -> np.ndarray:
+    """Weight (M, *rest) reshaped to broadcast against an ndim-d (M, B, ..., *rest) operand."""
+    return w.reshape((w.shape[0],) + (1,) * (ndim - w.ndim) + w.shape[1:])
+
+
+def _dense(cfg, w, x):
+    y = np.matmul(x, _per_model(w[0], x.ndim))      # (M, B, ..., in) @ (M, 1.., in, out)
+    if cfg.get("use_bias", True):
+        y = y + _per_model(w[1], y.ndim)
+    return _activation(cfg.get("activation"))(y)
+
+
+def _conv1d(cfg, w, x):
+    kernel = w[0]                                   # (M, k, c_in, c_out)
+    m, b = x.shape[:2]
+    win = _conv_windows(cfg, x.reshape((m * b,) + x.shape[2:]), kernel.shape[1])
+    win = win.reshape((m, b) + win.shape[1:])       # (M, B, t, c, k)
+    y = np.einsum("mbtck,mkco->mbto", win, kernel, optimize=True)
+    if cfg.get("use_bias", True):
+        y = y + _per_model(w[1], y.ndim)
+    return _activation(cfg.get("activation"))(y)
+
+
+def _lstm(cfg, w, x):
+    kernel, recurrent = w[0], w[1]                  # (M, in, 4u), (M, u, 4u)
+    m, b = x.shape[:2]
+    xw = np.matmul(x, kernel[:, None])              # (M, B, t, 4u)
+    if cfg.get("use_bias", True):
+        xw = xw + _per_model(w[2], xw.ndim)
+    units = recurrent.shape[1]
+    out = _lstm_scan(cfg, xw.reshape((m * b,) + xw.shape[2:]), units,
+                     lambda h: np.matmul(h.reshape(m, b, units), recurrent).reshape(m * b, -1))
+    return out.reshape((m, b) + out.shape[1:])
+
+
+def _flat(fn: Callable) -> Callable:
+    """Weightless layer: fold (M, B) into one batch axis, apply, unfold."""
+    def apply(cfg, w, x):
+        y = fn(cfg, w, x.reshape((-1,) + x.shape[2:]))
+        return y.reshape(x.shape[:2] + y.shape[1:])
+    return apply
+
+
+def _concatenate(cfg, xs):
+    axis = cfg.get("axis", -1)
+    return np.concatenate(xs, axis=axis + 1 if axis >= 0 else axis)  # one more leading axis
+
+
+_STACKED_LAYERS: Dict[str, Callable] = {
+    **{cls: _flat(fn) for cls, fn in _LAYERS.items()},
+    "Dense": _dense, "Conv1D": _conv1d, "LSTM": _lstm,
+}
+_STACKED_MERGES: Dict[str, Callable] = {**_MERGES, "Concatenate": _concatenate}
+
+
+class StackedModel:
+    """M NumpyModels with one topology, evaluated together on (M, B, window, features) inputs."""
+
+    def __init__(self, models: Sequence[NumpyModel]):
+        if not models:
+            raise ValueError("StackedModel needs at least one model.")
+        key = topology_key(models[0])
+        if key is None or any(topology_key(m) != key for m in models[1:]):
+            raise ValueError("StackedModel: models do not share one topology.")
+        first = models[0]
+        self.size = len(models)
+        self.layers = first.layers
+        self.inputs, self.outputs = first.inputs, first.outputs
+        self.input_shape = first.input_shape
+        # Weights by position, so differently named but identical graphs line up
+        self._weights: List[List[np.ndarray]] = [
+            [np.stack([m._weights[m.layers[i]["name"]][j] for m in models])
+             for j in range(len(first._weights.get(layer["name"], [])))]
+            for i, layer in enumerate(first.layers)
+        ]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(w.nbytes for ws in self._weights for w in ws)
+
+    def __call__(self, X: np.ndarray) -> np.ndarray:
+        x = np.asarray(X, dtype=np.float32)
+        if x.ndim != len(self.input_shape) + 1 or x.shape[0] != self.size:
+            raise ValueError(f"StackedModel: expected ({self.size}, B, ...) input, got {x.shape}.")
+        values: Dict[str, np.ndarray] = {self.inputs[0]: x}
+        for i, layer in enumerate(self.layers):
+            name, cls = layer["name"], layer["class_name"]
+            if cls == "InputLayer":
+                continue
+            cfg = layer.get("config", {})
+            args = [values[src] for src in layer["inbound"]]
+            if cls in _STACKED_MERGES:
+                values[name] = _STACKED_MERGES[cls](cfg, args)
+            else:
+                values[name] = _STACKED_LAYERS[cls](cfg, self._weights[i], args[0])
+        return values[self.outputs[0]]
+
+
+_STACKS: "OrderedDict[Tuple[int, ...], Tuple[Tuple[NumpyModel, ...], StackedModel]]" = OrderedDict()
+_STACKS_LOCK = threading.Lock()
+
+
+def stack_models(models: Sequence[NumpyModel]) -> StackedModel:
+    """StackedModel for `models` (in this order), reused while the same model objects are passed."""
+    key = tuple(id(m) for m in models)
+    with _STACKS_LOCK:
+        hit = _STACKS.get(key)
+        if hit is not None:
+            _STACKS.move_to_end(key)
+            return hit[1]
+    stacked = StackedModel(models)
+    if stacked.nbytes > STACK_CACHE_BYTES:
+        return stacked
+    with _STACKS_LOCK:
+        # The entry holds the models, so their ids cannot be reused while it lives
+        _STACKS[key] = (tuple(models), stacked)
+        _STACKS.move_to_end(key)
+        while sum(s.nbytes for _, s in _STACKS.values()) > STACK_CACHE_BYTES:
+            _STACKS.popitem(last=False)
+    return stacked
+
+
+def clear_stacks() -> None:
+    with _STACKS_LOCK:
+        _STACKS.clear()
@@ -17,6 +17,25 @@ class Signal(models.Model):
             )
         ]
 
+class SignalHourly(models.Model):
+    """
+    Hourly rollup of Signal, maintained at ingest (see occupancy/rollup.py).
+    One row per (library, UTC hour) from a library's first to last signal;
+    hours without signals are stored with samples=0 and zero counts.
+    """
+    library         = models.ForeignKey(Library, on_delete=models.CASCADE, related_name="hourly")
+    hour            = models.DateTimeField()                   # UTC, hour-aligned
+    raw_max         = models.IntegerField(default=0)           # max wifi_clients in the hour
+    corrected       = models.IntegerField(default=0)           # raw_max x library correction factor, rounded
+    samples         = models.IntegerField(default=0)           # Signal rows in the hour (0 = gap fill)
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["library", "hour"],
+                name="uniq_signal_hourly_per_library_hour"
+            )
+        ]
+
 class Forecast(models.Model):
     library         = models.ForeignKey(Library, on_delete=models.CASCADE)
     ts              = models.DateTimeField(db_index=True)
@@ -24,6 +43,7 @@ class Forecast(models.Model):
     occupancy_pred  = models.FloatField()
     model_version   = models.CharField(max_length=64)
     model_family    = models.CharField(max_length=32, default="cnn_lstm_attn")
+    data_ts         = models.DateTimeField(null=True, blank=True)  # latest observed hour when computed
     created_at      = models.DateTimeField(auto_now_add=True)
     class Meta:
         constraints = [
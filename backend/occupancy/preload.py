@@ -0,0 +1,71 @@
+# occupancy/preload.py
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .infer import load_artifacts_cached
+from .ml.loader import REGISTRY, model_engine
+from .models import Library
+from .utils.active import get_active_family_version
+
+
+def active_model_keys() -> List[Tuple[str, str, str]]:
+    """(family, lib_key, version) of every library's active model (ActiveModel → fallbacks)."""
+    keys = []
+    for lib in Library.objects.order_by("key"):
+        family, version = get_active_family_version(lib)
+        keys.append((family, lib.key, version))
+    return keys
+
+
+def warm_up(model, window: int, meta: Dict[str, Any]) -> None:
+    """One dummy forward pass so tracing / first-call setup happens before real traffic."""
+    n_features = len(meta.get("feature_order") or ["occupancy_scaled"])
+    X = np.zeros((1, int(window), n_features), dtype=np.float32)
+    predict_fn = meta.get("predict_fn")
+    if predict_fn is not None:
+        predict_fn(X)
+    else:
+        model.predict(X, verbose=0)
+
+
+def _load_one(key: Tuple[str, str, str], warm: bool) -> Dict[str, Any]:
+    family, lib_key, version = key
+    row: Dict[str, Any] = {"library": lib_key, "family": family, "version": version,
+                           "load_ms": None, "warm_ms": None, "ok": False, "error": None}
+    try:
+        t0 = time.perf_counter()
+        model, _scaler, window, meta = load_artifacts_cached(family, lib_key, version)
+        row["load_ms"] = (time.perf_counter() - t0) * 1e3
+        if warm:
+            t0 = time.perf_counter()
+            warm_up(model, window, meta)
+            row["warm_ms"] = (time.perf_counter() - t0) * 1e3
+        row["ok"] = True
+    except Exception as e:  # report, don't abort the other libraries
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+def preload_active_models(max_workers: Optional[int] = None, warm: bool = True,
+                          numpy_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Load (and optionally warm up) every library's active model into the
+    artifact cache, in parallel across libraries. Returns one report row per
+    model with load/warm-up times in milliseconds.
+
+    numpy_only=True skips models that would load through Keras: used by the
+    gunicorn master before forking, where TF threads/state must not exist.
+    """
+    keys = active_model_keys()  # DB access stays on the calling thread
+    if numpy_only:
+        # The folder that will actually load (a <version>/ subfolder may be Keras-only)
+        keys = [k for k in keys if model_engine(REGISTRY.resolve(*k)) == "numpy"]
+    if not keys:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or min(8, len(keys))) as pool:
+        return list(pool.map(lambda k: _load_one(k, warm), keys))
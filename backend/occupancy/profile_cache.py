@@ -0,0 +1,188 @@
+# occupancy/profile_cache.py
+"""
+Shared weekday x hour profile per library, kept current by ingest.
+
+The Django-cache entry is the raw material of the profile rather than the
+profile itself: a (PROFILE_WEEKS * 7 + 1) x 24 grid of local days x local
+hours holding each hour's peak (raw_max) and whether it had samples. The
+7x24 profile is a numpy reduction over that grid, so:
+
+- the rolling window advances by dropping leading days (no rescan)
+- rollup_hours writes the hours it just rewrote into the grid
+- `stamp` records the library's data stamp (see forecast_cache) the grid
+  reflects; an entry whose stamp is not the current one missed an update
+  and is rebuilt from SignalHourly
+
+Like series_cache, patches are read-modify-write without a cross-worker
+lock; PROFILE_CACHE_TTL bounds how long a lost update could survive.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+
+from . import forecast_cache
+from .infer import PH_TZ
+from .models import SignalHourly
+
+PROFILE_WEEKS = 8
+PROFILE_CACHE_TTL = int(os.getenv("PROFILE_CACHE_TTL", "3600"))
+_DAYS = PROFILE_WEEKS * 7 + 1  # the cutoff falls inside the oldest day
+
+_STATS = {"hits": 0, "rebuilds": 0, "rolls": 0, "patches": 0, "errors": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def stats() -> Dict[str, int]:
+    with _STATS_LOCK:
+        return dict(_STATS)
+
+
+def _key(library) -> str:
+    return f"occupancy:profile:{library.pk}"
+
+
+def _hour_no(ts) -> int:
+    return int(pd.Timestamp(ts).timestamp()) // 3600
+
+
+def _day_start(day: int) -> int:
+    """UTC hour number of local midnight of a proleptic-Gregorian day ordinal."""
+    return _hour_no(pd.Timestamp(date.fromordinal(day)).tz_localize(PH_TZ))
+
+
+def _local_day(ts) -> int:
+    return pd.Timestamp(ts).tz_convert(PH_TZ).date().toordinal()
+
+
+class _Grid:
+    def __init__(self, first_day: int, raw: np.ndarray, seen: np.ndarray, stamp):
+        self.first_day, self.raw, self.seen, self.stamp = first_day, raw, seen, stamp
+
+    @classmethod
+    def empty(cls, first_day: int, stamp) -> "_Grid":
+        return cls(first_day, np.zeros((_DAYS, 24), np.int32), np.zeros((_DAYS, 24), bool), stamp)
+
+    @classmethod
+    def from_db(cls, library, first_day: int, stamp) -> "_Grid":
+        grid = cls.empty(first_day, stamp)
+        base = _day_start(first_day)
+        rows = list(SignalHourly.objects
+                    .filter(library=library, samples__gt=0,
+                            hour__gte=pd.Timestamp(base * 3600, unit="s", tz="UTC"),
+                            hour__lt=pd.Timestamp((base + _DAYS * 24) * 3600, unit="s", tz="UTC"))
+                    .values_list("hour", "raw_max"))
+        if rows:
+            hours, raws = zip(*rows)
+            cells = pd.DatetimeIndex(hours).as_unit("s").asi8 // 3600 - base
+            grid.raw.flat[cells] = raws
+            grid.seen.flat[cells] = True
+        return grid
+
+    def roll_to(self, first_day: int) -> bool:
+        """Advance the window so it starts at `first_day`; days shifted out are dropped."""
+        shift = first_day - self.first_day
+        if shift <= 0:
+            return False
+        raw, seen = np.zeros_like(self.raw), np.zeros_like(self.seen)
+        if shift < _DAYS:
+            raw[:-shift], seen[:-shift] = self.raw[shift:], self.seen[shift:]
+        self.first_day, self.raw, self.seen = first_day, raw, seen
+        return True
+
+    def profile(self, now_utc: pd.Timestamp) -> Optional[np.ndarray]:
+        cutoff = now_utc - pd.Timedelta(weeks=PROFILE_WEEKS)
+        cells = _day_start(self.first_day) + np.arange(_DAYS * 24)
+        valid = self.seen.ravel() & (cells * 3600 >= cutoff.timestamp())
+        if not valid.any():
+            return None
+        dows = np.repeat((self.first_day - 1 + np.arange(_DAYS)) % 7, 24)  # ordinal 1 is a Monday
+        hods = np.tile(np.arange(24), _DAYS)
+        sums = np.zeros((7, 24))
+        counts = np.zeros((7, 24))
+        np.add.at(sums, (dows[valid], hods[valid]), self.raw.ravel()[valid])
+        np.add.at(counts, (dows[valid], hods[valid]), 1)
+        return np.where(counts > 0, np.round(sums / np.maximum(counts, 1)), 0).astype(np.int64)
+
+    def dump(self) -> dict:
+        return {"first_day": self.first_day, "raw": self.raw.tobytes(), "seen": self.seen.tobytes(),
+                "stamp": self.stamp}
+
+    @classmethod
+    def load(cls, d: dict) -> "_Grid":
+        raw = np.frombuffer(d["raw"], np.int32).reshape(_DAYS, 24).copy()
+        seen = np.frombuffer(d["seen"], bool).reshape(_DAYS, 24).copy()
+        return cls(d["first_day"], raw, seen, d["stamp"])
+
+
+def _get(library) -> Optional[_Grid]:
+    try:
+        d = cache.get(_key(library))
+    except Exception:
+        _count("errors")
+        return None
+    return _Grid.load(d) if d is not None else None
+
+
+def _set(library, grid: _Grid) -> None:
+    try:
+        cache.set(_key(library), grid.dump(), PROFILE_CACHE_TTL)
+    except Exception:
+        _count("errors")
+
+
+def get_profile(library, now_utc: Optional[pd.Timestamp] = None) -> Optional[np.ndarray]:
+    """Dense 7x24 profile (row 0 = Monday) over the last PROFILE_WEEKS weeks, or None without data."""
+    now_utc = now_utc if now_utc is not None else pd.Timestamp.now(tz="UTC")
+    first_day = _local_day(now_utc) - _DAYS + 1
+    try:
+        current = forecast_cache.stamps(library.key)[0]
+    except Exception:
+        _count("errors")
+        current = None
+
+    grid = _get(library)
+    if grid is None or current is None or grid.stamp != current:
+        _count("rebuilds")
+        grid = _Grid.from_db(library, first_day, current)
+        if current is not None:
+            _set(library, grid)
+    else:
+        _count("hits")
+        if grid.roll_to(first_day):
+            _count("rolls")
+            _set(library, grid)
+    return grid.profile(now_utc)
+
+
+def patch(library, start_utc: pd.Timestamp, raw: np.ndarray, samples: np.ndarray, before, after) -> None:
+    """
+    Write rolled-up hours (starting at start_utc) into the cached grid. Only
+    applied when the entry was current at data stamp `before`; the entry is
+    then marked current at `after`. Anything else is left to be rebuilt.
+    """
+    grid = _get(library) if after is not None else None
+    if grid is None or grid.stamp != before:
+        return
+    last_day = _local_day(start_utc + pd.Timedelta(hours=len(raw) - 1))
+    grid.roll_to(last_day - _DAYS + 1)
+    base = _day_start(grid.first_day)
+    s = _hour_no(start_utc)
+    a, b = max(s, base), min(s + len(raw), base + _DAYS * 24)
+    if a < b:
+        grid.raw.flat[a - base: b - base] = raw[a - s: b - s]
+        grid.seen.flat[a - base: b - base] = samples[a - s: b - s] > 0
+    grid.stamp = after
+    _set(library, grid)
+    _count("patches")
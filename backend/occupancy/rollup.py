@@ -0,0 +1,92 @@
+# occupancy/rollup.py
+"""
+Maintenance of SignalHourly, the hourly rollup of Signal that the forecast,
+history and profile code read instead of raw signals.
+"""
+from __future__ import annotations
+
+from datetime import timezone as dt_timezone
+
+import numpy as np
+import pandas as pd
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncHour
+
+from . import forecast_cache, profile_cache, series_cache
+from .infer import correct_live_occupancy
+from .models import Library, Signal, SignalHourly
+
+_HOUR = pd.Timedelta(hours=1)
+
+
+def _hour(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    ts = ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+    return ts.floor("h")
+
+
+def rollup_hours(library: Library, start_utc, end_utc) -> int:
+    """
+    Recompute SignalHourly for every hour in [start_utc, end_utc] (floored to
+    the hour), widened to meet the library's nearest existing rollup rows so
+    that no unfilled gap is left between them. Returns the rows written.
+    """
+    start, end = _hour(start_utc), _hour(end_utc)
+    existing = SignalHourly.objects.filter(library=library)
+    prev_h = existing.filter(hour__lt=start).order_by("-hour").values_list("hour", flat=True).first()
+    next_h = existing.filter(hour__gt=end).order_by("hour").values_list("hour", flat=True).first()
+    lo = _hour(prev_h) + _HOUR if prev_h is not None else start
+    hi = _hour(next_h) - _HOUR if next_h is not None else end
+
+    agg = list(Signal.objects
+               .filter(library=library, ts__gte=lo, ts__lt=hi + _HOUR)
+               .annotate(bucket=TruncHour("ts", tzinfo=dt_timezone.utc))
+               .values("bucket")
+               .annotate(raw_max=Max("wifi_clients"), samples=Count("id")))
+
+    idx = pd.date_range(lo, hi, freq="h", tz="UTC")
+    raw = np.zeros(len(idx), dtype=np.int64)
+    samples = np.zeros(len(idx), dtype=np.int64)
+    pos = idx.get_indexer(pd.DatetimeIndex([r["bucket"] for r in agg]).tz_convert("UTC")) if agg else []
+    for i, r in zip(pos, agg):
+        raw[i], samples[i] = r["raw_max"], r["samples"]
+
+    # Same rounding as the old per-request pipeline: (raw * factor).round()
+    corrected = np.round(correct_live_occupancy(raw.astype(float), library.key)).astype(np.int64)
+
+    rows = [
+        SignalHourly(library=library, hour=ts.to_pydatetime(), raw_max=int(r), corrected=int(c), samples=int(n))
+        for ts, r, c, n in zip(idx, raw, corrected, samples)
+    ]
+    SignalHourly.objects.bulk_create(
+        rows, batch_size=1000,
+        update_conflicts=True, unique_fields=["library", "hour"],
+        update_fields=["raw_max", "corrected", "samples"],
+    )
+    # Once the rows are visible: patch the shared recent-series cache in place,
+    # move the data stamp so cached forecasts for this library go stale, and
+    # fold the hours into the shared profile grid
+    def _published():
+        series_cache.patch(library, lo, corrected)
+        try:
+            before = forecast_cache.stamps(library.key)[0]
+        except Exception:
+            before = None
+        after = forecast_cache.bump_data(library.key)
+        profile_cache.patch(library, lo, raw, samples, before, after)
+
+    transaction.on_commit(_published)
+    return len(rows)
+
+
+def rollup_library(library: Library) -> int:
+    """Rebuild a library's whole rollup from its signals (backfill / correction factor change)."""
+    span = Signal.objects.filter(library=library).aggregate(first=Min("ts"), last=Max("ts"))
+    with transaction.atomic():
+        SignalHourly.objects.filter(library=library).delete()
+        transaction.on_commit(lambda: series_cache.invalidate(library))
+        transaction.on_commit(lambda: forecast_cache.bump_data(library.key))
+        if span["first"] is None:
+            return 0
+        return rollup_hours(library, span["first"], span["last"])
@@ -0,0 +1,164 @@
+# occupancy/series_cache.py
+"""
+Shared cache of each library's recent corrected hourly occupancy.
+
+One Django-cache entry per library holds the last SERIES_CACHE_HOURS hours
+as a packed int32 array plus the UTC hour it ends at. With Redis configured
+every worker reads the same entry. Invariant: the cached hours equal the
+SignalHourly rows for that span.
+
+- reads slice the array; a request ending after the cached end only queries
+  the missing hours and rolls the entry forward, never past the current
+  hour (future hours are read from the database and not cached)
+- rollup_hours patches the hours it rewrote (after commit), so ingest never
+  drops the entry
+- backfills invalidate
+
+Writes are read-modify-write without a cross-worker lock; SERIES_CACHE_TTL
+bounds how long a lost update could linger.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from django.core.cache import cache
+
+from .models import SignalHourly
+
+SERIES_CACHE_HOURS = int(os.getenv("SERIES_CACHE_HOURS", str(14 * 24)))
+SERIES_CACHE_TTL = int(os.getenv("SERIES_CACHE_TTL", "900"))
+
+_STATS = {"hits": 0, "misses": 0, "extends": 0, "patches": 0, "errors": 0}
+_STATS_LOCK = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _STATS_LOCK:
+        _STATS[name] += 1
+
+
+def stats() -> Dict[str, int]:
+    with _STATS_LOCK:
+        return dict(_STATS)
+
+
+def _key(library) -> str:
+    return f"occupancy:series:{library.pk}"
+
+
+def _hour_no(ts) -> int:
+    """Hours since the epoch for a UTC timestamp (floored)."""
+    return int(pd.Timestamp(ts).timestamp()) // 3600
+
+
+def _hour_ts(n: int) -> pd.Timestamp:
+    return pd.Timestamp(n * 3600, unit="s", tz="UTC")
+
+
+def _get(library):
+    try:
+        entry = cache.get(_key(library))
+    except Exception:  # cache backend down: behave like a miss
+        _count("errors")
+        return None
+    if entry is None:
+        return None
+    return entry["end"], np.frombuffer(entry["values"], dtype=np.int32)
+
+
+def _set(library, end: int, values: np.ndarray) -> None:
+    try:
+        cache.set(_key(library), {"end": int(end), "values": values.astype(np.int32).tobytes()}, SERIES_CACHE_TTL)
+    except Exception:
+        _count("errors")
+
+
+def hourly_from_db(library, start: int, end: int) -> np.ndarray:
+    """Corrected values for hour numbers [start, end] straight from SignalHourly (0 where missing)."""
+    out = np.zeros(end - start + 1, dtype=np.int32)
+    rows = (SignalHourly.objects
+            .filter(library=library, hour__gte=_hour_ts(start), hour__lte=_hour_ts(end))
+            .values_list("hour", "corrected"))
+    for hour, value in rows:
+        out[_hour_no(hour) - start] = value
+    return out
+
+
+def _now_hour() -> int:
+    return _hour_no(pd.Timestamp.now(tz="UTC"))
+
+
+def hourly_values(library, start_utc: pd.Timestamp, end_utc: pd.Timestamp) -> np.ndarray:
+    """
+    Corrected hourly occupancy for [start_utc, end_utc] (hour-aligned UTC),
+    cache first. The entry never ends after the current hour: hours after it
+    (a forecast for a future day) are read from the database, uncached.
+    """
+    n = SERIES_CACHE_HOURS
+    s, e = _hour_no(start_utc), _hour_no(end_utc)
+    now = _now_hour()
+    if e > now:
+        if s > now:
+            return hourly_from_db(library, s, e)
+        return np.concatenate([hourly_values(library, start_utc, _hour_ts(now)),
+                               hourly_from_db(library, now + 1, e)])
+    if e - s + 1 > n:
+        return hourly_from_db(library, s, e)
+
+    cached = _get(library)
+    if cached is not None:
+        c_end, vals = cached
+        if e > c_end:
+            # Roll forward: only the hours after the cached end are read
+            if e - c_end < n:
+                vals = np.concatenate([vals, hourly_from_db(library, c_end + 1, e)])[-n:]
+                c_end = e
+                _set(library, c_end, vals)
+                _count("extends")
+            else:
+                cached = None
+        if cached is not None:
+            lo = c_end - n + 1
+            if s >= lo:
+                _count("hits")
+                return vals[s - lo: e - lo + 1].copy()
+            # Older than the cached span (e.g. a past day): don't disturb the entry
+            _count("misses")
+            return hourly_from_db(library, s, e)
+
+    _count("misses")
+    c_end = now
+    lo = c_end - n + 1
+    if s < lo:
+        return hourly_from_db(library, s, e)
+    vals = hourly_from_db(library, lo, c_end)
+    _set(library, c_end, vals)
+    return vals[s - lo: e - lo + 1].copy()
+
+
+def patch(library, start_utc: pd.Timestamp, values: np.ndarray) -> None:
+    """Overwrite the cached hours covered by `values` (starting at start_utc); others are untouched."""
+    cached = _get(library)
+    if cached is None:
+        return
+    c_end, vals = cached
+    lo = c_end - SERIES_CACHE_HOURS + 1
+    s = _hour_no(start_utc)
+    a, b = max(s, lo), min(s + len(values) - 1, c_end)
+    if a > b:
+        return
+    vals = vals.copy()
+    vals[a - lo: b - lo + 1] = np.asarray(values)[a - s: b - s + 1]
+    _set(library, c_end, vals)
+    _count("patches")
+
+
+def invalidate(library) -> None:
+    try:
+        cache.delete(_key(library))
+    except Exception:
+        _count("errors")
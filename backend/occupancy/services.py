@@ -67,8 +67,12 @@ def predict_latest_from_db(lib_key: str, family: str):
         X_df = pd.concat([num, cats_df], axis=1).reindex(columns=feats)
         X = X_df.to_numpy().reshape(1, W, X_df.shape[1])
 
-    # Predict & inverse-scale
-    y_scaled = model.predict(X, verbose=0).reshape(-1,1)
+    # Predict & inverse-scale (traced single-sample path built at artifact load)
+    predict_fn = meta.get("predict_fn")
+    if predict_fn is not None:
+        y_scaled = predict_fn(X).reshape(-1,1)
+    else:
+        y_scaled = model.predict(X, verbose=0).reshape(-1,1)
     y_pred = preproc["occ_scaler"].inverse_transform(y_scaled).ravel()[0]
 
     return {
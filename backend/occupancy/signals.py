@@ -0,0 +1,54 @@
+# occupancy/signals.py
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import forecast_cache
+from .models import ActiveModel, Library, ModelCandidate, Signal
+from .rollup import rollup_hours
+
+
+@receiver(post_save, sender=Signal)
+def _rollup_signal_hour(sender, instance, **kwargs):
+    """Single-row edits (API/admin) keep SignalHourly current; bulk ingest rolls up itself."""
+    rollup_hours(instance.library, instance.ts, instance.ts)
+
+
+def _rollup_deleted(ranges: dict) -> None:
+    """One rollup per library over the hours a delete touched, for libraries that still exist."""
+    for lib in Library.objects.filter(pk__in=list(ranges)):
+        lo, hi = ranges[lib.pk]
+        rollup_hours(lib, lo, hi)
+
+
+@receiver(post_delete, sender=Signal)
+def _rollup_signal_delete(sender, instance, origin=None, **kwargs):
+    """
+    Deleting one signal rolls its hour up again. A queryset delete fires this
+    once per row, so rows are gathered per delete call (on its origin) and
+    rolled up once per library, after commit. Cascades from a Library delete
+    are skipped: its SignalHourly rows go with it.
+    """
+    if origin is None or isinstance(origin, Signal):
+        rollup_hours(instance.library, instance.ts, instance.ts)
+        return
+    if not isinstance(origin, QuerySet) or origin.model is not Signal:
+        return
+    ranges = getattr(origin, "_rollup_ranges", None)
+    if ranges is None:
+        ranges = origin._rollup_ranges = {}
+        transaction.on_commit(lambda: _rollup_deleted(ranges))
+    lo, hi = ranges.get(instance.library_id, (instance.ts, instance.ts))
+    ranges[instance.library_id] = (min(lo, instance.ts), max(hi, instance.ts))
+
+
+@receiver(post_save, sender=ActiveModel)
+@receiver(post_delete, sender=ActiveModel)
+@receiver(post_save, sender=ModelCandidate)
+@receiver(post_delete, sender=ModelCandidate)
+def _model_changed(sender, instance, **kwargs):
+    """The family/version a library resolves to may have changed: drop its cached forecasts."""
+    lib_key = Library.objects.filter(pk=instance.library_id).values_list("key", flat=True).first()
+    if lib_key:
+        forecast_cache.bump_model(lib_key)
@@ -1,3 +1,1303 @@
-from django.test import TestCase
+import asyncio
+import json
+import shutil
+import importlib
+import importlib.util
+import io
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+from pathlib import Path
+from urllib.parse import urlencode
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.http import QueryDict
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from sklearn.preprocessing import OneHotEncoder
+
+from . import (backtest, forecast_cache, forecast_store, inference_pool, profile_cache, series_cache, views_async,
+               views_forecast)
+from .inference_server import InferenceServer
+from .infer import (ARTIFACTS_ROOT, _one_step_hybrid, _row_vector, get_series_df, load_artifacts_cached,
+                    walk_forward, walk_forward_many)
+from .ml.bundle import BUNDLE_FILE, ArtifactBundle, MinMaxParams, OneHotParams, bundle_matches, write_bundle
+from .ml.cache import ArtifactCache
+from .ml.features import N_SLOTS, FeaturePlan, WindowRing, calendar_slots
+from .ml.loader import ARTIFACTS, REGISTRY, list_library_families, load_artifacts_dir, load_model_from_dir
+from .ml.registry import ArtifactRegistry
+from .ml.remote import InferenceClient, RemoteModel
+from .ml.npengine import GRAPH_FILE, WEIGHTS_FILE, NumpyModel, export_keras_model
+from .ml.rollouts import ROLLOUTS, RolloutCache
+from .ml.shared import pack_readonly
+from .ml.stacked import StackedModel, topology_key
+from .models import ActiveModel, Forecast, Library, ModelCandidate, ModelEvaluation, Signal, SignalHourly
+from .preload import preload_active_models
+from .rollup import rollup_library
+
+HAS_KERAS = importlib.util.find_spec("keras") is not None
+
+
+def setUpModule():
+    # Tests count cache hits and clear the cache freely: never against a shared Redis from REDIS_URL
+    overridden = override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                                                       "LOCATION": "occupancy-tests"}})
+    overridden.enable()
+    unittest.addModuleCleanup(overridden.disable)
+
+    # The NumPy exports and bundles are build outputs (not in git): build them into a copy of
+    # artifacts/, the way the image build does, and serve that copy for the whole module
+    global ARTIFACTS_ROOT
+    if not HAS_KERAS:
+        return
+    tmp = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(tmp.cleanup)
+    root = Path(tmp.name) / "artifacts"
+    shutil.copytree(ARTIFACTS_ROOT, root, ignore=shutil.ignore_patterns(BUNDLE_FILE, GRAPH_FILE, WEIGHTS_FILE))
+    unittest.addModuleCleanup(ARTIFACTS.clear)
+    for target, attr, value in ((REGISTRY, "root", root), (REGISTRY, "_libs", {}), (REGISTRY, "_listings", {}),
+                                (ARTIFACTS, "root", root)):
+        patcher = mock.patch.object(target, attr, value)
+        patcher.start()
+        unittest.addModuleCleanup(patcher.stop)
+    ARTIFACTS.clear()
+    call_command("build_bundles", stdout=io.StringIO())
+    ARTIFACTS_ROOT = root
+
+
+class _WindowEchoModel:
+    """Deterministic stand-in for a Keras model: depends on the whole window."""
+
+    def predict(self, X, verbose=0):
+        X = np.asarray(X, dtype=float)
+        return np.array([[0.5 * X[0, :, 0].mean() + 0.1 * X[0, -1, 0] + 0.01 * X[0, -1, 3]]])
+
+
+def _hybrid_preproc():
+    with open(ARTIFACTS_ROOT / "cnn_lstm_attn" / "miguel_pro" / "preproc.pkl", "rb") as f:
+        return pickle.load(f)
+
+
+class FeaturePlanParityTests(SimpleTestCase):
+    """The vectorized window builder must match stacking _row_vector row by row."""
+
+    # Rows come out of the float32 calendar table
+    ATOL = 1e-6
+
+    def setUp(self):
+        # Two full weeks so every (hour, dow) pair is exercised
+        self.ts = pd.date_range("2025-08-03 16:00", periods=24 * 14, freq="h", tz="UTC")
+        self.vals = np.random.default_rng(0).integers(0, 120, size=len(self.ts)).astype(float)
+
+    def _reference(self, preproc, lib_key):
+        feature_order = preproc["spec"]["feature_order"]
+        return np.stack([
+            _row_vector(ts, v, preproc["occ_scaler"], preproc.get("ohe"), feature_order, {}, lib_key)
+            for ts, v in zip(self.ts, self.vals)
+        ])
+
+    def test_matches_row_vector_for_artifact_preproc(self):
+        pre = _hybrid_preproc()
+        plan = FeaturePlan(pre["spec"]["feature_order"], pre["ohe"])
+        got = plan.build(self.ts, self.vals, capacity=500)
+        np.testing.assert_allclose(got, self._reference(pre, "miguel_pro"), rtol=0, atol=self.ATOL)
+
+    def test_matches_row_vector_without_dropped_category(self):
+        grid = pd.DataFrame({"hour": np.repeat(np.arange(24), 7), "day_of_week": np.tile(np.arange(7), 24)})
+        ohe = OneHotEncoder(sparse_output=False, handle_unknown="ignore").fit(grid)
+        pre = _hybrid_preproc()
+        feature_order = list(pre["spec"]["numerical_names"]) + list(ohe.get_feature_names_out(["hour", "day_of_week"]))
+        pre = {**pre, "ohe": ohe, "spec": {**pre["spec"], "feature_order": feature_order}}
+
+        plan = FeaturePlan(feature_order, ohe)
+        got = plan.build(self.ts, self.vals, capacity=100)
+        np.testing.assert_allclose(got, self._reference(pre, "unknown_library"), rtol=0, atol=self.ATOL)
+
+    def test_occupancy_only_plan(self):
+        plan = FeaturePlan(["occupancy_scaled"], None)
+        got = plan.build(self.ts, self.vals, capacity=80)
+        np.testing.assert_allclose(got[:, 0], self.vals / 80, rtol=1e-6)
+        self.assertEqual(got.shape, (len(self.ts), 1))
+
+
+class CalendarTableTests(SimpleTestCase):
+    def test_table_covers_every_hour_of_week(self):
+        pre = _hybrid_preproc()
+        plan = FeaturePlan(pre["spec"]["feature_order"], pre["ohe"])
+        self.assertEqual(plan.table.shape, (N_SLOTS, plan.n_features - 1))
+        self.assertEqual(plan.table.dtype, np.float32)
+
+        slots = np.arange(N_SLOTS)
+        full = plan.calendar(slots % 24, slots // 24)
+        np.testing.assert_allclose(plan.table, np.delete(full, plan.occ_col, axis=1), atol=1e-6)
+
+    def test_slots_follow_local_time(self):
+        # 2025-08-03 16:00 UTC is Monday 00:00 in Manila
+        ts = pd.date_range("2025-08-03 16:00", periods=3, freq="h", tz="UTC")
+        np.testing.assert_array_equal(calendar_slots(ts), [0, 1, 2])
+
+
+class WindowRingTests(SimpleTestCase):
+    def test_view_is_latest_window_in_order(self):
+        rows = np.arange(12, dtype=np.float32).reshape(4, 3)
+        ring = WindowRing(rows)
+        expected = rows.copy()
+        for k in range(10):
+            new = np.full(3, 100 + k, dtype=np.float32)
+            ring.push(new)
+            expected = np.vstack([expected[1:], new])
+            np.testing.assert_array_equal(ring.view()[0], expected)
+        self.assertEqual(ring.view().shape, (1, 4, 3))
+
+    def test_walk_forward_matches_rebuilt_windows(self):
+        pre = _hybrid_preproc()
+        meta = {"feature_order": pre["spec"]["feature_order"], "ohe": pre["ohe"]}
+        model = _WindowEchoModel()
+        idx = pd.date_range("2025-08-10", periods=30, freq="h", tz="UTC")
+        vals = np.random.default_rng(1).integers(0, 60, size=30).astype(float)
+
+        got = walk_forward(model, pre["occ_scaler"], 24, vals, 40, idx, meta, "gisbert_2nd_floor")
+
+        # Reference: rebuild every window from the full history, one step at a time
+        buf_vals, buf_ts, expected = list(vals), idx, []
+        for _ in range(40):
+            y = _one_step_hybrid(model, pre["occ_scaler"], pre["ohe"], meta["feature_order"], meta,
+                                 "gisbert_2nd_floor", buf_ts[-24:], np.array(buf_vals[-24:]))
+            expected.append(y)
+            buf_vals.append(y)
+            buf_ts = buf_ts.append(pd.DatetimeIndex([buf_ts[-1] + pd.Timedelta(hours=1)]))
+
+        np.testing.assert_allclose(got, expected, rtol=1e-6)
+
+
+class _CountingEchoModel(_WindowEchoModel):
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, X, verbose=0):
+        self.calls += 1
+        return super().predict(X, verbose)
+
+
+class RolloutCheckpointTests(SimpleTestCase):
+    def setUp(self):
+        ROLLOUTS.clear()
+        pre = _hybrid_preproc()
+        self.scaler = pre["occ_scaler"]
+        self.meta = {"feature_order": pre["spec"]["feature_order"], "ohe": pre["ohe"]}
+        self.idx = pd.date_range("2025-08-10", periods=30, freq="h", tz="UTC")
+        self.vals = np.random.default_rng(5).integers(0, 60, size=30).astype(float)
+
+    def _walk(self, model, steps, vals=None, lib_key="gisbert_2nd_floor"):
+        vals = self.vals if vals is None else vals
+        return walk_forward(model, self.scaler, 24, vals, steps, self.idx, self.meta, lib_key)
+
+    def test_longer_rollout_resumes_and_shorter_is_a_slice(self):
+        cold = self._walk(_CountingEchoModel(), 30)
+        ROLLOUTS.clear()
+
+        model = _CountingEchoModel()
+        self._walk(model, 12)
+        np.testing.assert_array_equal(self._walk(model, 30), cold)
+        self.assertEqual(model.calls, 30)  # 12 + the 18 steps past the checkpoint
+        np.testing.assert_array_equal(self._walk(model, 7), cold[:7])
+        self.assertEqual(model.calls, 30)
+
+    def test_other_seed_library_or_model_misses(self):
+        model = _CountingEchoModel()
+        self._walk(model, 5)
+        self._walk(model, 5, vals=self.vals + 1)
+        self._walk(model, 5, lib_key="miguel_pro")
+        self._walk(_CountingEchoModel(), 5)
+        self.assertEqual(model.calls, 15)
+
+    def test_classic_path_resumes(self):
+        cold = walk_forward(None, None, 24, self.vals, 20, lib_key="miguel_pro")
+        ROLLOUTS.clear()
+        walk_forward(None, None, 24, self.vals, 8, lib_key="miguel_pro")
+        resumes = ROLLOUTS.stats()["resumes"]
+        resumed = walk_forward(None, None, 24, self.vals, 20, lib_key="miguel_pro")
+        np.testing.assert_array_equal(resumed, cold)
+        self.assertEqual(ROLLOUTS.stats()["resumes"], resumes + 1)
+
+    def test_cache_is_byte_bounded(self):
+        cache = RolloutCache(max_bytes=2000)
+        for k in range(5):
+            cache.put(k, None, np.zeros(50), np.zeros(50))  # 800 bytes each
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertIsNone(cache.get(0, 1))
+        self.assertIsNotNone(cache.get(4, 50))
+
+
+class NumpyEngineTests(SimpleTestCase):
+    @unittest.skipUnless(HAS_KERAS, "keras not installed (builds the exports)")
+    def test_built_exports_load_without_keras(self):
+        model = load_model_from_dir(ARTIFACTS_ROOT / "cnn_lstm_attn" / "miguel_pro")
+        self.assertIsInstance(model, NumpyModel)
+        out = model(np.zeros((2, 24, 45), dtype=np.float32))
+        self.assertEqual(out.shape, (2, 1))
+
+    @unittest.skipUnless(HAS_KERAS, "keras not installed")
+    def test_matches_keras_for_every_family(self):
+        from keras.models import load_model
+
+        rng = np.random.default_rng(0)
+        for family in ("cnn", "lstm", "cnn_lstm_attn"):
+            with self.subTest(family=family), tempfile.TemporaryDirectory() as tmp:
+                keras_model = load_model(ARTIFACTS_ROOT / family / "miguel_pro" / "model.keras", compile=False)
+                export_keras_model(keras_model, Path(tmp))
+                X = rng.random((8,) + tuple(keras_model.input_shape[1:]), dtype=np.float32)
+                np.testing.assert_allclose(NumpyModel.load(Path(tmp))(X), keras_model.predict(X, verbose=0),
+                                           rtol=0, atol=1e-5)
+
+    @unittest.skipUnless(HAS_KERAS, "keras not installed")
+    def test_matches_keras_for_cnn_lstm_stack(self):
+        import keras
+
+        model = keras.Sequential([
+            keras.Input((24, 45)),
+            keras.layers.Conv1D(16, 3, padding="same", activation="relu"),
+            keras.layers.MaxPooling1D(2),
+            keras.layers.LSTM(12, return_sequences=True),
+            keras.layers.LSTM(8),
+            keras.layers.Dropout(0.2),
+            keras.layers.Dense(1),
+        ])
+        X = np.random.default_rng(1).random((5, 24, 45), dtype=np.float32)
+        with tempfile.TemporaryDirectory() as tmp:
+            export_keras_model(model, Path(tmp))
+            np.testing.assert_allclose(NumpyModel.load(Path(tmp))(X), model.predict(X, verbose=0),
+                                       rtol=0, atol=1e-5)
+
+
+class StackedModelTests(SimpleTestCase):
+    LIBS = ("miguel_pro", "american_corner", "gisbert_3rd_floor")
+
+    def test_matches_each_model_for_every_family(self):
+        rng = np.random.default_rng(3)
+        for family in ("cnn", "lstm", "cnn_lstm_attn"):
+            with self.subTest(family=family):
+                models = [load_model_from_dir(ARTIFACTS_ROOT / family / lib) for lib in self.LIBS]
+                self.assertEqual(len({topology_key(m) for m in models}), 1)
+                X = rng.random((len(models), 2) + tuple(models[0].input_shape[1:]), dtype=np.float32)
+                expected = np.stack([m(X[i]) for i, m in enumerate(models)])
+                np.testing.assert_allclose(StackedModel(models)(X), expected, rtol=0, atol=1e-5)
+
+    def test_rejects_mixed_topologies(self):
+        models = [load_model_from_dir(ARTIFACTS_ROOT / family / "miguel_pro") for family in ("cnn", "lstm")]
+        self.assertNotEqual(topology_key(models[0]), topology_key(models[1]))
+        with self.assertRaises(ValueError):
+            StackedModel(models)
+
+    def test_walk_forward_many_matches_walk_forward(self):
+        rng = np.random.default_rng(4)
+        idx = pd.date_range(end=pd.Timestamp("2025-08-18 03:00", tz="UTC"), periods=30, freq="h")
+        jobs = []
+        for family, lib in [("cnn_lstm_attn", lib) for lib in self.LIBS * 2] + [("cnn", "miguel_pro")]:
+            model, scaler, window, meta = load_artifacts_cached(family, lib, None)
+            jobs.append({"model": model, "scaler": scaler, "window": window, "base_index": idx, "meta": meta,
+                         "base_series": rng.integers(0, 60, size=len(idx)).astype(float), "lib_key": lib})
+
+        ROLLOUTS.clear()
+        with mock.patch.object(StackedModel, "__call__", autospec=True, side_effect=StackedModel.__call__) as fwd:
+            got = walk_forward_many(jobs, 4)
+            ROLLOUTS.clear()
+            expected = [walk_forward(steps=4, **job) for job in jobs]
+        self.assertEqual(fwd.call_count, 4)  # one stacked pass per step for the 6 hybrid jobs
+        for g, e in zip(got, expected):
+            np.testing.assert_allclose(g, e, rtol=0, atol=1e-3)
+
+
+class InferenceServerTests(SimpleTestCase):
+    LIBS = ("miguel_pro", "american_corner", "gisbert_3rd_floor")
+
+    def setUp(self):
+        ROLLOUTS.clear()
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "inference.sock")
+        self.server = InferenceServer(self.path, batch_window_ms=50)
+        self.server.bind()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = InferenceClient(self.path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.thread.join(5)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _jobs(self, remote: bool, seed: int = 6):
+        rng = np.random.default_rng(seed)
+        idx = pd.date_range(end=pd.Timestamp("2025-08-18 03:00", tz="UTC"), periods=30, freq="h")
+        jobs = []
+        for lib in self.LIBS:
+            model, scaler, window, meta = load_artifacts_cached("cnn_lstm_attn", lib, "v1")
+            if remote:
+                model = RemoteModel(self.client, ("cnn_lstm_attn", lib, "v1"))
+            jobs.append({"model": model, "scaler": scaler, "window": window, "base_index": idx, "meta": meta,
+                         "base_series": rng.integers(0, 60, size=len(idx)).astype(float), "lib_key": lib})
+        return jobs
+
+    @staticmethod
+    def _jobs_local(jobs):
+        return [{**job, "model": load_artifacts_cached(*job["model"].key)[0]} for job in jobs]
+
+    def test_socket_is_private(self):
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_remote_rollouts_match_in_process(self):
+        expected = walk_forward_many(self._jobs(remote=False), 5)
+        ROLLOUTS.clear()
+        mixed = self._jobs(remote=True)
+        mixed[1] = self._jobs(remote=False)[1]  # one in-process job among the remote ones
+        got = walk_forward_many(mixed, 5)
+        for g, e in zip(got, expected):
+            np.testing.assert_allclose(g, e, rtol=0, atol=1e-3)
+        scaler, window, meta = self.client.describe(("cnn_lstm_attn", "miguel_pro", "v1"))
+        self.assertEqual(window, 24)
+        self.assertNotIn("predict_fn", meta)
+
+    def test_concurrent_clients_share_batches(self):
+        n = 6
+        jobs = [self._jobs(remote=True, seed=s)[s % len(self.LIBS)] for s in range(n)]
+        results = [None] * n
+        start = threading.Barrier(n)
+
+        def rollout(i):
+            client = InferenceClient(self.path)  # one connection per worker, as in production
+            try:
+                start.wait()
+                results[i] = walk_forward_many([{**jobs[i], "model": RemoteModel(client, jobs[i]["model"].key)}],
+                                               3)[0]
+            finally:
+                client.close()
+
+        threads = [threading.Thread(target=rollout, args=(i,)) for i in range(n)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        ROLLOUTS.clear()
+        expected = walk_forward_many(self._jobs_local(jobs), 3)
+        for g, e in zip(results, expected):
+            np.testing.assert_allclose(g, e, rtol=0, atol=1e-3)
+        stats = self.client.stats()
+        self.assertEqual(stats["jobs"], n)
+        self.assertGreater(stats["max_batch_jobs"], 1)
+
+    def test_errors_reach_the_caller(self):
+        with self.assertRaises(ValueError):
+            self.client.call("nope")
+        with self.assertRaises(Exception):
+            self.client.predict(("cnn_lstm_attn", "miguel_pro", "v1"), np.zeros((1, 5, 2)))
+        self.assertEqual(self.client.stats()["errors"], 2)  # and the server keeps serving
+
+    def test_unreachable_server_falls_back_in_process(self):
+        expected = walk_forward_many(self._jobs(remote=False), 3)
+        ROLLOUTS.clear()
+        jobs = self._jobs(remote=True)
+        gone = InferenceClient(os.path.join(self.tmp, "missing.sock"))
+        for job in jobs:
+            job["model"] = RemoteModel(gone, job["model"].key)
+        with self.assertLogs("occupancy.infer", "WARNING") as logs:
+            got = walk_forward_many(jobs, 3)
+        self.assertIn(f"rolling out {len(jobs)} job(s) in-process", logs.output[0])
+        for g, e in zip(got, expected):
+            np.testing.assert_allclose(g, e, rtol=0, atol=1e-3)
+
+
+class SharedWeightsTests(SimpleTestCase):
+    def test_packed_arrays_are_aligned_readonly_copies(self):
+        rng = np.random.default_rng(2)
+        arrays = {"a": [rng.random((3, 5), dtype=np.float32), rng.random(7, dtype=np.float32)], "b": []}
+        packed = pack_readonly(arrays)
+
+        self.assertEqual(list(packed), ["a", "b"])
+        for src, got in zip(arrays["a"], packed["a"]):
+            np.testing.assert_array_equal(got, src)
+            self.assertFalse(got.flags.writeable)
+            self.assertEqual(got.ctypes.data % 64, 0)
+        # Back to back in one region: 15 float32 (60 bytes) padded to 64
+        self.assertEqual(packed["a"][1].ctypes.data - packed["a"][0].ctypes.data, 64)
+
+    def test_numpy_model_weights_are_shared_region(self):
+        model = load_model_from_dir(ARTIFACTS_ROOT / "cnn_lstm_attn" / "miguel_pro")
+        weights = [w for ws in model._weights.values() for w in ws]
+        self.assertTrue(weights)
+        self.assertTrue(all(not w.flags.writeable for w in weights))
+
+
+class _SizedModel:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+class ArtifactCacheTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.loads = []
+
+    def _write(self, lib, payload, version=None):
+        root = self.tmp / "cnn" / lib / (version or "")
+        root.mkdir(parents=True, exist_ok=True)
+        (root / "meta.json").write_text(payload)
+        return root
+
+    def _cache(self, max_bytes=10_000):
+        def loader(root, family, lib_key):
+            self.loads.append(root)
+            return _SizedModel(1000), None, 24, {"payload": (root / "meta.json").read_text()}
+        return ArtifactCache(self.tmp, loader, max_bytes=max_bytes)
+
+    def test_hits_until_content_changes(self):
+        root = self._write("a", "one")
+        cache = self._cache()
+        first = cache.get("cnn", "a", "v1")
+        self.assertIs(cache.get("cnn", "a", "v1"), first)
+
+        # Same bytes, new mtime: re-hashed but not reloaded
+        os.utime(root / "meta.json", ns=(1, 1))
+        self.assertIs(cache.get("cnn", "a", "v1"), first)
+        self.assertEqual(len(self.loads), 1)
+
+        (root / "meta.json").write_text("two!")
+        second = cache.get("cnn", "a", "v1")
+        self.assertEqual(second[3]["payload"], "two!")
+        stats = cache.stats()
+        self.assertEqual((stats["misses"], stats["reloads"], stats["entries"]), (2, 1, 1))
+        self.assertEqual(stats["bytes_resident"], 1000)
+
+    def test_versions_with_same_content_share_one_entry(self):
+        self._write("a", "one")
+        cache = self._cache()
+        self.assertIs(cache.get("cnn", "a", "v1"), cache.get("cnn", "a", "v1.2"))
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_version_subfolder_is_honoured(self):
+        self._write("a", "flat")
+        self._write("a", "pinned", version="v2")
+        cache = self._cache()
+        self.assertEqual(cache.get("cnn", "a", "v2")[3]["payload"], "pinned")
+        self.assertEqual(cache.get("cnn", "a", "v1")[3]["payload"], "flat")
+
+    def test_evicts_least_recently_used_over_budget(self):
+        for lib in ("a", "b", "c"):
+            self._write(lib, lib)
+        cache = self._cache(max_bytes=2000)
+        cache.get("cnn", "a", "v1")
+        cache.get("cnn", "b", "v1")
+        cache.get("cnn", "a", "v1")  # b is now the oldest
+        cache.get("cnn", "c", "v1")
+
+        self.assertEqual(sorted(r["library"] for r in cache.resident()), ["a", "c"])
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.stats()["bytes_resident"], 2000)
+
+
+class ArtifactRegistryTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.flat = self._files(self.root / "cnn" / "a", '{"model_version": "v1.2"}')
+        self._files(self.root / "lstm" / "b" / "v3", "{}")
+        self.registry = ArtifactRegistry(self.root, ("cnn", "lstm"), ttl=0)
+
+    @staticmethod
+    def _files(d, meta):
+        d.mkdir(parents=True)
+        for name in ("model.keras", "preproc.pkl"):
+            (d / name).write_bytes(b"")
+        (d / "meta.json").write_text(meta)
+        return d
+
+    def test_manifest_covers_flat_and_versioned_layouts(self):
+        rows = {(r["family"], r["lib_key"], r["version"], r["layout"]) for r in self.registry.manifest()}
+        self.assertEqual(rows, {("cnn", "a", "v1.2", "flat"), ("lstm", "b", "v3", "versioned")})
+        self.assertEqual(self.registry.libraries(), ["a", "b"])
+        self.assertEqual(self.registry.meta_version("cnn", "a"), "v1.2")
+        self.assertIsNone(self.registry.meta_version("lstm", "b"))
+        self.assertEqual(self.registry.resolve("lstm", "b", "v3"), self.root / "lstm" / "b" / "v3")
+        self.assertEqual(self.registry.resolve("cnn", "a", "v9"), self.flat)
+
+    def test_refresh_only_rereads_changed_libraries(self):
+        self.registry.refresh()
+        self.assertEqual(self.registry.scans, 2)
+        self.registry.refresh()
+        self.assertEqual(self.registry.scans, 2)
+
+        self._files(self.root / "cnn" / "a" / "v2", "{}")
+        (self.flat / "meta.json").write_text('{"model_version": "v1.3"}')
+        os.utime(self.flat / "meta.json", ns=(1, 1))  # mtime must differ even on coarse clocks
+        self.registry.refresh()
+        self.assertEqual(self.registry.scans, 3)
+        self.assertEqual([e.version for e in self.registry.entries("cnn", "a")], ["v1.3", "v2"])
+
+    def test_shipped_artifacts_are_listed(self):
+        fams = {row["family"] for row in list_library_families("miguel_pro")}
+        self.assertTrue({"cnn", "lstm", "cnn_lstm_attn"} <= fams)
+
+
+class ArtifactBundleTests(SimpleTestCase):
+    def test_stand_ins_match_sklearn(self):
+        pre = _hybrid_preproc()
+        ohe, scaler = OneHotParams.from_sklearn(pre["ohe"]), MinMaxParams.from_sklearn(pre["occ_scaler"])
+        names = ["hour", "day_of_week"]
+        self.assertEqual(list(ohe.get_feature_names_out(names)), list(pre["ohe"].get_feature_names_out(names)))
+
+        X = pd.DataFrame({"hour": np.arange(24), "day_of_week": np.arange(24) % 7})
+        np.testing.assert_array_equal(ohe.transform(X), pre["ohe"].transform(X))
+        y = np.linspace(0, 1, 11)[:, None]
+        np.testing.assert_allclose(scaler.inverse_transform(y), pre["occ_scaler"].inverse_transform(y))
+
+        order = pre["spec"]["feature_order"]
+        np.testing.assert_array_equal(FeaturePlan(order, ohe).table, FeaturePlan(order, pre["ohe"]).table)
+
+    def test_round_trip_is_aligned_and_read_only(self):
+        arrays = {"w/0": np.arange(15, dtype=np.float32).reshape(3, 5), "w/1": np.ones(7, dtype=np.float32)}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / BUNDLE_FILE
+            write_bundle(path, {"format": 1}, arrays, {"spec": {"window": 24}}, {"model_version": "v9"})
+            bundle = ArtifactBundle(path)
+            for name, arr in arrays.items():
+                got = bundle.arrays[name]
+                np.testing.assert_array_equal(got, arr)
+                self.assertFalse(got.flags.writeable)
+                self.assertEqual(got.ctypes.data % 64, 0)
+            self.assertEqual(bundle.meta, {"model_version": "v9"})
+
+    def test_loader_prefers_current_bundle(self):
+        src = ARTIFACTS_ROOT / "cnn_lstm_attn" / "miguel_pro"
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "miguel_pro"
+            shutil.copytree(src, root, ignore=shutil.ignore_patterns(BUNDLE_FILE))
+            X = np.random.default_rng(3).random((1, 24, 45), dtype=np.float32)
+            _m, _s, _w, triplet_meta = load_artifacts_dir(root, "cnn_lstm_attn")
+
+            shutil.copy(src / BUNDLE_FILE, root / BUNDLE_FILE)
+            self.assertTrue(bundle_matches(root))
+            model, scaler, window, meta = load_artifacts_dir(root, "cnn_lstm_attn")
+            self.assertIsInstance(scaler, MinMaxParams)
+            self.assertEqual((window, meta["feature_order"]), (24, triplet_meta["feature_order"]))
+            np.testing.assert_allclose(meta["predict_fn"](X), triplet_meta["predict_fn"](X), atol=1e-6)
+
+            # Retrained meta.json next to an old bundle: fall back to the files
+            (root / "meta.json").write_text('{"model_version": "v2.0"}')
+            self.assertFalse(bundle_matches(root))
+            with mock.patch("occupancy.ml.loader.bundle_matches", wraps=bundle_matches) as matches:
+                _m, scaler, _w, meta = load_artifacts_dir(root, "cnn_lstm_attn")
+            self.assertEqual(matches.call_count, 1)  # hashed once per load
+            self.assertNotIsInstance(scaler, MinMaxParams)
+            self.assertEqual(meta["model_version"], "v2.0")
+
+
+class LazyMLImportTests(SimpleTestCase):
+    def test_url_conf_does_not_import_tensorflow(self):
+        # Fresh interpreter: this test process may already have Keras loaded
+        code = (
+            "import django, sys; django.setup();"
+            "from django.urls import resolve; resolve('/api/health/'); resolve('/occupancy/forecast/at');"
+            "print(int('tensorflow' in sys.modules or 'keras' in sys.modules))"
+        )
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "wifi_occupancy_prediction_project.settings"}
+        out = subprocess.run([sys.executable, "-c", code], cwd=settings.BASE_DIR, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        self.assertEqual(out.strip().splitlines()[-1], "0")
+
+
+class PreloadTests(TestCase):
+    def setUp(self):
+        lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+        cand = ModelCandidate.objects.create(library=lib, family="cnn_lstm_attn", version="v1.2")
+        ActiveModel.objects.create(library=lib, candidate=cand)
+        Library.objects.create(key="no_such_library", name="Nowhere")
+
+    def test_reports_load_and_warm_times_per_active_model(self):
+        rows = {r["library"]: r for r in preload_active_models(max_workers=2)}
+
+        ok = rows["miguel_pro"]
+        self.assertTrue(ok["ok"])
+        self.assertEqual((ok["family"], ok["version"]), ("cnn_lstm_attn", "v1.2"))
+        self.assertGreaterEqual(ok["load_ms"], 0)
+        self.assertGreaterEqual(ok["warm_ms"], 0)
+
+        missing = rows["no_such_library"]
+        self.assertFalse(missing["ok"])
+        self.assertIn("FileNotFoundError", missing["error"])
+
+    @staticmethod
+    def _gunicorn_conf():
+        spec = importlib.util.spec_from_file_location("gunicorn_conf", Path(settings.BASE_DIR) / "gunicorn.conf.py")
+        conf = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(conf)
+        return conf
+
+    def test_worker_boots_when_preload_fails(self):
+        conf, worker = self._gunicorn_conf(), mock.Mock()
+        with mock.patch.object(conf, "PRELOAD_MODELS", "true"), \
+                mock.patch("occupancy.preload.active_model_keys", side_effect=OperationalError("db down")):
+            conf.post_worker_init(worker)  # logs instead of raising (a raise kills the worker)
+        worker.log.exception.assert_called_once()
+
+    def test_master_survives_when_fork_preload_fails(self):
+        conf, server = self._gunicorn_conf(), mock.Mock()
+        with mock.patch.object(conf, "PRELOAD_MODELS", "fork"), \
+                mock.patch("occupancy.preload.active_model_keys", side_effect=OperationalError("db down")), \
+                mock.patch("gc.freeze"), mock.patch.object(connections, "close_all") as close_all:
+            conf.when_ready(server)
+        close_all.assert_called_once()
+        server.log.exception.assert_called_once()
+
+    def test_numpy_only_checks_the_folder_that_loads(self):
+        self.assertEqual([r["library"] for r in preload_active_models(numpy_only=True)], ["miguel_pro"])
+        with tempfile.TemporaryDirectory() as tmp:  # e.g. a Keras-only <version>/ subfolder
+            (Path(tmp) / "model.keras").write_bytes(b"")
+            with mock.patch("occupancy.preload.REGISTRY") as registry, \
+                    mock.patch("occupancy.preload.load_artifacts_cached") as load:
+                registry.resolve.return_value = Path(tmp)
+                self.assertEqual(preload_active_models(numpy_only=True), [])
+            load.assert_not_called()
+
+
+class SignalHourlyTests(TestCase):
+    T0 = pd.Timestamp("2025-08-04 00:00", tz="UTC")
+
+    def setUp(self):
+        cache.clear()
+        # correction factor 1.5
+        self.lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+
+    def _signal(self, hours, clients):
+        Signal.objects.create(library=self.lib, ts=self.T0 + pd.Timedelta(hours=hours), wifi_clients=clients)
+
+    def _rows(self):
+        return list(SignalHourly.objects.filter(library=self.lib).order_by("hour")
+                    .values_list("raw_max", "corrected", "samples"))
+
+    def test_single_row_saves_keep_rollup_gap_filled(self):
+        self._signal(0, 10)
+        self._signal(1, 3)
+        self._signal(1.5, 7)  # same hour bucket: max wins
+        self._signal(4, 5)
+        self.assertEqual(self._rows(), [(10, 15, 1), (7, 10, 2), (0, 0, 0), (0, 0, 0), (5, 8, 1)])
+
+        Signal.objects.get(ts=self.T0 + pd.Timedelta(hours=1)).delete()
+        self.assertEqual(self._rows(), [(10, 15, 1), (7, 10, 1), (0, 0, 0), (0, 0, 0), (5, 8, 1)])
+
+        Signal.objects.filter(ts=self.T0 + pd.Timedelta(hours=4)).delete()  # queryset delete: rolled up on commit
+        self.assertEqual(rollup_library(self.lib), 2)
+        self.assertEqual(self._rows(), [(10, 15, 1), (7, 10, 1)])
+
+    def test_queryset_delete_rolls_up_once_per_library(self):
+        Signal.objects.bulk_create([Signal(library=self.lib, ts=self.T0 + pd.Timedelta(minutes=20 * i),
+                                           wifi_clients=i % 9) for i in range(60)])
+        rollup_library(self.lib)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            Signal.objects.filter(ts__lt=self.T0 + pd.Timedelta(hours=10)).delete()  # 30 rows, hours 0-9
+        self.assertLess(len(queries), 20)
+        self.assertEqual(self._rows()[:10], [(0, 0, 0)] * 10)
+        self.assertEqual(self._rows()[10], (5, 8, 3))  # i = 30..32
+
+    def test_migration_backfill_matches_rollup(self):
+        backfill = importlib.import_module("occupancy.migrations.0005_backfill_signalhourly").backfill
+        Signal.objects.bulk_create([Signal(library=self.lib, ts=self.T0 + pd.Timedelta(minutes=25 * i),
+                                           wifi_clients=(i * 5) % 11) for i in range(40)]
+                                   + [Signal(library=self.lib, ts=self.T0 + pd.Timedelta(hours=30), wifi_clients=3)])
+        rollup_library(self.lib)
+        expected = self._rows()
+        SignalHourly.objects.all().delete()
+        backfill(django_apps, mock.Mock(connection=connection))
+        self.assertEqual(self._rows(), expected)
+        backfill(django_apps, mock.Mock(connection=connection))  # libraries with a rollup are left alone
+        self.assertEqual(self._rows(), expected)
+
+    def test_deleting_a_library_with_signals(self):
+        for h in range(3):
+            self._signal(h, 4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lib.delete()
+        self.assertFalse(Signal.objects.exists())
+        self.assertFalse(SignalHourly.objects.exists())
+
+    def test_series_reads_corrected_rollup(self):
+        for h, v in ((0, 10), (2, 4)):
+            self._signal(h, v)
+        s = get_series_df(self.lib, hours=5, end_utc=self.T0 + pd.Timedelta(hours=3))
+        self.assertEqual(list(s.index), list(pd.date_range(self.T0 - pd.Timedelta(hours=1), periods=5, freq="h")))
+        self.assertEqual(list(s), [0, 15, 0, 6, 0])
+
+    def test_upload_rolls_up_in_same_request(self):
+        admin = get_user_model().objects.create_user(email="admin@example.com", role="admin", password="x")
+        client = APIClient()
+        client.force_authenticate(admin)
+        csv = ("Start_dt,Client MAC\n"
+               "04/08/2025 08:05,a\n04/08/2025 08:40,b\n04/08/2025 10:10,a\n")
+        resp = client.post("/occupancy/uploads/cleaned-wifi/", {
+            "library": "miguel_pro", "file": SimpleUploadedFile("w.csv", csv.encode()),
+        }, format="multipart")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self._rows(), [(2, 3, 1), (0, 0, 0), (1, 2, 1)])
+
+        hist = client.get("/occupancy/history/day", {"library": "miguel_pro", "date": "2025-08-04"}).json()
+        self.assertEqual([p["actual"] for p in hist["points"]], [2, 1])
+
+
+class SeriesCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+        self.now = pd.Timestamp.now(tz="UTC").floor("h")
+
+    def _signal(self, hours_ago, clients):
+        Signal.objects.create(library=self.lib, ts=self.now - pd.Timedelta(hours=hours_ago), wifi_clients=clients)
+
+    def test_second_read_is_served_from_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._signal(2, 10)
+        first = get_series_df(self.lib, hours=4, end_utc=self.now)
+        with self.assertNumQueries(0):
+            again = get_series_df(self.lib, hours=4, end_utc=self.now)
+        self.assertEqual(list(first), [0, 15, 0, 0])
+        pd.testing.assert_series_equal(first, again)
+
+    def test_ingest_patches_cached_hours(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._signal(3, 10)
+        get_series_df(self.lib, hours=4, end_utc=self.now)
+        patches = series_cache.stats()["patches"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self._signal(1, 4)
+        self.assertEqual(series_cache.stats()["patches"], patches + 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(list(get_series_df(self.lib, hours=4, end_utc=self.now)), [15, 0, 6, 0])
+
+    def test_rolls_forward_reading_only_new_hours(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._signal(1, 2)
+        get_series_df(self.lib, hours=3, end_utc=self.now)
+        SignalHourly.objects.create(library=self.lib, hour=self.now + pd.Timedelta(hours=1),
+                                    raw_max=4, corrected=6, samples=1)
+        next_hour = series_cache._hour_no(self.now) + 1
+        with mock.patch.object(series_cache, "_now_hour", return_value=next_hour), self.assertNumQueries(1):
+            s = get_series_df(self.lib, hours=3, end_utc=self.now + pd.Timedelta(hours=1))
+        self.assertEqual(list(s), [3, 0, 6])
+        self.assertEqual(series_cache._get(self.lib)[0], next_hour)
+
+    def test_future_hours_do_not_move_the_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._signal(1, 2)
+        get_series_df(self.lib, hours=3, end_utc=self.now)
+        far = self.now + pd.Timedelta(days=20)  # e.g. forecast/day for a date weeks ahead
+        self.assertEqual(get_series_df(self.lib, hours=48, end_utc=far).sum(), 0)
+        get_series_df(self.lib, hours=48, end_utc=self.now + pd.Timedelta(hours=5))
+        self.assertEqual(series_cache._get(self.lib)[0], series_cache._hour_no(self.now))
+        with self.assertNumQueries(0):
+            self.assertEqual(list(get_series_df(self.lib, hours=3, end_utc=self.now)), [0, 3, 0])
+
+
+class ForecastCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        forecast_cache.reset_stats()
+        self.lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+        cand = ModelCandidate.objects.create(library=self.lib, family="cnn", version="v1")
+        ActiveModel.objects.create(library=self.lib, candidate=cand)
+        now = pd.Timestamp.now(tz="UTC").floor("h")
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.objects.bulk_create([Signal(library=self.lib, ts=now - pd.Timedelta(hours=h), wifi_clients=h % 9)
+                                        for h in range(48)])
+            rollup_library(self.lib)
+        self.client = APIClient()
+        self.tomorrow = (pd.Timestamp.now(tz="Asia/Manila") + pd.Timedelta(days=1)).date().isoformat()
+
+    def _day(self):
+        with mock.patch.object(views_forecast, "_forecast_steps", wraps=views_forecast._forecast_steps) as steps:
+            resp = self.client.get("/occupancy/forecast/day", {"library": "miguel_pro", "date": self.tomorrow})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json(), steps.call_count
+
+    def test_identical_requests_hit_until_watermark_or_model_moves(self):
+        first, runs = self._day()
+        self.assertGreater(runs, 0)
+        again, runs = self._day()
+        self.assertEqual((again, runs), (first, 0))
+        self.assertEqual(forecast_cache.stats()["hit_ratio"], 0.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.objects.create(library=self.lib, ts=pd.Timestamp.now(tz="UTC"), wifi_clients=30)
+        self.assertGreater(self._day()[1], 0)
+        self.assertEqual(self._day()[1], 0)
+
+        other = ModelCandidate.objects.create(library=self.lib, family="lstm", version="v1")
+        ActiveModel.objects.update_or_create(library=self.lib, defaults={"candidate": other})
+        body, runs = self._day()
+        self.assertGreater(runs, 0)
+        self.assertEqual(body["model_family"], "lstm")
+
+    def test_errors_are_not_cached(self):
+        resp = self.client.get("/occupancy/forecast/day", {"library": "miguel_pro", "date": "not-a-date"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(forecast_cache.stats()["stores"], 0)
+
+
+class SingleFlightTests(TransactionTestCase):
+    """Requests run in threads with their own DB connections, so the data must be committed."""
+
+    def setUp(self):
+        cache.clear()
+        forecast_cache.reset_stats()
+        self.lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+        cand = ModelCandidate.objects.create(library=self.lib, family="cnn", version="v1")
+        ActiveModel.objects.create(library=self.lib, candidate=cand)
+        now = pd.Timestamp.now(tz="UTC").floor("h")
+        Signal.objects.bulk_create([Signal(library=self.lib, ts=now - pd.Timedelta(hours=h), wifi_clients=h % 9)
+                                    for h in range(48)])
+        rollup_library(self.lib)
+        self.params = {"library": "miguel_pro",
+                       "date": (pd.Timestamp.now(tz="Asia/Manila") + pd.Timedelta(days=1)).date().isoformat()}
+
+    def test_concurrent_identical_requests_run_the_model_once(self):
+        n = 8
+        calls, results = [], [None] * n
+        start = threading.Barrier(n)
+        day_rollout = views_forecast.day_rollout
+
+        def slow_rollout(*args):
+            calls.append(args)
+            time.sleep(0.3)  # long enough for every duplicate to arrive
+            return day_rollout(*args)
+
+        def request(i):
+            try:
+                start.wait()
+                resp = APIClient().get("/occupancy/forecast/day", self.params)
+                results[i] = (resp.status_code, resp.json())
+            finally:
+                connections.close_all()
+
+        with mock.patch.object(views_forecast, "day_rollout", slow_rollout):
+            threads = [threading.Thread(target=request, args=(i,)) for i in range(n)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({status for status, _ in results}, {200})
+        self.assertTrue(all(body == results[0][1] for _, body in results))
+        stats = forecast_cache.stats()
+        self.assertEqual((stats["misses"], stats["coalesced"]), (1, n - 1))
+
+    def test_waits_for_the_worker_holding_the_lock(self):
+        key = forecast_cache._request_key("day", QueryDict(urlencode(self.params)), ("date",))
+        self.assertTrue(cache.add(forecast_cache._lock_key(key), 12345))  # another worker is computing
+        body = {"ok": True, "points": [], "from": "other worker"}
+        threading.Timer(0.2, lambda: cache.set(key, body)).start()
+
+        with mock.patch.object(views_forecast, "day_rollout") as rollout:
+            resp = APIClient().get("/occupancy/forecast/day", self.params)
+        self.assertEqual(resp.json(), body)
+        rollout.assert_not_called()
+        self.assertEqual(forecast_cache.stats()["coalesced_remote"], 1)
+
+    def test_failing_leader_releases_its_lock_and_flight(self):
+        params = QueryDict(urlencode(self.params))
+        key = forecast_cache._request_key("boom", params, ("date",))
+
+        def get(_self, _request):
+            raise RuntimeError("boom")
+
+        async def aget(_self, _request):
+            raise RuntimeError("boom")
+
+        runs = {"sync": lambda: forecast_cache.cached_forecast("boom", "date")(get)(
+                    None, mock.Mock(query_params=params)),
+                "async": lambda: async_to_sync(forecast_cache.acached_forecast("boom", "date")(aget))(
+                    None, mock.Mock(GET=params))}
+        for path, run in runs.items():
+            with self.subTest(path=path), self.assertRaises(RuntimeError):
+                run()
+            self.assertIsNone(cache.get(forecast_cache._lock_key(key)))
+            self.assertNotIn(key, forecast_cache._FLIGHTS)
+
+
+class ProfileTests(TestCase):
+    def test_profile_is_dense_local_weekday_by_hour(self):
+        lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+        # A Sunday 20:00 UTC two weeks back is Monday 04:00 in Manila
+        sunday = (pd.Timestamp.now(tz="UTC").normalize() - pd.Timedelta(weeks=2)).to_period("W-SUN").end_time
+        base = sunday.normalize().tz_localize("UTC") + pd.Timedelta(hours=20)
+        for ts, raw in ((base, 10), (base - pd.Timedelta(weeks=1), 13), (base + pd.Timedelta(hours=1), 4)):
+            SignalHourly.objects.create(library=lib, hour=ts, raw_max=raw, corrected=raw, samples=1)
+        SignalHourly.objects.create(library=lib, hour=base + pd.Timedelta(hours=2), raw_max=99, corrected=99, samples=0)
+
+        prof = views_forecast.build_profile(lib)
+        self.assertEqual(prof.shape, (7, 24))
+        self.assertEqual((prof[0, 4], prof[0, 5]), (12, 4))  # mean(10, 13) = 11.5 rounds half to even
+        self.assertEqual(int(prof.sum()), 16)
+        self.assertEqual(views_forecast.profile_lookup(prof, base), 12)
+        idx = pd.date_range(base, periods=3, freq="h")
+        self.assertEqual(list(views_forecast.profile_values(prof, idx)), [12, 4, 0])
+        self.assertIsNone(views_forecast.build_profile(Library.objects.create(key="x", name="X")))
+
+
+class ProfileCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+        self.now = pd.Timestamp.now(tz="UTC").floor("h")
+        rng = np.random.default_rng(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.objects.bulk_create([
+                Signal(library=self.lib, ts=self.now - pd.Timedelta(hours=h), wifi_clients=int(rng.integers(0, 40)))
+                for h in range(0, 24 * 7 * 9, 5)])
+            rollup_library(self.lib)
+
+    def _fresh(self, now_utc):
+        cache.delete(profile_cache._key(self.lib))
+        return profile_cache.get_profile(self.lib, now_utc)
+
+    def test_matches_database_aggregate(self):
+        np.testing.assert_array_equal(profile_cache.get_profile(self.lib), views_forecast.build_profile(self.lib))
+
+    def test_ingest_updates_cached_profile_without_rescan(self):
+        profile_cache.get_profile(self.lib, self.now)
+        before = profile_cache.stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.objects.create(library=self.lib, ts=self.now - pd.Timedelta(hours=1), wifi_clients=500)
+        with self.assertNumQueries(0):
+            patched = profile_cache.get_profile(self.lib, self.now)
+        after = profile_cache.stats()
+        self.assertEqual((after["patches"], after["rebuilds"]), (before["patches"] + 1, before["rebuilds"]))
+        np.testing.assert_array_equal(patched, self._fresh(self.now))
+
+    def test_window_rolls_forward_and_stale_stamp_rebuilds(self):
+        profile_cache.get_profile(self.lib, self.now)
+        later = self.now + pd.Timedelta(days=10)
+        with self.assertNumQueries(0):
+            rolled = profile_cache.get_profile(self.lib, later)
+        np.testing.assert_array_equal(rolled, self._fresh(later))
+
+        forecast_cache.bump_data(self.lib.key)  # e.g. an update this worker never saw
+        rebuilds = profile_cache.stats()["rebuilds"]
+        profile_cache.get_profile(self.lib, self.now)
+        self.assertEqual(profile_cache.stats()["rebuilds"], rebuilds + 1)
+
+
+class _ServedLibraryFixture:
+    """miguel_pro serving an active cnn/v1 model, with 71 h of signals up to the current hour rolled up."""
+
+    @staticmethod
+    def clients(hours_ago: int) -> int:
+        return hours_ago % 7 + 1
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+        cand = ModelCandidate.objects.create(library=self.lib, family="cnn", version="v1")
+        ActiveModel.objects.create(library=self.lib, candidate=cand)
+        self.now = pd.Timestamp.now(tz="UTC").floor("h")
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.objects.bulk_create([Signal(library=self.lib, ts=self.now - pd.Timedelta(hours=h),
+                                               wifi_clients=self.clients(h)) for h in range(1, 72)])
+            rollup_library(self.lib)
+        self.client = APIClient()
+        self.today = pd.Timestamp.now(tz="Asia/Manila").date().isoformat()
+
+
+class ForecastStoreTests(_ServedLibraryFixture, TestCase):
+    def _get(self, path, **params):
+        cache.clear()  # bypass the response cache
+        with mock.patch.object(views_forecast, "_forecast_steps", wraps=views_forecast._forecast_steps) as steps:
+            resp = self.client.get(path, {"library": "miguel_pro", **params})
+        self.assertEqual(resp.status_code, 200)
+        return resp.json(), steps.call_count
+
+    def test_views_serve_stored_runs_identical_to_live(self):
+        live, _ = self._get("/occupancy/forecast/day", date=self.today)
+        report = forecast_store.compute_forecasts(max_workers=2)
+        self.assertEqual(report[0]["rows"], 24 + 2 * 24)
+
+        stored, runs = self._get("/occupancy/forecast/day", date=self.today)
+        self.assertEqual(runs, 0)
+        self.assertEqual(stored["points"], live["points"])
+
+        when = (self.now + pd.Timedelta(hours=2)).tz_convert("Asia/Manila").strftime("%Y-%m-%d %H:%M")
+        at, runs = self._get("/occupancy/forecast/at", when=when)
+        self.assertEqual((at["mode"], at["stale"], at["from_store"], runs), ("live", False, True, 0))
+
+        # Further out the live path seeds from the profile first, which a stored run does not do
+        when = (self.now + pd.Timedelta(hours=5)).tz_convert("Asia/Manila").strftime("%Y-%m-%d %H:%M")
+        at, _runs = self._get("/occupancy/forecast/at", when=when)
+        self.assertEqual((at["mode"], at["stale"], at["from_store"]), ("seeded", True, False))
+
+    def test_rolling_run_based_at_local_midnight_is_stored_once(self):
+        midnight = pd.Timestamp(self.today, tz="Asia/Manila").tz_convert("UTC")
+        day_history = views_forecast.day_history
+        upsert = Forecast.objects.bulk_create
+        with mock.patch.object(views_forecast, "rolling_history",
+                               side_effect=lambda lib, window: day_history(lib, window, midnight)), \
+                mock.patch.object(Forecast.objects, "bulk_create", wraps=upsert) as bulk_create:
+            report = forecast_store.compute_forecasts()
+        rows = bulk_create.call_args.args[0]
+        keys = {(f.library_id, f.ts, f.horizon_min, f.model_version, f.model_family) for f in rows}
+        self.assertEqual(len(keys), len(rows))
+        self.assertEqual(report[0]["rows"], 2 * 24)
+        self.assertIsNotNone(forecast_store.load_run(self.lib, "cnn", "v1", midnight, 24))
+
+    def test_runs_from_an_earlier_hour_are_stale(self):
+        forecast_store.compute_forecasts()
+        self.assertIsNotNone(forecast_store.load_run(self.lib, "cnn", "v1", self.now, 24))
+        # Under FORECAST_STORE_MAX_AGE old, but written before this hour's post-processing caps applied
+        hour_start = timezone.now().replace(minute=0, second=0, microsecond=0)
+        Forecast.objects.update(created_at=hour_start - timedelta(seconds=1))
+        self.assertIsNone(forecast_store.load_run(self.lib, "cnn", "v1", self.now, 24))
+
+    def test_new_data_makes_stored_runs_stale(self):
+        forecast_store.compute_forecasts()
+        self.assertIsNotNone(forecast_store.load_run(self.lib, "cnn", "v1", self.now, 24))
+        with self.captureOnCommitCallbacks(execute=True):
+            Signal.objects.create(library=self.lib, ts=self.now, wifi_clients=3)
+        self.assertIsNone(forecast_store.load_run(self.lib, "cnn", "v1", self.now, 24))
+        _body, runs = self._get("/occupancy/forecast/day", date=self.today)
+        self.assertGreater(runs, 0)
+
+
+class BacktestTests(TestCase):
+    def setUp(self):
+        ROLLOUTS.clear()
+        self.lib = Library.objects.create(key="miguel_pro", name="Miguel Pro")
+        Library.objects.create(key="american_corner", name="American Corner")  # no data
+        self.cands = [ModelCandidate.objects.create(library=self.lib, family=f, version="v1")
+                      for f in ("cnn", "cnn_lstm_attn")]
+        ModelCandidate.objects.create(library=Library.objects.get(key="american_corner"), family="cnn")
+        now = pd.Timestamp.now(tz="UTC").floor("h")
+        Signal.objects.bulk_create([Signal(library=self.lib, ts=now - pd.Timedelta(hours=h), wifi_clients=(h * 7) % 23)
+                                    for h in range(72)])
+        rollup_library(self.lib)
+
+    def test_scores_match_walk_forward_from_every_origin(self):
+        idx = pd.date_range("2025-08-10", periods=60, freq="h", tz="UTC")
+        vals = np.random.default_rng(7).integers(0, 60, size=60).astype(float)
+        for family in ("cnn", "cnn_lstm_attn"):
+            artifacts = load_artifacts_cached(family, "miguel_pro", "v1")
+            model, scaler, window, meta = artifacts
+            for steps in (1, 4):
+                with self.subTest(family=family, steps=steps):
+                    got = backtest.score(artifacts, "miguel_pro", idx, vals, steps, stride=3)
+                    origins = range(window, len(vals) - steps + 1, 3)
+                    ROLLOUTS.clear()
+                    pred = np.stack([walk_forward(model, scaler, window, vals[o - window:o], steps, idx[o - window:o],
+                                                  meta, "miguel_pro") for o in origins])
+                    actual = np.stack([vals[o:o + steps] for o in origins])
+                    self.assertEqual(got["origins"], len(origins))
+                    self.assertAlmostEqual(got["mse"], float(np.mean((actual - pred) ** 2)), places=3)
+
+    def test_metrics(self):
+        m = backtest.metrics(np.array([1.0, 2.0, 3.0]), np.array([1.0, 2.0, 5.0]))
+        self.assertEqual((m["n"], m["mse"]), (3, 4 / 3))
+        self.assertAlmostEqual(m["r2"], 1 - 4 / 2)
+        self.assertIsNone(backtest.metrics(np.ones(4), np.zeros(4))["r2"])
+
+    def test_run_stores_one_evaluation_per_candidate_and_horizon(self):
+        report = backtest.run_backtest(days=3, horizons=(1, 24), max_workers=1)
+        self.assertEqual(len(report), 6)
+        skipped = [r for r in report if r["skipped"]]
+        self.assertEqual({r["library"] for r in skipped}, {"american_corner"})
+        self.assertFalse([r for r in report if r["error"]])
+        evals = ModelEvaluation.objects.filter(candidate__in=self.cands).order_by("candidate_id", "notes")
+        self.assertEqual(evals.count(), 4)
+        for e in evals:
+            self.assertIsNotNone(e.rmse)
+            self.assertAlmostEqual(e.rmse ** 2, e.mse, places=6)
+            self.assertRegex(e.notes, r"^backtest horizon=(1|24)h origins=\d+ stride=1h span=")
+        self.assertEqual(ModelCandidate.objects.get(library__key="american_corner").evaluations.count(), 0)
+
+    def test_dry_run_and_process_pool(self):
+        inline = backtest.run_backtest(["miguel_pro"], ["cnn"], days=3, max_workers=1, save=False)
+        pooled = backtest.run_backtest(["miguel_pro"], ["cnn"], days=3, max_workers=2, save=False)
+        self.assertEqual(ModelEvaluation.objects.count(), 0)
+        self.assertEqual([(r["horizon"], r["mse"]) for r in inline], [(r["horizon"], r["mse"]) for r in pooled])
+
+
+class ForecastAtBatchTests(_ServedLibraryFixture, TestCase):
+    def _get(self, whens):
+        cache.clear()
+        with mock.patch.object(views_forecast, "_forecast_steps", wraps=views_forecast._forecast_steps) as steps:
+            resp = self.client.get("/occupancy/forecast/at", {"library": "miguel_pro", "when": whens})
+        return resp, steps.call_count
+
+    def _local(self, hours):
+        return (self.now + pd.Timedelta(hours=hours)).tz_convert("Asia/Manila").strftime("%Y-%m-%d %H:%M")
+
+    def test_points_match_single_requests(self):
+        whens = [self._local(h) for h in (30, 2, 5, 1, 12)]
+        resp, runs = self._get(",".join(whens))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(runs, 1)  # one live rollout shared by the +1 h and +2 h targets
+        points = resp.json()["points"]
+        self.assertEqual([p["mode"] for p in points], ["live", "live", "seeded", "seeded", "profile"])
+        self.assertEqual([p["requested_utc"] for p in points], sorted(p["requested_utc"] for p in points))
+
+        for when, point in zip(sorted(whens), points):
+            single, _ = self._get(when)
+            self.assertEqual((single.json()["mode"], single.json()["prediction"]), (point["mode"], point["prediction"]))
+
+    def test_repeated_params_and_limit(self):
+        resp, _ = self._get([self._local(1), self._local(3)])
+        self.assertEqual(len(resp.json()["points"]), 2)
+        resp, _ = self._get([self._local(h) for h in range(1, 50)])
+        self.assertEqual(resp.status_code, 400)
+
+
+class ForecastRangeTests(_ServedLibraryFixture, TestCase):
+    @staticmethod
+    def clients(hours_ago: int) -> int:
+        return hours_ago % 5
+
+    def setUp(self):
+        super().setUp()
+        self.today = pd.Timestamp.now(tz="Asia/Manila").normalize()
+
+    def _get(self, path, **params):
+        with mock.patch.object(views_forecast, "_forecast_steps", wraps=views_forecast._forecast_steps) as steps:
+            resp = self.client.get(path, {"library": "miguel_pro", **params})
+        return resp, steps
+
+    def test_one_rollout_sliced_per_day(self):
+        end = (self.today + pd.Timedelta(days=6)).date().isoformat()
+        resp, steps = self._get("/occupancy/forecast/range", start=self.today.date().isoformat(), end=end)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([c.args[4] for c in steps.call_args_list], [24 * 7])
+        days = resp.json()["days"]
+        self.assertEqual(len(days), 7)
+        self.assertEqual(days[6]["date_local"], end)
+        self.assertTrue(all(len(d["points"]) == 24 for d in days))
+
+        day, _ = self._get("/occupancy/forecast/day", date=self.today.date().isoformat())
+        self.assertEqual(days[0]["points"], day.json()["points"])
+
+    def test_rejects_inverted_or_oversized_spans(self):
+        d = self.today.date()
+        for start, end in ((d, d - pd.Timedelta(days=1)), (d, d + pd.Timedelta(days=120))):
+            resp, _ = self._get("/occupancy/forecast/range", start=str(start), end=str(end))
+            self.assertEqual(resp.status_code, 400)
+
+
+class CampusForecastTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = pd.Timestamp.now(tz="UTC").floor("h")
+        for key, family in (("miguel_pro", "cnn_lstm_attn"), ("american_corner", "cnn_lstm_attn"),
+                            ("gisbert_2nd_floor", "cnn_lstm")):
+            lib = Library.objects.create(key=key, name=key.replace("_", " ").title())
+            cand = ModelCandidate.objects.create(library=lib, family=family, version="v1")
+            ActiveModel.objects.create(library=lib, candidate=cand)
+            with self.captureOnCommitCallbacks(execute=True):
+                Signal.objects.bulk_create([Signal(library=lib, ts=now - pd.Timedelta(hours=h), wifi_clients=h % 7)
+                                            for h in range(0, 48)])
+                rollup_library(lib)
+        self.client = APIClient()
+
+    def _get(self, **params):
+        return self.client.get("/occupancy/forecast/campus", params)
+
+    def test_every_library_with_utilization(self):
+        resp = self._get(hours=4)
+        self.assertEqual(resp.status_code, 200)
+        libs = {row["library"]: row for row in resp.json()["libraries"]}
+        self.assertEqual(set(libs), {"miguel_pro", "american_corner", "gisbert_2nd_floor"})
+
+        self.assertIn("error", libs["gisbert_2nd_floor"])  # no cnn_lstm artifacts shipped
+        for key in ("miguel_pro", "american_corner"):
+            row = libs[key]
+            self.assertEqual(len(row["next"]), 4)
+            self.assertEqual(row["current_utilization"], round(row["current"] / row["capacity"], 3))
+            for point in row["next"]:
+                self.assertAlmostEqual(point["utilization"], point["predicted"] / row["capacity"], delta=0.01)
+
+    def test_rejects_bad_hours(self):
+        for hours in ("0", "25", "x"):
+            self.assertEqual(self._get(hours=hours).status_code, 400)
+
+
+class AsyncViewTests(_ServedLibraryFixture, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+
+    @staticmethod
+    def _strip(body):
+        body.pop("generated_at", None)
+        return body
+
+    def _sync(self, path, **params):
+        cache.clear()
+        resp = self.client.get(path, params)
+        return resp.status_code, self._strip(resp.json())
+
+    async def _async(self, view, **params):
+        await cache.aclear()
+        resp = await view.as_view()(self.factory.get("/", params))
+        return resp.status_code, self._strip(json.loads(resp.content))
+
+    async def test_same_responses_as_sync_views(self):
+        when = ",".join((self.now + pd.Timedelta(hours=h)).tz_convert("Asia/Manila").strftime("%Y-%m-%d %H:%M")
+                        for h in (1, 5, 30))
+        cases = [
+            ("/occupancy/forecast/day", views_async.ForecastDayView, {"library": "miguel_pro", "date": self.today}),
+            ("/occupancy/forecast/at", views_async.ForecastAtView, {"library": "miguel_pro", "when": when}),
+            ("/occupancy/history/day", views_async.HistoryDayView, {"library": "miguel_pro", "date": self.today}),
+            ("/occupancy/forecast/day", views_async.ForecastDayView, {"library": "nope", "date": self.today}),
+            ("/occupancy/forecast/at", views_async.ForecastAtView, {"library": "miguel_pro"}),
+            ("/occupancy/history/day", views_async.HistoryDayView, {"library": "miguel_pro", "date": "x"}),
+        ]
+        statuses = []
+        for path, view, params in cases:
+            expected = await sync_to_async(self._sync)(path, **params)
+            self.assertEqual(await self._async(view, **params), expected, path)
+            statuses.append(expected[0])
+        self.assertEqual(statuses, [200, 200, 200, 404, 400, 400])
+
+    async def test_history_is_served_while_a_rollout_runs(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_rollout(*args):
+            started.set()
+            release.wait(5)
+            return np.zeros(24)
+
+        with mock.patch.object(views_async, "day_rollout", slow_rollout):
+            forecast = asyncio.ensure_future(self._async(views_async.ForecastDayView, library="miguel_pro",
+                                                         date=self.today))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            status, body = await self._async(views_async.HistoryDayView, library="miguel_pro", date=self.today)
+            self.assertEqual(status, 200)
+            self.assertFalse(forecast.done())
+            self.assertGreaterEqual(inference_pool.stats()["running"], 1)
+            release.set()
+            status, _ = await forecast
+        self.assertEqual(status, 200)
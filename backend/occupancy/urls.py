@@ -4,6 +4,10 @@ from . import views
 from . import views_uploads
 from . import views_forecast
 from . import views_models
+from . import views_async
+
+# ASGI deployments serve these three from views_async (same responses, model work off the event loop)
+_live = views_async if views_async.ASYNC_VIEWS else views_forecast
 
 router = DefaultRouter()
 router.register(r"libraries", views.LibraryViewSet, basename="library")
@@ -15,9 +19,11 @@ router.register(r"active", views.ActiveModelViewSet, basename="active-model")
 urlpatterns = [
     path("", include(router.urls)),
     path("uploads/cleaned-wifi/", views_uploads.CleanedWifiCsvUploadView.as_view()),
-    path("forecast/at", views_forecast.ForecastAtView.as_view()),
-    path("forecast/day", views_forecast.ForecastDayView.as_view()),
-    path("history/day", views_forecast.HistoryDayView.as_view()),
+    path("forecast/at", _live.ForecastAtView.as_view()),
+    path("forecast/day", _live.ForecastDayView.as_view()),
+    path("forecast/range", views_forecast.ForecastRangeView.as_view()),
+    path("forecast/campus", views_forecast.CampusForecastView.as_view()),
+    path("history/day", _live.HistoryDayView.as_view()),
     path("models/active/", views_models.ActivePerLibraryView.as_view()),
     path("models/sync/", views_models.SyncCandidatesView.as_view()),
     path("models/candidates/", views_models.ModelCandidatesView.as_view()),
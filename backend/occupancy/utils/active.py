@@ -1,5 +1,5 @@
 # occupancy/utils/active.py
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
 from django.db.models import Prefetch
 from ..models import ActiveModel, ModelCandidate, Library
 
@@ -33,4 +33,40 @@ def get_active_family_version(library: Library) -> Tuple[str, str]:
         return row.family, row.version
 
     # 3) Hard default
-    return DEFAULT_FAMILY, DEFAULT_VERSION
\ No newline at end of file
+    return DEFAULT_FAMILY, DEFAULT_VERSION
+
+async def aget_active_family_version(library: Library) -> Tuple[str, str]:
+    """get_active_family_version through the async ORM."""
+    am = await (ActiveModel.objects
+                .select_related("candidate")
+                .filter(library=library)
+                .afirst())
+    if am is not None and am.candidate:
+        return am.candidate.family, am.candidate.version
+
+    row = await (ModelCandidate.objects
+                 .filter(library=library)
+                 .order_by("-created_at")
+                 .afirst())
+    if row:
+        return row.family, row.version
+
+    return DEFAULT_FAMILY, DEFAULT_VERSION
+
+def get_active_family_versions(libraries) -> Dict[int, Tuple[str, str]]:
+    """
+    get_active_family_version for many libraries in two queries:
+    {library pk: (family, version)}, same fallbacks.
+    """
+    pks = [lib.pk for lib in libraries]
+    out: Dict[int, Tuple[str, str]] = {}
+    for am in ActiveModel.objects.select_related("candidate").filter(library_id__in=pks):
+        if am.candidate:
+            out[am.library_id] = (am.candidate.family, am.candidate.version)
+    missing = [pk for pk in pks if pk not in out]
+    if missing:
+        for row in ModelCandidate.objects.filter(library_id__in=missing).order_by("-created_at"):
+            out.setdefault(row.library_id, (row.family, row.version))
+    for pk in pks:
+        out.setdefault(pk, (DEFAULT_FAMILY, DEFAULT_VERSION))
+    return out
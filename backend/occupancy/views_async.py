@@ -0,0 +1,154 @@
+# occupancy/views_async.py
+"""
+Async versions of forecast/at, forecast/day and history/day for ASGI
+workers (see README). They return the same bodies as the DRF views in
+views_forecast and share their response cache entries, but never block the
+worker for a rollout:
+
+  - libraries, active models and history rows come through the async ORM
+  - series/store/profile lookups (Django cache, then SignalHourly) run
+    through sync_to_async, on the thread the async ORM uses
+  - artifact loading and the rollout itself go to inference_pool, a bounded
+    thread pool, so the event loop keeps serving health and history requests
+    while a long forecast runs
+
+ASYNC_VIEWS=true mounts them on the regular URLs (occupancy/urls.py).
+"""
+from __future__ import annotations
+
+import os
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+
+from . import forecast_store
+from .forecast_cache import acached_forecast
+from .inference_pool import run_model
+from .infer import load_artifacts_cached
+from .models import Library
+from .utils.active import aget_active_family_version
+from .views_forecast import (FAMILIES, ForecastAtView as _SyncForecastAtView, _when_params, at_inputs, at_points,
+                             at_response, day_history, day_response, day_rollout, history_bounds, history_points,
+                             history_rows, parse_local_date, parse_local_dt, rolling_history)
+
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "false").lower() == "true"
+
+
+def _detail(message: str, status: int) -> JsonResponse:
+    return JsonResponse({"detail": message}, status=status)
+
+
+async def _library(lib_key: str):
+    """The Library, or a 404 response shaped like DRF's."""
+    try:
+        return await Library.objects.aget(key=lib_key)
+    except Library.DoesNotExist:
+        return _detail("No Library matches the given query.", 404)
+
+
+async def _family_version(lib: Library, params):
+    """Requested family/version, defaulting to the active model; a 400 response for an unknown family."""
+    family_q = (params.get("family") or "").strip() or None
+    version_q = (params.get("version") or "").strip() or None
+    fam_default, ver_default = await aget_active_family_version(lib)
+    family = family_q or fam_default
+    if family not in FAMILIES:
+        return _detail(f"Unknown model family: {family}", 400)
+    return family, version_q or ver_default
+
+
+class ForecastAtView(View):
+    MAX_POINTS = _SyncForecastAtView.MAX_POINTS
+
+    @acached_forecast("at", "when")
+    async def get(self, request):
+        lib_key = (request.GET.get("library") or "").strip()
+        when_list = _when_params(request.GET)
+        if not lib_key or not when_list:
+            return _detail("Missing 'library' or 'when'.", 400)
+        if len(when_list) > self.MAX_POINTS:
+            return _detail(f"At most {self.MAX_POINTS} 'when' values per request.", 400)
+
+        lib = await _library(lib_key)
+        if isinstance(lib, JsonResponse):
+            return lib
+        resolved = await _family_version(lib, request.GET)
+        if isinstance(resolved, JsonResponse):
+            return resolved
+        family, version = resolved
+
+        try:
+            whens_utc = sorted({parse_local_dt(w).tz_convert("UTC") for w in when_list})
+        except ValueError as e:
+            return _detail(str(e), 400)
+
+        model, scaler, window, meta = await run_model(load_artifacts_cached, family, lib.key, version)
+        history = await sync_to_async(rolling_history)(lib, window)
+        stored, profile = await sync_to_async(at_inputs)(lib, family, version, window, history, whens_utc)
+        points = await run_model(at_points, model, scaler, window, meta, lib.key, history, whens_utc,
+                                 stored, profile)
+        return JsonResponse(at_response(lib, family, window, meta, history, len(when_list) == 1, whens_utc,
+                                        points), status=200)
+
+
+class ForecastDayView(View):
+    @acached_forecast("day", "date")
+    async def get(self, request):
+        lib_key = (request.GET.get("library") or "").strip()
+        date_s = request.GET.get("date")
+        if not lib_key or not date_s:
+            return _detail("Missing 'library' or 'date'.", 400)
+
+        lib = await _library(lib_key)
+        if isinstance(lib, JsonResponse):
+            return lib
+        resolved = await _family_version(lib, request.GET)
+        if isinstance(resolved, JsonResponse):
+            return resolved
+        family, version = resolved
+
+        try:
+            day_local = parse_local_date(date_s)
+        except ValueError as e:
+            return _detail(str(e), 400)
+        start_utc = day_local.tz_convert("UTC")
+
+        # Rows precomputed by compute_forecasts, while they still match the data
+        out_vals = await sync_to_async(forecast_store.load_run)(lib, family, version, start_utc, 24)
+        if out_vals is not None:
+            last_known = start_utc
+        else:
+            model, scaler, window, meta = await run_model(load_artifacts_cached, family, lib.key, version)
+            history = await sync_to_async(day_history)(lib, window, start_utc)
+            if len(history) < int(window):
+                return _detail("Not enough history to predict.", 422)
+            last_known = history.index[-1]
+            out_vals = await run_model(day_rollout, model, scaler, window, meta, lib.key, history, start_utc)
+
+        return JsonResponse(day_response(lib, day_local, out_vals, family, version, last_known), status=200)
+
+
+class HistoryDayView(View):
+    async def get(self, request):
+        lib_key = request.GET.get("library")
+        date_s = request.GET.get("date")
+        if not lib_key or not date_s:
+            return _detail("Missing 'library' or 'date'.", 400)
+
+        lib = await _library(lib_key)
+        if isinstance(lib, JsonResponse):
+            return lib
+
+        bounds = history_bounds(date_s)
+        if bounds is None:
+            return _detail("Invalid date.", 400)
+        day_local, start_utc, end_utc = bounds
+
+        rows = [row async for row in history_rows(lib, start_utc, end_utc)]
+        return JsonResponse({
+            "ok": True,
+            "library": lib.key,
+            "date_local": day_local.date().isoformat(),
+            "points": history_points(rows),
+        }, status=200)
@@ -1,19 +1,24 @@
 from __future__ import annotations
 
-from functools import lru_cache
 from typing import Optional, cast
+from zoneinfo import ZoneInfo
 
 import numpy as np
 import pandas as pd
+from django.db.models import Avg
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .infer import get_series_df, load_artifacts_cached, walk_forward, ensure_dt_index_tz
-from .models import Library, Signal
-from .utils.active import get_active_family_version
+from . import forecast_store, profile_cache
+from .forecast_cache import cached_forecast
+from .infer import (LIBRARY_CAPACITIES, get_series_df, load_artifacts_cached, walk_forward, walk_forward_many,
+                    ensure_dt_index_tz)
+from .models import Library, SignalHourly
+from .utils.active import get_active_family_version, get_active_family_versions
 
 # If your clean_choice requires defaults, we’ll validate manually instead.
 FAMILIES = {"cnn", "lstm", "cnn_lstm", "cnn_lstm_attn"}
@@ -36,50 +41,48 @@ def parse_local_date(s: str) -> pd.Timestamp:
     return ts
 
 # -------------------- profile fallback --------------------
-def build_profile(library: Library, weeks: int = 8) -> Optional[pd.Series]:
-    qs = Signal.objects.filter(library=library).values_list("ts", "wifi_clients")
-    df = pd.DataFrame(qs, columns=["ts", "wifi"])
-    if df.empty:
-        return None
-
-    ts_local = pd.to_datetime(df["ts"], utc=True, errors="coerce").tz_convert(PH_TZ)
-    frame = (
-        pd.DataFrame({"ts_local": ts_local, "wifi": df["wifi"].astype(int)})
-        .dropna(subset=["ts_local"])
-    )
-
+def build_profile(library: Library, weeks: int = 8) -> Optional[np.ndarray]:
+    """
+    Mean hourly peak per (local weekday, local hour) over the last `weeks`
+    weeks, aggregated in the database from SignalHourly. Returns a dense 7x24
+    int array (row 0 = Monday; hours never observed are 0), or None when the
+    window holds no data.
+    """
+    tz = ZoneInfo(PH_TZ)
     cutoff = pd.Timestamp.now(tz=PH_TZ) - pd.Timedelta(weeks=weeks)
-    frame = frame.loc[frame["ts_local"] >= cutoff]
-    if frame.empty:
-        return None
-
-    frame["dow"] = frame["ts_local"].dt.dayofweek.astype(int)
-    frame["hour"] = frame["ts_local"].dt.hour.astype(int)
-    prof = frame.groupby(["dow", "hour"])["wifi"].mean().round().astype(int)
-    return prof
-
-@lru_cache(maxsize=64)
-def _load_profile_cached(lib_pk: int) -> Optional[pd.Series]:
-    lib = Library.objects.get(pk=lib_pk)
-    return build_profile(lib)
-
-def load_profile(library: Library) -> Optional[pd.Series]:
-    return _load_profile_cached(int(library.pk))
-
-def profile_lookup(profile: Optional[pd.Series], target_utc: pd.Timestamp | str) -> int:
-    if profile is None or profile.empty:
+    rows = (SignalHourly.objects
+            .filter(library=library, samples__gt=0, hour__gte=cutoff)
+            .annotate(dow=ExtractIsoWeekDay("hour", tzinfo=tz), hod=ExtractHour("hour", tzinfo=tz))
+            .values("dow", "hod")
+            .annotate(mean=Avg("raw_max"))
+            .order_by()
+            .values_list("dow", "hod", "mean"))
+    prof = np.zeros((7, 24), dtype=np.int64)
+    found = False
+    for dow, hod, mean in rows:
+        prof[dow - 1, hod] = np.round(mean)  # ISO weekday 1..7 -> 0..6, same rounding as pandas
+        found = True
+    return prof if found else None
+
+def load_profile(library: Library) -> Optional[np.ndarray]:
+    """The library's profile from the shared, ingest-maintained cache (see profile_cache)."""
+    return profile_cache.get_profile(library)
+
+def profile_values(profile: Optional[np.ndarray], targets_utc: pd.DatetimeIndex) -> np.ndarray:
+    """Profile value for every timestamp of a UTC DatetimeIndex (0 without a profile)."""
+    if profile is None or len(targets_utc) == 0:
+        return np.zeros(len(targets_utc), dtype=np.int64)
+    t_local = targets_utc.tz_convert(PH_TZ)
+    return profile[t_local.dayofweek, t_local.hour]
+
+def profile_lookup(profile: Optional[np.ndarray], target_utc: pd.Timestamp | str) -> int:
+    if profile is None:
         return 0
     ts = pd.to_datetime(target_utc, utc=True, errors="coerce")
     if pd.isna(ts):
         return 0
-    if ts.tz is None:
-        ts = ts.tz_localize("UTC")
     t_local = ts.tz_convert(PH_TZ)
-    key = (int(t_local.dayofweek), int(t_local.hour))
-    try:
-        return int(profile.loc[key])
-    except Exception:
-        return 0
+    return int(profile[t_local.dayofweek, t_local.hour])
 
 # -------------------- internal wrapper --------------------
 def _forecast_steps(
@@ -118,21 +121,273 @@ def _forecast_steps(
         lib_key= lib_key
     )
 
+def rolling_history(library: Library, window: int) -> pd.Series:
+    """Hourly history ending at the current hour, as ForecastAtView rolls from (window + small cushion)."""
+    return ensure_dt_index_tz(get_series_df(library, hours=int(window) + 6), tz="UTC")
+
+
+def day_history(library: Library, window: int, start_utc: pd.Timestamp) -> pd.Series:
+    """Seed history that ENDS at the requested local midnight (ForecastDayView)."""
+    need_seed_hours = max(int(window), 24)
+    return ensure_dt_index_tz(get_series_df(library, hours=need_seed_hours, end_utc=start_utc), tz="UTC")
+
+
+def day_rollout(model, scaler, window: int, meta: dict, lib_key: str,
+                history: pd.Series, start_utc: pd.Timestamp) -> np.ndarray:
+    """The 24 hourly predictions ForecastDayView reports for the day starting at start_utc."""
+    last_known = history.index[-1]
+    base_vals = history.values.astype(float)
+    base_index = pd.DatetimeIndex(history.index)  # ensure DatetimeIndex type
+
+    # If requested day starts after last data point, roll forward to midnight
+    gap_h = int(np.ceil((start_utc - last_known).total_seconds() / 3600.0))
+    if gap_h > 0:
+        MAX_GAP = 24 * 90
+        gap_h = min(gap_h, MAX_GAP)
+        gap_preds = _forecast_steps(model, scaler, window, base_vals, gap_h, base_index, meta, lib_key)
+
+        seed_vals = np.concatenate([base_vals, gap_preds]).astype(float)
+        gap_index = pd.date_range(
+            start=last_known + pd.Timedelta(hours=1),
+            end=start_utc,
+            freq="h",
+            tz="UTC",
+        )
+        seed_index = pd.DatetimeIndex(base_index.append(gap_index))
+    else:
+        seed_vals = base_vals
+        seed_index = base_index
+
+    # Forecast the 24 hours for the requested day
+    day_preds = _forecast_steps(model, scaler, window, seed_vals, 24, seed_index, meta, lib_key)
+    return day_preds[-24:]
+
+def day_points(hours_local: pd.DatetimeIndex, out_vals) -> list[dict]:
+    """Response points (prediction with a +/-15% band) for a day's local hours."""
+    preds = [int(round(max(0.0, x))) for x in out_vals]
+    lower = [max(0, int(round(x * 0.85))) for x in out_vals]
+    upper = [int(round(x * 1.15)) for x in out_vals]
+    return [
+        {
+            "time_local": t.isoformat(),
+            "time_utc": t.tz_convert("UTC").isoformat(),
+            "predicted": p,
+            "lo": lo,
+            "hi": hi,
+        }
+        for t, p, lo, hi in zip(hours_local, preds, lower, upper)
+    ]
+
+def _when_params(params) -> list[str]:
+    """Every requested `when`: repeated parameters and/or comma-separated values."""
+    return [w.strip() for v in params.getlist("when") for w in v.split(",") if w.strip()]
+
+
+def _at_gaps(history: pd.Series, whens_utc: list[pd.Timestamp]) -> list[int]:
+    """Whole hours from the last known hour to each target (rounded up)."""
+    last_known = history.index[-1]
+    return [int(np.ceil((w - last_known).total_seconds() / 3600.0)) for w in whens_utc]
+
+
+def at_inputs(lib: Library, family: str, version: str, window: int, history: pd.Series,
+              whens_utc: list[pd.Timestamp]) -> tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    The data at_points needs besides the model: (stored rolling run, profile).
+    The stored run is read only for live targets (1-2 h past the last known
+    hour, where it equals the live rollout); the profile only when some
+    target will be seeded or fall back to it.
+    """
+    if history.empty or len(history) < int(window):
+        return None, load_profile(lib)
+    gaps = _at_gaps(history, whens_utc)
+    live = [g for g in gaps if 1 <= g <= 2] if history.iloc[-1] <= 0 else []
+    stored = forecast_store.load_prefix(lib, family, version, history.index[-1], max(live)) if live else None
+    return stored, (load_profile(lib) if any(g > 2 for g in gaps) else None)
+
+
+def at_points(model, scaler, window: int, meta: dict, lib_key: str, history: pd.Series,
+              whens_utc: list[pd.Timestamp], stored: Optional[np.ndarray],
+              profile: Optional[np.ndarray]) -> list[dict]:
+    """
+    {mode, stale, from_store, prediction} for each UTC target, decided per target exactly
+    as a single forecast/at request would, but sharing the work: one live
+    rollout to the farthest live target, and the seeded targets (each with
+    its own profile-filled seed) rolled out together through
+    walk_forward_many. `stored` and `profile` come from at_inputs; no
+    database access happens here. Live targets read from the stored run keep
+    mode "live" and set from_store.
+    """
+    def point(mode: str, stale: bool, value: float, from_store: bool = False) -> dict:
+        return {"mode": mode, "stale": stale, "from_store": from_store,
+                "prediction": int(round(max(0.0, float(value))))}
+
+    def profile_point(w: pd.Timestamp) -> dict:
+        return point("profile", True, max(0, profile_lookup(profile, w)))
+
+    out: list[Optional[dict]] = [None] * len(whens_utc)
+
+    if history.empty or len(history) < int(window):
+        return [profile_point(w) for w in whens_utc]
+
+    last_known = history.index[-1]
+    last_known_value = history.iloc[-1]
+    gaps = _at_gaps(history, whens_utc)
+    base_vals = history.values.astype(float)
+    base_index = pd.DatetimeIndex(history.index)
+
+    # Use actual data for very recent gaps when available
+    for i, gap_h in enumerate(gaps):
+        if gap_h <= 2 and last_known_value > 0:
+            out[i] = point("actual", False, last_known_value)
+
+    # Precomputed rolling forecast from this hour (compute_forecasts), if still current: the same
+    # values as the live rollout below, so only live targets are served from it
+    for i, gap_h in enumerate(gaps):
+        if out[i] is None and stored is not None and 1 <= gap_h <= min(2, len(stored)):
+            out[i] = point("live", False, stored[gap_h - 1], from_store=True)
+
+    # Live: one rollout from the last known hour to the farthest target
+    live = [i for i, g in enumerate(gaps) if out[i] is None and g <= 2]
+    if live:
+        preds = _forecast_steps(model, scaler, window, base_vals, max(max(1, gaps[i]) for i in live),
+                                base_index, meta, lib_key)
+        for i in live:
+            out[i] = point("live", False, preds[max(1, gaps[i]) - 1])
+
+    # Seeded: history + profile values up to the target, then the model
+    seeded = [i for i, g in enumerate(gaps) if out[i] is None and g <= 24]
+    if seeded:
+        # Hours after last_known up to each target (the target itself when it is on the hour)
+        fills = {i: int((whens_utc[i] - last_known) // pd.Timedelta(hours=1)) for i in seeded}
+        fill_idx = pd.date_range(start=last_known + pd.Timedelta(hours=1), periods=max(fills.values()),
+                                 freq="h", tz="UTC")
+        fill_vals = profile_values(profile, fill_idx).astype(float)
+        jobs = [{"model": model, "scaler": scaler, "window": int(window),
+                 "base_series": np.concatenate([base_vals, fill_vals[:fills[i]]]),
+                 "base_index": base_index.append(fill_idx[:fills[i]]), "meta": meta, "lib_key": lib_key}
+                for i in seeded]
+        runs = walk_forward_many(jobs, max(gaps[i] for i in seeded))
+        for i, preds in zip(seeded, runs):
+            out[i] = point("seeded", True, preds[gaps[i] - 1])
+
+    for i, w in enumerate(whens_utc):
+        if out[i] is None:
+            out[i] = profile_point(w)
+    return cast(list, out)
+
+
+def at_response(lib: Library, family: str, window: int, meta: dict, history: pd.Series, single: bool,
+                whens_utc: list[pd.Timestamp], points: list[dict]) -> dict:
+    """forecast/at body: the single-target shape when one `when` was sent, else `points`."""
+    data_ts_latest = None if history.empty or len(history) < int(window) else history.index[-1].isoformat()
+    if single:
+        return {
+            "ok": True, **points[0],
+            "library": lib.key, "model_family": family,
+            "model_version": meta.get("model_version"),
+            "data_ts_latest": data_ts_latest,
+            "requested_utc": whens_utc[0].isoformat(),
+            "generated_at": timezone.now().isoformat(),
+        }
+    return {
+        "ok": True,
+        "library": lib.key, "model_family": family,
+        "model_version": meta.get("model_version"),
+        "data_ts_latest": data_ts_latest,
+        "points": [
+            {"requested_utc": w.isoformat(), "requested_local": w.tz_convert(PH_TZ).isoformat(), **p}
+            for w, p in zip(whens_utc, points)
+        ],
+        "generated_at": timezone.now().isoformat(),
+    }
+
+
+def day_hours(day_local: pd.Timestamp) -> pd.DatetimeIndex:
+    """The 24 local hours of a local date."""
+    return pd.date_range(day_local, day_local + pd.Timedelta(hours=23), freq="h", tz=PH_TZ)
+
+
+def day_response(lib: Library, day_local: pd.Timestamp, out_vals, family: str, version: str,
+                 last_known: pd.Timestamp) -> dict:
+    return {
+        "ok": True,
+        "library": lib.key,
+        "date_local": day_local.date().isoformat(),
+        "points": day_points(day_hours(day_local), out_vals),
+        "model_family": family,
+        "model_version": version,
+        "data_ts_latest": last_known.isoformat(),
+        "generated_at": timezone.now().isoformat(),
+    }
+
+
+def history_bounds(date_s: str) -> Optional[tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp]]:
+    """(local day, first UTC instant, last UTC second) of a history/day date; None when invalid."""
+    day_local = pd.to_datetime(date_s, errors="coerce")
+    if pd.isna(day_local):
+        return None
+    day_local = day_local.normalize().tz_localize(PH_TZ)
+    start_utc = day_local.tz_convert("UTC")
+    end_utc = (day_local + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)).tz_convert("UTC")
+    return day_local, start_utc, end_utc
+
+
+def history_rows(lib: Library, start_utc: pd.Timestamp, end_utc: pd.Timestamp):
+    """Observed (hour, raw_max) rows of the day, oldest first (a lazy queryset)."""
+    return (
+        SignalHourly.objects
+        .filter(library=lib, hour__gte=start_utc, hour__lte=end_utc, samples__gt=0)
+        .order_by("hour")
+        .values_list("hour", "raw_max")
+    )
+
+
+def history_points(rows) -> list[dict]:
+    """history/day points from (hour, raw_max) rows."""
+    df = pd.DataFrame(list(rows), columns=["ts", "wifi"])
+    if df.empty:
+        return []
+    df["ts"] = pd.to_datetime(df["ts"], utc=True, errors="coerce")
+    df = df.dropna(subset=["ts"]).set_index("ts").sort_index()
+
+    idx = cast(pd.DatetimeIndex, df.index)
+    df.index = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
+
+    series = []
+    for ts_utc, v in df["wifi"].items():
+        ts_utc = cast(pd.Timestamp, ts_utc)
+        series.append({
+            "time_local": ts_utc.tz_convert(PH_TZ).isoformat(),
+            "time_utc": ts_utc.isoformat(),
+            "actual": int(v),
+        })
+    return series
+
+
 # -------------------- views --------------------
 class ForecastAtView(APIView):
+    """
+    Point forecast(s). One `when` returns a single prediction; several (repeat
+    the parameter or separate with commas) return `points` sorted by time,
+    each with its own mode, computed from one shared history and rollout.
+    """
     permission_classes = [AllowAny]
+    MAX_POINTS = 48
 
+    @cached_forecast("at", "when")
     def get(self, request):
         try:
             lib_key = (request.query_params.get("library") or "").strip()
             family_q = (request.query_params.get("family") or "").strip() or None
             version_q = (request.query_params.get("version") or "").strip() or None
-            when_s = request.query_params.get("when")
+            when_list = _when_params(request.query_params)
         except Exception as e:
             return Response({"detail": str(e)}, status=400)
 
-        if not lib_key or not when_s:
+        if not lib_key or not when_list:
             return Response({"detail": "Missing 'library' or 'when'."}, status=400)
+        if len(when_list) > self.MAX_POINTS:
+            return Response({"detail": f"At most {self.MAX_POINTS} 'when' values per request."}, status=400)
 
         lib = get_object_or_404(Library, key=lib_key)
 
@@ -144,114 +399,24 @@ class ForecastAtView(APIView):
             return Response({"detail": f"Unknown model family: {family}"}, status=400)
 
         try:
-            when_local = parse_local_dt(when_s)
+            whens_utc = sorted({parse_local_dt(w).tz_convert("UTC") for w in when_list})
         except ValueError as e:
             return Response({"detail": str(e)}, status=400)
 
-        when_utc = when_local.tz_convert("UTC")
-
         model, scaler, window, meta = load_artifacts_cached(family, lib.key, version)
 
         # Pull only what's needed (window + small cushion)
-        need = int(window) + 6
-        history = get_series_df(lib, hours=need)
-        history = ensure_dt_index_tz(history, tz="UTC")
-
-        if history.empty or len(history) < int(window):
-            prof = load_profile(lib)
-            yhat = profile_lookup(prof, when_utc)
-            return Response({
-                "ok": True, "stale": True, "mode": "profile",
-                "prediction": int(max(0, yhat)),
-                "library": lib.key, "model_family": family,
-                "model_version": meta.get("model_version"),
-                "data_ts_latest": None,
-                "requested_utc": when_utc.isoformat(),
-                "generated_at": timezone.now().isoformat(),
-            }, status=200)
-
-        last_known = history.index[-1]
-        last_known_value = history.iloc[-1]  # Get the actual value
-        gap_h = int(np.ceil((when_utc - last_known).total_seconds() / 3600.0))
-
-        base_vals = history.values.astype(float)
-        base_index = pd.DatetimeIndex(history.index)  # satisfy type checkers
-
-        # FIXED LOGIC: Use actual data for very recent gaps when available
-        if gap_h <= 2 and last_known_value > 0:
-            # For gaps up to 2 hours with valid data, use actual measurement
-            # This is more reliable than forecasting with sparse data
-            return Response({
-                "ok": True, "stale": False, "mode": "actual",
-                "prediction": int(round(max(0, last_known_value))),
-                "library": lib.key, "model_family": family,
-                "model_version": meta.get("model_version"),
-                "data_ts_latest": last_known.isoformat(),
-                "requested_utc": when_utc.isoformat(),
-                "generated_at": timezone.now().isoformat(),
-            }, status=200)
-
-        # Original forecast logic for other cases
-        if gap_h <= 2:
-            yhat = float(_forecast_steps(model, scaler, window, base_vals, max(1, gap_h), base_index, meta, lib.key)[-1])
-            return Response({
-                "ok": True, "stale": False, "mode": "live",
-                "prediction": int(round(max(0, yhat))),
-                "library": lib.key, "model_family": family,
-                "model_version": meta.get("model_version"),
-                "data_ts_latest": last_known.isoformat(),
-                "requested_utc": when_utc.isoformat(),
-                "generated_at": timezone.now().isoformat(),
-            }, status=200)
-
-        if gap_h <= 24:
-            prof = load_profile(lib)
-            s = history.asfreq("h")  # UTC index; 'h' avoids FutureWarning
-            fill_idx = pd.date_range(
-                start=last_known + pd.Timedelta(hours=1),
-                end=when_utc,
-                freq="h",
-                tz="UTC",
-            )
-            fill_vals = [profile_lookup(prof, t) for t in fill_idx]
-            s_filled = pd.concat([s, pd.Series(fill_vals, index=fill_idx)], axis=0).astype(float)
-            s_filled = ensure_dt_index_tz(s_filled, tz="UTC")
-
-            yhat = float(_forecast_steps(
-                model, scaler, window,
-                base_vals=s_filled.values.astype(float),
-                steps=max(1, gap_h),
-                base_index=pd.DatetimeIndex(s_filled.index),
-                meta=meta,
-                lib_key=lib.key
-            )[-1])
-
-            return Response({
-                "ok": True, "stale": True, "mode": "seeded",
-                "prediction": int(round(max(0, yhat))),
-                "library": lib.key, "model_family": family,
-                "model_version": meta.get("model_version"),
-                "data_ts_latest": last_known.isoformat(),
-                "requested_utc": when_utc.isoformat(),
-                "generated_at": timezone.now().isoformat(),
-            }, status=200)
-
-        prof = load_profile(lib)
-        yhat = profile_lookup(prof, when_utc)
-        return Response({
-            "ok": True, "stale": True, "mode": "profile",
-            "prediction": int(max(0, yhat)),
-            "library": lib.key, "model_family": family,
-            "model_version": meta.get("model_version"),
-            "data_ts_latest": last_known.isoformat(),
-            "requested_utc": when_utc.isoformat(),
-            "generated_at": timezone.now().isoformat(),
-        }, status=200)
+        history = rolling_history(lib, window)
+        stored, profile = at_inputs(lib, family, version, window, history, whens_utc)
+        points = at_points(model, scaler, window, meta, lib.key, history, whens_utc, stored, profile)
+        return Response(at_response(lib, family, window, meta, history, len(when_list) == 1, whens_utc, points),
+                        status=200)
 
 
 class ForecastDayView(APIView):
     permission_classes = [AllowAny]
 
+    @cached_forecast("day", "date")
     def get(self, request):
         try:
             lib_key = (request.query_params.get("library") or "").strip()
@@ -278,64 +443,85 @@ class ForecastDayView(APIView):
         except ValueError as e:
             return Response({"detail": str(e)}, status=400)
 
-        # Build target hours for requested local date
-        hours_local = pd.date_range(day_local, day_local + pd.Timedelta(hours=23), freq="h", tz=PH_TZ)
-        hours_utc = hours_local.tz_convert("UTC")
-        start_utc = hours_utc[0]
+        start_utc = day_local.tz_convert("UTC")
 
-        model, scaler, window, meta = load_artifacts_cached(family, lib.key, version)
+        # Rows precomputed by compute_forecasts, while they still match the data
+        out_vals = forecast_store.load_run(lib, family, version, start_utc, 24)
+        if out_vals is not None:
+            last_known = start_utc
+        else:
+            model, scaler, window, meta = load_artifacts_cached(family, lib.key, version)
+            history = day_history(lib, window, start_utc)
+            if len(history) < int(window):
+                return Response({"detail": "Not enough history to predict."}, status=422)
+            last_known = history.index[-1]
+            out_vals = day_rollout(model, scaler, window, meta, lib.key, history, start_utc)
 
-        # Seed history that ENDS at requested midnight (or now if future)
-        need_seed_hours = max(int(window), 24)
-        history = get_series_df(lib, hours=need_seed_hours, end_utc=start_utc)
-        history = ensure_dt_index_tz(history, tz="UTC")
-        if len(history) < int(window):
-            return Response({"detail": "Not enough history to predict."}, status=422)
+        return Response(day_response(lib, day_local, out_vals, family, version, last_known), status=200)
 
-        last_known = history.index[-1]
-        base_vals = history.values.astype(float)
-        base_index = pd.DatetimeIndex(history.index)  # ensure DatetimeIndex type
-
-        # If requested day starts after last data point, roll forward to midnight
-        gap_h = int(np.ceil((start_utc - last_known).total_seconds() / 3600.0))
-        if gap_h > 0:
-            MAX_GAP = 24 * 90
-            gap_h = min(gap_h, MAX_GAP)
-            gap_preds = _forecast_steps(model, scaler, window, base_vals, gap_h, base_index, meta, lib.key)
-
-            seed_vals = np.concatenate([base_vals, gap_preds]).astype(float)
-            gap_index = pd.date_range(
-                start=last_known + pd.Timedelta(hours=1),
-                end=start_utc,
-                freq="h",
-                tz="UTC",
-            )
-            seed_index = pd.DatetimeIndex(base_index.append(gap_index))
-        else:
-            seed_vals = base_vals
-            seed_index = base_index
 
-        # Forecast the 24 hours for the requested day
-        day_preds = _forecast_steps(model, scaler, window, seed_vals, 24, seed_index, meta, lib.key)
-        out_vals = day_preds[-24:]
+class ForecastRangeView(APIView):
+    """
+    Forecasts for every local day in [start, end] from ONE rollout: seeded
+    like forecast/day's first day, then rolled 24 * days steps and sliced per
+    day, so the cost grows linearly with the span. The first day matches
+    forecast/day; later days continue from the predicted hours before them.
+    """
+    permission_classes = [AllowAny]
+    MAX_DAYS = 90
+
+    @cached_forecast("range", "start", "end")
+    def get(self, request):
+        lib_key = (request.query_params.get("library") or "").strip()
+        family_q = (request.query_params.get("family") or "").strip() or None
+        version_q = (request.query_params.get("version") or "").strip() or None
+        start_s = request.query_params.get("start")
+        end_s = request.query_params.get("end")
+
+        if not lib_key or not start_s or not end_s:
+            return Response({"detail": "Missing 'library', 'start' or 'end'."}, status=400)
 
-        preds = [int(round(max(0.0, x))) for x in out_vals]
-        lower = [max(0, int(round(x * 0.85))) for x in out_vals]
-        upper = [int(round(x * 1.15)) for x in out_vals]
+        lib = get_object_or_404(Library, key=lib_key)
+
+        fam_default, ver_default = get_active_family_version(lib)
+        family = family_q or fam_default
+        version = version_q or ver_default
+        if family not in FAMILIES:
+            return Response({"detail": f"Unknown model family: {family}"}, status=400)
+
+        try:
+            start_local = parse_local_date(start_s)
+            end_local = parse_local_date(end_s)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+        n_days = (end_local - start_local).days + 1
+        if n_days < 1:
+            return Response({"detail": "'end' is before 'start'."}, status=400)
+        if n_days > self.MAX_DAYS:
+            return Response({"detail": f"At most {self.MAX_DAYS} days per request."}, status=400)
+
+        hours_local = pd.date_range(start_local, periods=24 * n_days, freq="h", tz=PH_TZ)
+        start_utc = hours_local[0].tz_convert("UTC")
+
+        model, scaler, window, meta = load_artifacts_cached(family, lib.key, version)
+        history = day_history(lib, window, start_utc)
+        if len(history) < int(window):
+            return Response({"detail": "Not enough history to predict."}, status=422)
+        last_known = history.index[-1]
+        out_vals = _forecast_steps(model, scaler, window, history.values.astype(float), 24 * n_days,
+                                   pd.DatetimeIndex(history.index), meta, lib.key)
 
         return Response({
             "ok": True,
             "library": lib.key,
-            "date_local": day_local.date().isoformat(),
-            "points": [
+            "start_local": start_local.date().isoformat(),
+            "end_local": end_local.date().isoformat(),
+            "days": [
                 {
-                    "time_local": t.isoformat(),
-                    "time_utc": tu.isoformat(),
-                    "predicted": p,
-                    "lo": lo,
-                    "hi": hi,
+                    "date_local": hours_local[24 * d].date().isoformat(),
+                    "points": day_points(hours_local[24 * d: 24 * (d + 1)], out_vals[24 * d: 24 * (d + 1)]),
                 }
-                for t, tu, p, lo, hi in zip(hours_local, hours_utc, preds, lower, upper)
+                for d in range(n_days)
             ],
             "model_family": family,
             "model_version": version,
@@ -344,6 +530,80 @@ class ForecastDayView(APIView):
         }, status=200)
 
 
+def utilization(value: float, capacity: float) -> float:
+    return round(max(0.0, float(value)) / capacity, 3) if capacity else 0.0
+
+
+class CampusForecastView(APIView):
+    """
+    Current occupancy and the next `hours` hourly forecasts of EVERY library
+    with its active model, in one response. Active models are resolved in
+    bulk and all rollouts run through walk_forward_many, so libraries whose
+    models share a topology take one stacked forward pass per step instead
+    of one batch-of-one predict each. A library whose artifacts fail to load
+    is reported with an `error` instead of failing the request.
+    """
+    permission_classes = [AllowAny]
+    DEFAULT_HOURS = 3
+    MAX_HOURS = 24
+
+    def get(self, request):
+        try:
+            hours = int(request.query_params.get("hours") or self.DEFAULT_HOURS)
+        except ValueError:
+            return Response({"detail": "'hours' must be an integer."}, status=400)
+        if not 1 <= hours <= self.MAX_HOURS:
+            return Response({"detail": f"'hours' must be between 1 and {self.MAX_HOURS}."}, status=400)
+
+        libs = list(Library.objects.order_by("key"))
+        actives = get_active_family_versions(libs)
+        entries, jobs, pending = [], [], []
+        for lib in libs:
+            family, version = actives[lib.pk]
+            capacity = LIBRARY_CAPACITIES.get(lib.key, 100)
+            entry = {"library": lib.key, "name": lib.name, "capacity": capacity,
+                     "model_family": family, "model_version": version}
+            entries.append(entry)
+            try:
+                model, scaler, window, meta = load_artifacts_cached(family, lib.key, version)
+            except Exception as e:
+                entry["error"] = f"{type(e).__name__}: {e}"
+                continue
+            history = rolling_history(lib, window)
+            if len(history) < int(window):
+                entry["error"] = "Not enough history to predict."
+                continue
+            current = float(history.iloc[-1])
+            entry.update({
+                "current": int(round(max(0.0, current))),
+                "current_utilization": utilization(current, capacity),
+                "data_ts_latest": history.index[-1].isoformat(),
+            })
+            jobs.append({"model": model, "scaler": scaler, "window": int(window),
+                         "base_series": history.values.astype(float),
+                         "base_index": pd.DatetimeIndex(history.index), "meta": meta, "lib_key": lib.key})
+            pending.append((entry, history.index[-1]))
+
+        for (entry, last_known), preds in zip(pending, walk_forward_many(jobs, hours)):
+            targets = pd.date_range(last_known + pd.Timedelta(hours=1), periods=hours, freq="h", tz="UTC")
+            entry["next"] = [
+                {
+                    "time_local": t.tz_convert(PH_TZ).isoformat(),
+                    "time_utc": t.isoformat(),
+                    "predicted": int(round(max(0.0, y))),
+                    "utilization": utilization(y, entry["capacity"]),
+                }
+                for t, y in zip(targets, preds)
+            ]
+
+        return Response({
+            "ok": True,
+            "hours": hours,
+            "libraries": entries,
+            "generated_at": timezone.now().isoformat(),
+        }, status=200)
+
+
 class HistoryDayView(APIView):
     permission_classes = [AllowAny]
 
@@ -359,43 +619,14 @@ class HistoryDayView(APIView):
 
         lib = get_object_or_404(Library, key=lib_key)
 
-        day_local = pd.to_datetime(date_s, errors="coerce")
-        if pd.isna(day_local):
+        bounds = history_bounds(date_s)
+        if bounds is None:
             return Response({"detail": "Invalid date."}, status=400)
-        day_local = day_local.normalize().tz_localize(PH_TZ)
-
-        start_utc = day_local.tz_convert("UTC")
-        end_utc = (day_local + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)).tz_convert("UTC")
-
-        qs = (
-            Signal.objects
-            .filter(library=lib, ts__gte=start_utc, ts__lte=end_utc)
-            .order_by("ts")
-            .values_list("ts", "wifi_clients")
-        )
-        df = pd.DataFrame(qs, columns=["ts", "wifi"])
-
-        if df.empty:
-            series: list[dict] = []
-        else:
-            df["ts"] = pd.to_datetime(df["ts"], utc=True, errors="coerce")
-            df = df.dropna(subset=["ts"]).set_index("ts").sort_index()
-
-            idx = cast(pd.DatetimeIndex, df.index)
-            df.index = idx.tz_localize("UTC") if idx.tz is None else idx.tz_convert("UTC")
-
-            series = []
-            for ts_utc, v in df["wifi"].items():
-                ts_utc = cast(pd.Timestamp, ts_utc)
-                series.append({
-                    "time_local": ts_utc.tz_convert(PH_TZ).isoformat(),
-                    "time_utc": ts_utc.isoformat(),
-                    "actual": int(v),
-                })
+        day_local, start_utc, end_utc = bounds
 
         return Response({
             "ok": True,
             "library": lib.key,
             "date_local": day_local.date().isoformat(),
-            "points": series,
+            "points": history_points(history_rows(lib, start_utc, end_utc)),
         }, status=200)
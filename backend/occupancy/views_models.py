@@ -1,5 +1,4 @@
 # occupancy/views_models.py
-from pathlib import Path
 from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.db import transaction
@@ -11,11 +10,10 @@ import json
 
 from .models import Library, ModelCandidate, ActiveModel
 from .serializers import ModelCandidateSerializer, ActiveModelSerializer
+from .ml.loader import REGISTRY
 from .utils.artifacts import read_meta_version
 from .views_forecast import FAMILIES
 
-ARTIFACTS_ROOT = Path(settings.BASE_DIR) / "artifacts"
-
 class CandidatesView(APIView):
     permission_classes = [AllowAny]  # or IsAdminUser if you prefer
 
@@ -71,44 +69,19 @@ class SyncCandidatesView(APIView):
     permission_classes = [AllowAny] if settings.DEBUG else [IsAdminUser]
 
     def post(self, request):
+        # Explicit admin action: pick up new folders right away, not after the registry TTL
+        REGISTRY.refresh(force=True)
         created = 0
         for lib in Library.objects.all():
-            for family_dir in ARTIFACTS_ROOT.iterdir():
-                if not family_dir.is_dir():
-                    continue
-                family = family_dir.name
-                if family not in FAMILIES:
+            # Flat artifacts/<family>/<lib_key>/* (meta.json's version, or v1)
+            # and versioned artifacts/<family>/<lib_key>/<version>/* folders
+            for entry in REGISTRY.entries(lib_key=lib.key):
+                if entry.family not in FAMILIES:
                     continue  # skip stray folders
-
-                lib_dir = family_dir / lib.key
-                if not lib_dir.exists():
-                    continue
-
-                families = []
-                meta_p = lib_dir / "meta.json"
-
-                # Flat layout: artifacts/<family>/<lib_key>/*
-                if (lib_dir / "model.keras").exists() or meta_p.exists():
-                    # Prefer meta.json’s version if present
-                    try:
-                        ver = read_meta_version(family, lib.key) or "v1"
-                    except Exception:
-                        ver = "v1"
-                    families.append((family, str(ver), lib_dir))
-                else:
-                    # Versioned subfolders: artifacts/<family>/<lib_key>/<version>/*
-                    for version_dir in lib_dir.iterdir():
-                        if version_dir.is_dir() and (
-                            (version_dir / "model.keras").exists() or
-                            (version_dir / "meta.json").exists()
-                        ):
-                            families.append((family, version_dir.name, version_dir))
-
-                for fam, ver, _p in families:
-                    _, made = ModelCandidate.objects.get_or_create(
-                        library=lib, family=fam, version=str(ver)
-                    )
-                    created += int(made)
+                _, made = ModelCandidate.objects.get_or_create(
+                    library=lib, family=entry.family, version=str(entry.version)
+                )
+                created += int(made)
 
         return Response({"ok": True, "created": created})
 
@@ -4,8 +4,10 @@ from rest_framework.response import Response
 from rest_framework import status
 import pandas as pd
 from .permissions import IsAdminOrReadOnly
+from django.db import transaction
 from .models import Library, Signal
 from .ingest import aggregate_per_cleaned_library
+from .rollup import rollup_hours
 from typing import List
 
 class CleanedWifiCsvUploadView(APIView):
@@ -45,7 +47,10 @@ class CleanedWifiCsvUploadView(APIView):
             )
             for (ts, count) in agg.itertuples(index=False, name=None)
         ]
-        Signal.objects.bulk_create(rows, ignore_conflicts=True, batch_size=1000)
-
+        with transaction.atomic():
+            Signal.objects.bulk_create(rows, ignore_conflicts=True, batch_size=1000)
+            # Keep the hourly rollup in step with the signals it summarizes
+            if rows:
+                rollup_hours(lib, min(r.ts for r in rows), max(r.ts for r in rows))
 
         return Response({"ok": True, "rows_ingested": len(rows)}, status=201)
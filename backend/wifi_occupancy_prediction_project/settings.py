@@ -67,7 +67,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",        
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "wifi_occupancy_prediction_project.middleware.AsyncWhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -129,6 +129,27 @@ else:
         }
     }
 
+# Cache
+# Shared across gunicorn workers through Redis when REDIS_URL is set (docker-compose does);
+# otherwise a per-process in-memory cache.
+REDIS_URL = os.getenv("REDIS_URL", "").strip()
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+            "KEY_PREFIX": "wifi",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "wifi-occupancy",
+        }
+    }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -252,6 +273,7 @@ LOGGING = {
     "loggers": {
         "allauth": {"handlers": ["console"], "level": "DEBUG"},
         "django.request": {"handlers": ["console"], "level": "DEBUG"},
+        "occupancy": {"handlers": ["console"], "level": os.getenv("OCCUPANCY_LOG_LEVEL", "INFO")},
     },
 }
 